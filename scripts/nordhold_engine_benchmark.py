@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import argparse
+import json
+from dataclasses import replace
+from pathlib import Path
+import random
+import sys
+import time
+import tracemalloc
+from typing import Any
+
+from nordhold.realtime.catalog import CatalogRepository
+from nordhold.realtime.compiled import compile_scenario
+from nordhold.realtime.engine import evaluate_timeline
+from nordhold.realtime.expected_kernel import ExpectedKernel, expected_kernel_available
+from nordhold.realtime.rng import RANDOM_STREAMS
+from nordhold.realtime.models import BuildPlan, ScenarioDefinition, SpawnDefinition, WaveDefinition
+
+
+def _large_wave_scenario(base: ScenarioDefinition, enemies: int, duration_s: float) -> ScenarioDefinition:
+    # Mostly raiders with a barrier/regen escort, spread over the first half of the wave.
+    guards = max(1, enemies // 5)
+    raiders = max(1, enemies - guards)
+    spawn_window = duration_s * 0.5
+    wave = WaveDefinition(
+        index=1,
+        duration_s=duration_s,
+        spawns=(
+            SpawnDefinition(at_s=0.0, enemy_id="raider", count=raiders, interval_s=spawn_window / raiders),
+            SpawnDefinition(at_s=1.0, enemy_id="barrier_guard", count=guards, interval_s=spawn_window / guards),
+        ),
+    )
+    return replace(base, waves=(wave,))
+
+
+def _scale_fire_rates(base: ScenarioDefinition, factor: float) -> ScenarioDefinition:
+    if factor == 1.0:
+        return base
+    towers = {
+        tower_id: replace(tower, base_stats=replace(tower.base_stats, fire_rate=tower.base_stats.fire_rate * factor))
+        for tower_id, tower in base.towers.items()
+    }
+    return replace(base, towers=towers)
+
+
+def _benchmark_build(scenario_id: str, towers: int) -> BuildPlan:
+    frost = max(1, towers // 3)
+    arrows = max(1, towers - frost)
+    return BuildPlan.from_dict(
+        {
+            "scenario_id": scenario_id,
+            "towers": [
+                {"tower_id": "arrow_tower", "count": arrows, "level": 2},
+                {
+                    "tower_id": "frost_tower",
+                    "count": frost,
+                    "level": 1,
+                    "focus_priorities": ["barrier", "highest_hp"],
+                    "focus_until_death": True,
+                },
+            ],
+        }
+    )
+
+
+def _time_combat(
+    scenario: ScenarioDefinition,
+    build: BuildPlan,
+    *,
+    seed: int,
+    repeat: int,
+    mode: str = "combat",
+    bulk_dt_s: float = 0.1,
+    random_streams: str = "sequential",
+) -> dict[str, Any]:
+    timings: list[float] = []
+    result = None
+    for attempt in range(max(1, repeat)):
+        started = time.perf_counter()
+        result = evaluate_timeline(
+            scenario=scenario,
+            build=build,
+            dataset_version="benchmark",
+            mode=mode,
+            seed=seed + attempt,
+            monte_carlo_runs=1,
+            random_streams=random_streams,
+            bulk_dt_s=bulk_dt_s,
+        )
+        timings.append(time.perf_counter() - started)
+    wave = result.wave_results[0] if result is not None else None
+    return {
+        "best_s": min(timings),
+        "mean_s": sum(timings) / len(timings),
+        "combat_damage": wave.combat_damage if wave is not None else 0.0,
+        "leaks": wave.leaks if wave is not None else 0.0,
+        "clear_time_s": wave.clear_time_s if wave is not None else 0.0,
+    }
+
+
+def _measure_combat_memory(scenario: ScenarioDefinition, build: BuildPlan, *, seed: int) -> dict[str, Any]:
+    # Compile (and warm the stats cache) first so the peak covers the combat run only.
+    compiled = compile_scenario(scenario)
+    evaluate_timeline(compiled, build, "benchmark", "combat", seed, 1)
+    tracemalloc.start()
+    try:
+        evaluate_timeline(compiled, build, "benchmark", "combat", seed, 1)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    enemies = compiled.waves[0].total_enemies if compiled.waves else 0
+    return {
+        "peak_bytes": peak,
+        "bytes_per_enemy": peak / max(1, enemies),
+    }
+
+
+def _random_builds(scenario: ScenarioDefinition, count: int, *, seed: int) -> list[BuildPlan]:
+    rng = random.Random(seed)
+    tower_ids = sorted(scenario.towers)
+    builds = []
+    for _ in range(count):
+        towers = [
+            {"tower_id": tower_id, "count": rng.randint(0, 4), "level": rng.randint(0, 3)}
+            for tower_id in rng.sample(tower_ids, k=rng.randint(1, len(tower_ids)))
+        ]
+        builds.append(BuildPlan.from_dict({"scenario_id": scenario.id, "towers": towers}))
+    return builds
+
+
+def _time_expected_batch(scenario: ScenarioDefinition, builds: list[BuildPlan], *, repeat: int) -> dict[str, Any]:
+    compiled = compile_scenario(scenario)
+    scalar_timings: list[float] = []
+    kernel_timings: list[float] = []
+    scalar_totals: list[float] = []
+    kernel_totals = None
+    for _ in range(max(1, repeat)):
+        started = time.perf_counter()
+        scalar_totals = [
+            evaluate_timeline(compiled, build, "benchmark", "expected", 0, 1).totals["potential_damage"]
+            for build in builds
+        ]
+        scalar_timings.append(time.perf_counter() - started)
+
+        # A fresh kernel per attempt, so row resolution is part of the measured cost.
+        started = time.perf_counter()
+        kernel_totals = ExpectedKernel(compiled).score(builds).totals()["potential_damage"]
+        kernel_timings.append(time.perf_counter() - started)
+
+    max_error = max(
+        (abs(float(kernel) - scalar) / max(1e-12, abs(scalar)) for kernel, scalar in zip(kernel_totals, scalar_totals)),
+        default=0.0,
+    )
+    return {
+        "builds": len(builds),
+        "scalar_best_s": min(scalar_timings),
+        "kernel_best_s": min(kernel_timings),
+        "scalar_builds_per_s": len(builds) / max(1e-12, min(scalar_timings)),
+        "kernel_builds_per_s": len(builds) / max(1e-12, min(kernel_timings)),
+        "speedup": min(scalar_timings) / max(1e-12, min(kernel_timings)),
+        "max_rel_error": max_error,
+    }
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="nordhold-engine-benchmark",
+        description="Time the realtime combat simulator on synthetic large waves.",
+    )
+    parser.add_argument("--dataset-version", default="1.0.0")
+    parser.add_argument("--scenario-id", default="normal_baseline")
+    parser.add_argument("--enemies", type=int, nargs="+", default=[100, 500, 1000, 2000])
+    parser.add_argument("--towers", type=int, default=12)
+    parser.add_argument("--duration-s", type=float, default=60.0)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=2026)
+    parser.add_argument(
+        "--fire-rate-scale",
+        type=float,
+        default=1.0,
+        help="Multiply every tower fire rate, e.g. 20 for fast-firing towers with many events per second.",
+    )
+    parser.add_argument(
+        "--bulk-dt",
+        type=float,
+        nargs="+",
+        default=[],
+        help="Also run mode combat_bulk with these steps (seconds) and compare it with the event engine.",
+    )
+    parser.add_argument(
+        "--random-streams",
+        choices=RANDOM_STREAMS,
+        default="sequential",
+        help="'counter' gives both engines the same draws per tower shot, isolating the timestep error.",
+    )
+    parser.add_argument(
+        "--memory",
+        action="store_true",
+        help="Also report the tracemalloc peak of one combat wave (e.g. --enemies 10000 --memory).",
+    )
+    parser.add_argument(
+        "--expected-batch",
+        type=int,
+        default=0,
+        metavar="BUILDS",
+        help="Also score this many random builds in expected mode, scalar loop vs the batched kernel (needs numpy).",
+    )
+    parser.add_argument("--json", action="store_true", help="Print machine-readable JSON instead of a table.")
+    return parser
+
+
+def main() -> int:
+    args = build_parser().parse_args()
+    project_root = Path(__file__).resolve().parents[1]
+    repo = CatalogRepository(project_root=project_root)
+    _, base = repo.load_scenario(args.scenario_id, args.dataset_version)
+    base = _scale_fire_rates(base, args.fire_rate_scale)
+    build = _benchmark_build(base.id, args.towers)
+    timing = {"seed": args.seed, "repeat": args.repeat, "random_streams": args.random_streams}
+
+    rows: list[dict[str, Any]] = []
+    bulk_rows: list[dict[str, Any]] = []
+    for enemies in args.enemies:
+        scenario = compile_scenario(_large_wave_scenario(base, enemies, args.duration_s))
+        row = {"enemies": enemies, "towers": args.towers}
+        row.update(_time_combat(scenario, build, **timing))
+        if args.memory:
+            row.update(_measure_combat_memory(scenario, build, seed=args.seed))
+        rows.append(row)
+
+        for dt_s in args.bulk_dt:
+            bulk = _time_combat(scenario, build, mode="combat_bulk", bulk_dt_s=dt_s, **timing)
+            reference = row["combat_damage"]
+            bulk_rows.append(
+                {
+                    "enemies": enemies,
+                    "dt_s": dt_s,
+                    **bulk,
+                    "speedup": row["best_s"] / max(1e-12, bulk["best_s"]),
+                    "damage_error_pct": (bulk["combat_damage"] - reference) / reference * 100.0 if reference else 0.0,
+                    "leaks_error": bulk["leaks"] - row["leaks"],
+                }
+            )
+
+    expected_batch = None
+    if args.expected_batch > 0:
+        if not expected_kernel_available():
+            raise SystemExit("--expected-batch requires numpy")
+        builds = _random_builds(base, args.expected_batch, seed=args.seed)
+        expected_batch = _time_expected_batch(base, builds, repeat=args.repeat)
+
+    if args.json:
+        payload: dict[str, Any] = {"combat": rows}
+        if bulk_rows:
+            payload["combat_bulk"] = bulk_rows
+        if expected_batch is not None:
+            payload["expected_batch"] = expected_batch
+        json.dump(payload, sys.stdout, indent=2)
+        sys.stdout.write("\n")
+        return 0
+
+    header = f"{'enemies':>8} {'towers':>7} {'best_s':>10} {'mean_s':>10} {'combat_damage':>15} {'leaks':>7}"
+    if args.memory:
+        header += f" {'peak_mb':>9} {'B/enemy':>8}"
+    print(header)
+    for row in rows:
+        line = (
+            f"{row['enemies']:>8} {row['towers']:>7} {row['best_s']:>10.4f} {row['mean_s']:>10.4f} "
+            f"{row['combat_damage']:>15.1f} {row['leaks']:>7.0f}"
+        )
+        if args.memory:
+            line += f" {row['peak_bytes'] / 1e6:>9.2f} {row['bytes_per_enemy']:>8.0f}"
+        print(line)
+
+    if bulk_rows:
+        print()
+        print(f"{'enemies':>8} {'dt_s':>6} {'best_s':>10} {'speedup':>8} {'damage_err%':>12} {'leaks_err':>10} {'clear_s':>8}")
+        for row in bulk_rows:
+            print(
+                f"{row['enemies']:>8} {row['dt_s']:>6.3f} {row['best_s']:>10.4f} {row['speedup']:>8.2f} "
+                f"{row['damage_error_pct']:>12.3f} {row['leaks_error']:>10.0f} {row['clear_time_s']:>8.2f}"
+            )
+
+    if expected_batch is not None:
+        print()
+        print(f"{'builds':>8} {'scalar/s':>10} {'kernel/s':>10} {'speedup':>8} {'max_rel_err':>12}")
+        print(
+            f"{expected_batch['builds']:>8} {expected_batch['scalar_builds_per_s']:>10.1f} "
+            f"{expected_batch['kernel_builds_per_s']:>10.1f} {expected_batch['speedup']:>8.1f} "
+            f"{expected_batch['max_rel_error']:>12.2e}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -7,7 +7,7 @@ import os
 from pathlib import Path
 import sys
 import time
-from typing import Any, Dict, List, Literal, Optional
+from typing import Any, Dict, List, Literal, Optional, Tuple
 
 from fastapi import FastAPI, HTTPException
 from fastapi.responses import FileResponse, JSONResponse, StreamingResponse
@@ -25,12 +25,32 @@ from .realtime import (
     ModelError,
     ReplayError,
     ReplayStore,
+    TimelineCheckpoint,
+    WaveResultCache,
+    checkpoint_from_live_snapshot,
+    checkpoint_timeline,
     compare_builds,
     evaluate_timeline,
     forecast_from_history,
+    global_sensitivity,
+    iter_timeline,
+    optimize_build,
     sensitivity_analysis,
+    sensitivity_grid,
 )
+from .realtime.analytics import DEFAULT_SCREENING_MARGIN
+from .realtime.engine import DEFAULT_BULK_DT_S, ENGINE_METRICS, EngineDiagnostics
+from .realtime.global_sensitivity import DEFAULT_MORRIS_LEVELS
 from .realtime.live_bridge import LiveBridge
+from .realtime.optimizer import (
+    DEFAULT_BEAM_WIDTH,
+    DEFAULT_GENERATIONS,
+    DEFAULT_MUTATION_RATE,
+    DEFAULT_POPULATION,
+    DEFAULT_SHORTLIST,
+    MAX_BUILDS_PER_WAVE,
+)
+from .realtime.sampling import DEFAULT_HISTOGRAM_BINS, SamplingTarget
 
 
 app = FastAPI(
@@ -60,6 +80,13 @@ def _resolve_project_root() -> Path:
     return Path(__file__).resolve().parents[2]
 
 
+def _resolve_wave_cache_dir() -> Optional[Path]:
+    env_cache_dir = os.environ.get("NORDHOLD_WAVE_CACHE_DIR", "").strip()
+    if env_cache_dir:
+        return Path(env_cache_dir).expanduser().resolve()
+    return None
+
+
 def _resolve_web_dist(project_root: Path) -> Path:
     env_web_dist = os.environ.get("NORDHOLD_WEB_DIST", "").strip()
     if env_web_dist:
@@ -212,6 +239,7 @@ def get_lineups(config: str, top: int = 10, max_cost: Optional[float] = None):
 catalog_repo = CatalogRepository(project_root=_PROJECT_ROOT)
 replay_store = ReplayStore(project_root=catalog_repo.project_root)
 live_bridge = LiveBridge(catalog=catalog_repo, replay_store=replay_store, project_root=catalog_repo.project_root)
+wave_result_cache = WaveResultCache(directory=_resolve_wave_cache_dir())
 
 
 class LiveConnectRequest(BaseModel):
@@ -266,35 +294,131 @@ class BuildPlanInput(BaseModel):
     actions: List[BuildActionInput] = Field(default_factory=list)
 
 
-class TimelineEvaluateRequest(BaseModel):
+# Engine and sampling options shared by every request that evaluates timelines; see _engine_kwargs.
+class EngineOptions(BaseModel):
+    engine: Literal["scalar", "vectorized"] = "scalar"
+    workers: int = Field(default=1, ge=1, le=64)
+    # Ignored by endpoints that evaluate scaled or generated builds (global sensitivity, optimize).
+    use_cache: bool = True
+    target_relative_error: Optional[float] = Field(default=None, gt=0.0, le=1.0)
+    target_ci_width: Optional[float] = Field(default=None, gt=0.0)
+    confidence: float = Field(default=0.95, gt=0.5, lt=1.0)
+    antithetic: bool = False
+    bulk_dt_s: float = Field(default=DEFAULT_BULK_DT_S, gt=0.0, le=10.0)
+
+
+# Requests that evaluate several builds or scenario variants can also share random streams.
+class AnalyticsOptions(EngineOptions):
+    variance_reduction: Literal["none", "crn"] = "none"
+
+
+class TimelineEvaluateRequest(EngineOptions):
     dataset_version: Optional[str] = None
-    mode: Literal["expected", "combat", "monte_carlo"] = "expected"
+    mode: Literal["expected", "combat", "combat_bulk", "monte_carlo"] = "expected"
     seed: int = 42
     monte_carlo_runs: int = Field(default=200, ge=1, le=10000)
+    # Resume point: a checkpoint payload, or the current live snapshot.
+    checkpoint: Optional[Dict[str, Any]] = None
+    resume_from_live: bool = False
+    # Adds per-phase/per-wave engine timings under "diagnostics".
+    diagnostics: bool = False
+    # monte_carlo only: per-wave leak/clear-time quantiles and histograms under "distribution".
+    distributions: bool = False
+    histogram_bins: int = Field(default=DEFAULT_HISTOGRAM_BINS, ge=1, le=200)
     build_plan: BuildPlanInput
 
 
-class CompareRequest(BaseModel):
+class TimelineCheckpointRequest(BaseModel):
     dataset_version: Optional[str] = None
-    mode: Literal["expected", "combat", "monte_carlo"] = "expected"
+    # Omitted: checkpoint the live session at its current wave.
+    wave: Optional[int] = Field(default=None, ge=1)
+    build_plan: BuildPlanInput
+
+
+class CompareRequest(AnalyticsOptions):
+    dataset_version: Optional[str] = None
+    mode: Literal["expected", "combat", "combat_bulk", "monte_carlo"] = "expected"
     seed: int = 42
     monte_carlo_runs: int = Field(default=200, ge=1, le=10000)
+    # Sampled modes only: prefilter with the expected model, then evaluate builds that can reach the top K.
+    screen_top_k: Optional[int] = Field(default=None, ge=1)
+    # Heuristic relative slack around the expected damage; larger margins prune fewer builds.
+    screening_margin: float = Field(default=DEFAULT_SCREENING_MARGIN, ge=0.0, lt=1.0)
+    # Adds engine timings of every evaluation (shared-prefix waves appear once) under "diagnostics".
+    diagnostics: bool = False
     builds: List[BuildPlanInput]
 
 
-class SensitivityRequest(BaseModel):
+SensitivityParameter = Literal[
+    "tower_damage_scale",
+    "tower_fire_rate_scale",
+    "tower_accuracy_scale",
+    "enemy_hp_scale",
+    "enemy_armor_scale",
+]
+
+
+class SensitivityRequest(AnalyticsOptions):
     dataset_version: Optional[str] = None
-    mode: Literal["expected", "combat", "monte_carlo"] = "expected"
+    mode: Literal["expected", "combat", "combat_bulk", "monte_carlo"] = "expected"
     seed: int = 42
     monte_carlo_runs: int = Field(default=200, ge=1, le=10000)
-    parameter: Literal["tower_damage_scale", "tower_fire_rate_scale", "tower_accuracy_scale"] = "tower_damage_scale"
+    parameter: SensitivityParameter = "tower_damage_scale"
     values: List[float] = Field(default_factory=lambda: [0.8, 0.9, 1.0, 1.1, 1.2])
     build_plan: BuildPlanInput
 
 
-class ForecastRequest(BaseModel):
+class SensitivityGridRequest(AnalyticsOptions):
+    dataset_version: Optional[str] = None
+    mode: Literal["expected", "combat", "combat_bulk", "monte_carlo"] = "expected"
+    seed: int = 42
+    monte_carlo_runs: int = Field(default=200, ge=1, le=10000)
+    # One grid axis per parameter, in order; the grid is their cartesian product.
+    parameters: Dict[SensitivityParameter, List[float]] = Field(
+        default_factory=lambda: {"tower_damage_scale": [0.9, 1.0, 1.1], "enemy_hp_scale": [0.9, 1.0, 1.1]}
+    )
+    build_plan: BuildPlanInput
+
+
+class GlobalSensitivityRequest(AnalyticsOptions):
+    dataset_version: Optional[str] = None
+    mode: Literal["expected", "combat", "combat_bulk", "monte_carlo"] = "expected"
+    seed: int = 42
+    monte_carlo_runs: int = Field(default=200, ge=1, le=10000)
+    method: Literal["sobol", "morris"] = "sobol"
+    metric: Literal["combat_damage", "potential_damage", "leaks"] = "combat_damage"
+    # Sobol base rows or Morris trajectories.
+    samples: int = Field(default=256, ge=2, le=4096)
+    levels: int = Field(default=DEFAULT_MORRIS_LEVELS, ge=2, le=16)
+    # Parameter name -> [low, high] factor bounds; omitted means all parameters at the default bounds.
+    parameters: Optional[Dict[SensitivityParameter, Tuple[float, float]]] = None
+    build_plan: BuildPlanInput
+
+
+class OptimizeRequest(AnalyticsOptions):
+    dataset_version: Optional[str] = None
+    # Mode of the finalists' timelines; anything but "expected" re-ranks them by that mode.
+    mode: Literal["expected", "combat", "combat_bulk", "monte_carlo"] = "expected"
+    seed: int = 42
+    monte_carlo_runs: int = Field(default=200, ge=1, le=10000)
+    strategy: Literal["beam", "genetic"] = "beam"
+    top_k: int = Field(default=5, ge=1, le=100)
+    # Towers the optimizer may place; omitted means every catalog tower.
+    tower_ids: Optional[List[str]] = None
+    max_builds_per_wave: int = Field(default=2, ge=1, le=MAX_BUILDS_PER_WAVE)
+    beam_width: int = Field(default=DEFAULT_BEAM_WIDTH, ge=1, le=256)
+    # Beam bundles of several towers only combine this many best single purchases per wave.
+    shortlist: int = Field(default=DEFAULT_SHORTLIST, ge=1, le=64)
+    population: int = Field(default=DEFAULT_POPULATION, ge=2, le=1024)
+    generations: int = Field(default=DEFAULT_GENERATIONS, ge=0, le=500)
+    mutation_rate: float = Field(default=DEFAULT_MUTATION_RATE, ge=0.0, le=1.0)
+    # Starting plan: its towers, modifiers and actions are kept and purchases are added on top.
+    build_plan: BuildPlanInput
+
+
+class ForecastRequest(EngineOptions):
     dataset_version: Optional[str] = None
-    mode: Literal["expected", "combat", "monte_carlo"] = "expected"
+    mode: Literal["expected", "combat", "combat_bulk", "monte_carlo"] = "expected"
     seed: int = 42
     monte_carlo_runs: int = Field(default=200, ge=1, le=10000)
     history: List[Dict[str, Any]] = Field(default_factory=list)
@@ -310,11 +434,60 @@ def _to_build_plan(payload: BuildPlanInput) -> BuildPlan:
 
 def _load_scenario_for_build(build: BuildPlan, dataset_version: Optional[str]):
     try:
-        return catalog_repo.load_scenario(scenario_id=build.scenario_id, dataset_version=dataset_version)
+        return catalog_repo.load_compiled_scenario(scenario_id=build.scenario_id, dataset_version=dataset_version)
     except CatalogError as exc:
         raise HTTPException(status_code=400, detail=str(exc)) from exc
 
 
+def _live_checkpoint(scenario: Any, build: BuildPlan) -> TimelineCheckpoint:
+    try:
+        return checkpoint_from_live_snapshot(scenario, live_bridge.snapshot(), build)
+    except (ReplayError, ValueError) as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+
+
+def _resume_checkpoint_for(payload: TimelineEvaluateRequest, scenario: Any, build: BuildPlan) -> Optional[TimelineCheckpoint]:
+    if payload.checkpoint is not None and payload.resume_from_live:
+        raise HTTPException(status_code=400, detail="Use either 'checkpoint' or 'resume_from_live', not both.")
+    if payload.resume_from_live:
+        return _live_checkpoint(scenario, build)
+    if payload.checkpoint is None:
+        return None
+    try:
+        return TimelineCheckpoint.from_dict(payload.checkpoint)
+    except (ModelError, TypeError, ValueError) as exc:
+        raise HTTPException(status_code=400, detail=f"Invalid checkpoint: {exc}") from exc
+
+
+def _wave_cache_for(use_cache: bool) -> Optional[WaveResultCache]:
+    return wave_result_cache if use_cache else None
+
+
+def _sampling_target_for(payload: EngineOptions) -> Optional[SamplingTarget]:
+    if payload.target_relative_error is None and payload.target_ci_width is None:
+        return None
+    return SamplingTarget(
+        relative_error=payload.target_relative_error,
+        ci_width=payload.target_ci_width,
+        confidence=payload.confidence,
+    )
+
+
+def _engine_kwargs(payload: EngineOptions, cached: bool = True) -> Dict[str, Any]:
+    kwargs: Dict[str, Any] = {
+        "engine": payload.engine,
+        "workers": payload.workers,
+        "sampling_target": _sampling_target_for(payload),
+        "antithetic": payload.antithetic,
+        "bulk_dt_s": payload.bulk_dt_s,
+    }
+    if cached:
+        kwargs["result_cache"] = _wave_cache_for(payload.use_cache)
+    if isinstance(payload, AnalyticsOptions):
+        kwargs["variance_reduction"] = payload.variance_reduction
+    return kwargs
+
+
 def _dataset_meta_payload(dataset_version: Optional[str] = None) -> Dict[str, str]:
     try:
         meta = catalog_repo.get_dataset_meta(dataset_version) if dataset_version else catalog_repo.get_active_dataset_meta()
@@ -523,8 +696,11 @@ def replay_import(payload: ReplayImportRequest):
 
 @app.post("/api/v1/timeline/evaluate")
 def timeline_evaluate(payload: TimelineEvaluateRequest):
+    diagnostics = EngineDiagnostics()
     build = _to_build_plan(payload.build_plan)
-    meta, scenario = _load_scenario_for_build(build, payload.dataset_version)
+    with diagnostics.phase("scenario_load"):
+        meta, scenario = _load_scenario_for_build(build, payload.dataset_version)
+    checkpoint = _resume_checkpoint_for(payload, scenario, build)
 
     try:
         result = evaluate_timeline(
@@ -534,11 +710,16 @@ def timeline_evaluate(payload: TimelineEvaluateRequest):
             mode=payload.mode,
             seed=payload.seed,
             monte_carlo_runs=payload.monte_carlo_runs,
+            **_engine_kwargs(payload),
+            checkpoint=checkpoint,
+            diagnostics=diagnostics,
+            distributions=payload.distributions,
+            histogram_bins=payload.histogram_bins,
         )
     except ValueError as exc:
         raise HTTPException(status_code=400, detail=str(exc)) from exc
 
-    return {
+    response: Dict[str, Any] = {
         "dataset": {
             "dataset_version": meta.dataset_version,
             "game_version": meta.game_version,
@@ -546,6 +727,116 @@ def timeline_evaluate(payload: TimelineEvaluateRequest):
         },
         "result": result.to_dict(),
     }
+    if checkpoint is not None:
+        response["resumed_from"] = checkpoint.to_dict()
+    if payload.diagnostics:
+        response["diagnostics"] = diagnostics.to_dict()
+    return response
+
+
+@app.post("/api/v1/timeline/evaluate/stream")
+def timeline_evaluate_stream(payload: TimelineEvaluateRequest):
+    diagnostics = EngineDiagnostics()
+    build = _to_build_plan(payload.build_plan)
+    with diagnostics.phase("scenario_load"):
+        meta, scenario = _load_scenario_for_build(build, payload.dataset_version)
+    checkpoint = _resume_checkpoint_for(payload, scenario, build)
+
+    try:
+        progress_iter = iter_timeline(
+            scenario=scenario,
+            build=build,
+            dataset_version=meta.dataset_version,
+            mode=payload.mode,
+            seed=payload.seed,
+            monte_carlo_runs=payload.monte_carlo_runs,
+            **_engine_kwargs(payload),
+            checkpoint=checkpoint,
+            diagnostics=diagnostics,
+            distributions=payload.distributions,
+            histogram_bins=payload.histogram_bins,
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+
+    total_waves = sum(1 for wave in scenario.waves if checkpoint is None or wave.index >= checkpoint.wave)
+    dataset = {
+        "dataset_version": meta.dataset_version,
+        "game_version": meta.game_version,
+        "build_id": meta.build_id,
+    }
+
+    def _event_stream():
+        yield _format_sse_event(
+            "start",
+            {
+                "dataset": dataset,
+                "scenario_id": scenario.id,
+                "mode": payload.mode,
+                "seed": payload.seed,
+                "total_waves": total_waves,
+                "resume_wave": checkpoint.wave if checkpoint is not None else None,
+            },
+        )
+        last = None
+        try:
+            for last in progress_iter:
+                yield _format_sse_event("wave", last.to_dict())
+        except ValueError as exc:
+            yield _format_sse_event("error", {"timestamp": time.time(), "detail": str(exc)})
+            return
+        finally:
+            progress_iter.close()
+        done: Dict[str, Any] = {"completed": total_waves}
+        if last is not None:
+            done["totals"] = last.to_dict()["totals"]
+            if last.sampling is not None:
+                done["sampling"] = last.sampling
+        if payload.diagnostics:
+            done["diagnostics"] = diagnostics.to_dict()
+        yield _format_sse_event("done", done)
+
+    return StreamingResponse(
+        _event_stream(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "Connection": "keep-alive",
+            "X-Accel-Buffering": "no",
+        },
+    )
+
+
+@app.post("/api/v1/timeline/checkpoint")
+def timeline_checkpoint(payload: TimelineCheckpointRequest):
+    build = _to_build_plan(payload.build_plan)
+    meta, scenario = _load_scenario_for_build(build, payload.dataset_version)
+    if payload.wave is None:
+        checkpoint = _live_checkpoint(scenario, build)
+    else:
+        try:
+            checkpoint = checkpoint_timeline(scenario, build, payload.wave)
+        except ValueError as exc:
+            raise HTTPException(status_code=400, detail=str(exc)) from exc
+
+    return {
+        "dataset": {
+            "dataset_version": meta.dataset_version,
+            "game_version": meta.game_version,
+            "build_id": meta.build_id,
+        },
+        "checkpoint": checkpoint.to_dict(),
+    }
+
+
+@app.get("/api/v1/cache/stats")
+def cache_stats():
+    return {"wave_results": wave_result_cache.stats()}
+
+
+@app.get("/api/v1/metrics")
+def engine_metrics():
+    return {"engine": ENGINE_METRICS.snapshot(), "wave_results": wave_result_cache.stats()}
 
 
 @app.post("/api/v1/analytics/compare")
@@ -553,22 +844,31 @@ def analytics_compare(payload: CompareRequest):
     if not payload.builds:
         raise HTTPException(status_code=400, detail="'builds' cannot be empty.")
 
+    diagnostics = EngineDiagnostics()
     build_plans = [_to_build_plan(build) for build in payload.builds]
-    meta, scenario = _load_scenario_for_build(build_plans[0], payload.dataset_version)
+    with diagnostics.phase("scenario_load"):
+        meta, scenario = _load_scenario_for_build(build_plans[0], payload.dataset_version)
 
     for build in build_plans[1:]:
         if build.scenario_id != build_plans[0].scenario_id:
             raise HTTPException(status_code=400, detail="All builds must use the same scenario_id.")
 
-    result = compare_builds(
-        scenario=scenario,
-        dataset_version=meta.dataset_version,
-        builds=build_plans,
-        mode=payload.mode,
-        seed=payload.seed,
-        monte_carlo_runs=payload.monte_carlo_runs,
-    )
-    return {
+    try:
+        result = compare_builds(
+            scenario=scenario,
+            dataset_version=meta.dataset_version,
+            builds=build_plans,
+            mode=payload.mode,
+            seed=payload.seed,
+            monte_carlo_runs=payload.monte_carlo_runs,
+            **_engine_kwargs(payload),
+            screen_top_k=payload.screen_top_k,
+            screening_margin=payload.screening_margin,
+            diagnostics=diagnostics,
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    response: Dict[str, Any] = {
         "dataset": {
             "dataset_version": meta.dataset_version,
             "game_version": meta.game_version,
@@ -576,6 +876,9 @@ def analytics_compare(payload: CompareRequest):
         },
         "result": result,
     }
+    if payload.diagnostics:
+        response["diagnostics"] = diagnostics.to_dict()
+    return response
 
 
 @app.post("/api/v1/analytics/sensitivity")
@@ -583,16 +886,20 @@ def analytics_sensitivity(payload: SensitivityRequest):
     build = _to_build_plan(payload.build_plan)
     meta, scenario = _load_scenario_for_build(build, payload.dataset_version)
 
-    result = sensitivity_analysis(
-        scenario=scenario,
-        dataset_version=meta.dataset_version,
-        build=build,
-        parameter=payload.parameter,
-        values=payload.values,
-        mode=payload.mode,
-        seed=payload.seed,
-        monte_carlo_runs=payload.monte_carlo_runs,
-    )
+    try:
+        result = sensitivity_analysis(
+            scenario=scenario,
+            dataset_version=meta.dataset_version,
+            build=build,
+            parameter=payload.parameter,
+            values=payload.values,
+            mode=payload.mode,
+            seed=payload.seed,
+            monte_carlo_runs=payload.monte_carlo_runs,
+            **_engine_kwargs(payload),
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
 
     return {
         "dataset": {
@@ -604,20 +911,123 @@ def analytics_sensitivity(payload: SensitivityRequest):
     }
 
 
-@app.post("/api/v1/analytics/forecast")
-def analytics_forecast(payload: ForecastRequest):
-    latest_result = None
-    if payload.latest_build is not None:
-        build = _to_build_plan(payload.latest_build)
-        meta, scenario = _load_scenario_for_build(build, payload.dataset_version)
-        latest_result = evaluate_timeline(
+@app.post("/api/v1/analytics/sensitivity/grid")
+def analytics_sensitivity_grid(payload: SensitivityGridRequest):
+    build = _to_build_plan(payload.build_plan)
+    meta, scenario = _load_scenario_for_build(build, payload.dataset_version)
+
+    try:
+        result = sensitivity_grid(
             scenario=scenario,
+            dataset_version=meta.dataset_version,
             build=build,
+            parameters=payload.parameters,
+            mode=payload.mode,
+            seed=payload.seed,
+            monte_carlo_runs=payload.monte_carlo_runs,
+            **_engine_kwargs(payload),
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+
+    return {
+        "dataset": {
+            "dataset_version": meta.dataset_version,
+            "game_version": meta.game_version,
+            "build_id": meta.build_id,
+        },
+        "result": result,
+    }
+
+
+@app.post("/api/v1/analytics/sensitivity/global")
+def analytics_sensitivity_global(payload: GlobalSensitivityRequest):
+    build = _to_build_plan(payload.build_plan)
+    meta, scenario = _load_scenario_for_build(build, payload.dataset_version)
+
+    try:
+        result = global_sensitivity(
+            scenario=scenario,
             dataset_version=meta.dataset_version,
+            build=build,
             mode=payload.mode,
             seed=payload.seed,
             monte_carlo_runs=payload.monte_carlo_runs,
+            method=payload.method,
+            parameters=payload.parameters,
+            samples=payload.samples,
+            levels=payload.levels,
+            metric=payload.metric,
+            **_engine_kwargs(payload, cached=False),
         )
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+
+    return {
+        "dataset": {
+            "dataset_version": meta.dataset_version,
+            "game_version": meta.game_version,
+            "build_id": meta.build_id,
+        },
+        "result": result,
+    }
+
+
+@app.post("/api/v1/analytics/optimize")
+def analytics_optimize(payload: OptimizeRequest):
+    build = _to_build_plan(payload.build_plan)
+    meta, scenario = _load_scenario_for_build(build, payload.dataset_version)
+
+    try:
+        result = optimize_build(
+            scenario=scenario,
+            dataset_version=meta.dataset_version,
+            build=build,
+            mode=payload.mode,
+            seed=payload.seed,
+            monte_carlo_runs=payload.monte_carlo_runs,
+            strategy=payload.strategy,
+            top_k=payload.top_k,
+            tower_ids=payload.tower_ids,
+            max_builds_per_wave=payload.max_builds_per_wave,
+            beam_width=payload.beam_width,
+            shortlist=payload.shortlist,
+            population=payload.population,
+            generations=payload.generations,
+            mutation_rate=payload.mutation_rate,
+            **_engine_kwargs(payload, cached=False),
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+
+    return {
+        "dataset": {
+            "dataset_version": meta.dataset_version,
+            "game_version": meta.game_version,
+            "build_id": meta.build_id,
+        },
+        "result": result,
+    }
+
+
+@app.post("/api/v1/analytics/forecast")
+def analytics_forecast(payload: ForecastRequest):
+    latest_result = None
+    if payload.latest_build is not None:
+        build = _to_build_plan(payload.latest_build)
+        meta, scenario = _load_scenario_for_build(build, payload.dataset_version)
+        try:
+            latest_result = evaluate_timeline(
+                scenario=scenario,
+                build=build,
+                dataset_version=meta.dataset_version,
+                mode=payload.mode,
+                seed=payload.seed,
+                monte_carlo_runs=payload.monte_carlo_runs,
+                **_engine_kwargs(payload),
+            )
+        except ValueError as exc:
+            raise HTTPException(status_code=400, detail=str(exc)) from exc
 
     result = forecast_from_history(payload.history, latest=latest_result)
     return {"result": result, "latest_included": latest_result is not None}
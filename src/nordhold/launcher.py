@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import argparse
+import multiprocessing
 import os
 from pathlib import Path
 import sys
@@ -74,4 +75,6 @@ def main(argv: list[str] | None = None) -> int:
 
 
 if __name__ == "__main__":
+    # Monte Carlo process pools re-launch the frozen EXE as workers on Windows.
+    multiprocessing.freeze_support()
     raise SystemExit(main())
@@ -1,20 +1,49 @@
 """Realtime wave simulation toolkit for Nordhold."""
 
-from .analytics import compare_builds, forecast_from_history, sensitivity_analysis
+from .analytics import compare_builds, forecast_from_history, sensitivity_analysis, sensitivity_grid
+from .cache import WaveResultCache
 from .catalog import CatalogError, CatalogRepository
-from .engine import evaluate_timeline
+from .compiled import CompiledScenario, compile_scenario
+from .engine import (
+    EngineDiagnostics,
+    affordable_net_gold,
+    checkpoint_from_live_snapshot,
+    checkpoint_timeline,
+    evaluate_timeline,
+    iter_timeline,
+)
+from .global_sensitivity import global_sensitivity
 from .live_bridge import LiveBridge, LiveBridgeError
 from .memory_reader import MemoryProfileError, MemoryReadError, MemoryReader, MemoryReaderError
-from .models import BuildPlan, EvaluationResult, ModelError, ScenarioDefinition, WaveResult
+from .models import (
+    BuildPlan,
+    EvaluationResult,
+    ModelError,
+    ScenarioDefinition,
+    TimelineCheckpoint,
+    TimelineProgress,
+    WaveResult,
+)
+from .optimizer import optimize_build
 from .replay import ReplayError, ReplayStore
 
 __all__ = [
     "compare_builds",
     "forecast_from_history",
     "sensitivity_analysis",
+    "sensitivity_grid",
     "CatalogError",
     "CatalogRepository",
+    "CompiledScenario",
+    "compile_scenario",
+    "EngineDiagnostics",
+    "affordable_net_gold",
+    "checkpoint_from_live_snapshot",
+    "checkpoint_timeline",
     "evaluate_timeline",
+    "global_sensitivity",
+    "iter_timeline",
+    "optimize_build",
     "LiveBridge",
     "LiveBridgeError",
     "MemoryReader",
@@ -25,7 +54,10 @@ __all__ = [
     "EvaluationResult",
     "ModelError",
     "ScenarioDefinition",
+    "TimelineCheckpoint",
+    "TimelineProgress",
     "WaveResult",
     "ReplayError",
     "ReplayStore",
+    "WaveResultCache",
 ]
@@ -1,27 +1,72 @@
 from __future__ import annotations
 
 from dataclasses import replace
-from typing import Any, Dict, Iterable, List, Sequence
+import itertools
+from typing import Any, Dict, Iterable, List, Sequence, Tuple
 
-from .engine import evaluate_timeline
-from .models import BuildPlan, EvaluationResult, ScenarioDefinition, TowerDefinition, TowerStats
+from .cache import WaveResultCache
+from .compiled import CompiledScenario, compile_scenario
+from .engine import DEFAULT_BULK_DT_S, EngineDiagnostics, checkpoint_timeline, evaluate_timeline
+from .models import BuildPlan, EvaluationResult, ScenarioDefinition
+from .parallel import map_ordered, normalize_workers
+from .sampling import SamplingTarget
+from .stats import ScenarioScales
 
 
-def _scale_tower_stat(base: TowerStats, parameter: str, factor: float) -> TowerStats:
-    if parameter == "tower_damage_scale":
-        return replace(base, damage=base.damage * factor)
-    if parameter == "tower_fire_rate_scale":
-        return replace(base, fire_rate=base.fire_rate * factor)
-    if parameter == "tower_accuracy_scale":
-        return replace(base, accuracy=max(0.0, min(1.0, base.accuracy * factor)))
-    return base
+# "crn" evaluates every variant on counter-based common random numbers so differences between
+# builds (or factors) are not swamped by independent sampling noise.
+VARIANCE_REDUCTION_MODES = ("none", "crn")
+# Sensitivity parameters and the ScenarioScales factor each one sets.
+SENSITIVITY_PARAMETERS = {
+    "tower_damage_scale": "tower_damage",
+    "tower_fire_rate_scale": "tower_fire_rate",
+    "tower_accuracy_scale": "tower_accuracy",
+    "enemy_hp_scale": "enemy_hp",
+    "enemy_armor_scale": "enemy_armor",
+}
+MAX_SENSITIVITY_GRID_POINTS = 4096
+# Build screening: heuristic relative slack around the expected-mode estimate within which sampled
+# combat damage is assumed to stay. It does not bound sampled outcomes; widen it to prune less.
+DEFAULT_SCREENING_MARGIN = 0.25
 
 
-def _scaled_scenario(scenario: ScenarioDefinition, parameter: str, factor: float) -> ScenarioDefinition:
-    towers: Dict[str, TowerDefinition] = {}
-    for tower_id, tower in scenario.towers.items():
-        towers[tower_id] = replace(tower, base_stats=_scale_tower_stat(tower.base_stats, parameter, factor))
-    return replace(scenario, towers=towers)
+def random_streams_for(variance_reduction: str) -> str:
+    """The engine ``random_streams`` for ``variance_reduction``: "crn" shares counter-based streams."""
+    normalized = variance_reduction.lower().strip()
+    if normalized not in VARIANCE_REDUCTION_MODES:
+        raise ValueError(f"Unsupported variance_reduction: {variance_reduction}")
+    return "counter" if normalized == "crn" else "sequential"
+
+
+def scales_for(factors: Dict[str, float]) -> ScenarioScales:
+    """The scale overlay for sensitivity parameter factors, e.g. ``{"enemy_hp_scale": 1.1}``."""
+    fields: Dict[str, float] = {}
+    for parameter, factor in factors.items():
+        field_name = SENSITIVITY_PARAMETERS.get(parameter)
+        if field_name is None:
+            raise ValueError(f"Unsupported sensitivity parameter: {parameter}")
+        fields[field_name] = float(factor)
+    return ScenarioScales(**fields)
+
+
+def grid_point_totals(
+    scenario: CompiledScenario,
+    scales: ScenarioScales,
+    build: BuildPlan,
+    options: Dict[str, Any],
+) -> Dict[str, Any]:
+    """Timeline totals of ``build`` on ``scenario`` scaled by ``scales``; ``options`` go to ``evaluate_timeline``.
+
+    Process-pool friendly: the scaled variant is derived in the worker from the shared compile.
+    """
+    return evaluate_timeline(scenario=scenario.scaled(scales), build=build, **options).totals
+
+
+def _dense_grid(values: Sequence[Any], shape: Sequence[int]) -> List[Any]:
+    if len(shape) == 1:
+        return list(values)
+    stride = len(values) // shape[0]
+    return [_dense_grid(values[start : start + stride], shape[1:]) for start in range(0, len(values), stride)]
 
 
 def _extract_scalar_totals(payload: Dict[str, Any]) -> Dict[str, float]:
@@ -38,39 +83,213 @@ def _extract_scalar_totals(payload: Dict[str, Any]) -> Dict[str, float]:
     }
 
 
-def compare_builds(
-    scenario: ScenarioDefinition,
+def _screening_band(result: EvaluationResult, margin: float) -> Tuple[float, float]:
+    """Pessimistic/optimistic combat damage: the expected-mode result -/+ ``margin``, capped per wave."""
+    lower = upper = 0.0
+    for wave in result.wave_results:
+        lower += min(wave.enemy_hp_pool, wave.potential_damage * (1.0 - margin))
+        upper += min(wave.enemy_hp_pool, wave.potential_damage * (1.0 + margin))
+    return lower, upper
+
+
+def _screen_builds(
+    compiled: CompiledScenario,
     dataset_version: str,
     builds: Sequence[BuildPlan],
-    mode: str,
-    seed: int,
-    monte_carlo_runs: int,
-) -> Dict[str, Any]:
-    entries: List[Dict[str, Any]] = []
+    top_k: int,
+    margin: float,
+    result_cache: WaveResultCache | None,
+) -> Tuple[List[int], Dict[str, Any]]:
+    """Ranks builds with the expected model and keeps those whose optimistic damage reaches the top K.
+
+    The threshold is the K-th largest pessimistic damage: a build whose optimistic damage stays below
+    it is beaten by at least K builds as long as sampled damage stays within ``margin`` of the
+    expected estimate. That is a heuristic, not a bound; a sampled outlier can be pruned wrongly.
+    """
+    screened: List[Dict[str, Any]] = []
     for index, build in enumerate(builds, start=1):
         result = evaluate_timeline(
-            scenario=scenario,
+            scenario=compiled,
             build=build,
             dataset_version=dataset_version,
-            mode=mode,
-            seed=seed + index,
-            monte_carlo_runs=monte_carlo_runs,
+            mode="expected",
+            seed=0,
+            monte_carlo_runs=1,
+            result_cache=result_cache,
         )
-        entries.append(
+        pessimistic, optimistic = _screening_band(result, margin)
+        screened.append(
             {
                 "index": index,
                 "scenario_id": build.scenario_id,
-                "totals": result.totals,
-                "mode": result.mode,
+                "expected_combat_damage": result.totals["combat_damage"],
+                "pessimistic_damage": pessimistic,
+                "optimistic_damage": optimistic,
             }
         )
 
+    pessimistic = sorted((item["pessimistic_damage"] for item in screened), reverse=True)
+    threshold = pessimistic[min(top_k, len(pessimistic)) - 1]
+    survivors = [item["index"] for item in screened if item["optimistic_damage"] >= threshold]
+    pruned = [{**item, "pruned_at": "expected"} for item in screened if item["optimistic_damage"] < threshold]
+    pruned.sort(key=lambda item: item["expected_combat_damage"], reverse=True)
+    summary = {
+        "fidelity": "expected",
+        "top_k": top_k,
+        "margin": margin,
+        "rule": "heuristic_margin",
+        "threshold": threshold,
+        "candidates": len(builds),
+        "evaluated": len(survivors),
+        "pruned": pruned,
+    }
+    return survivors, summary
+
+
+def _divergence_wave(builds: Sequence[BuildPlan]) -> int | None:
+    """First wave at which the plans stop sharing a history, or None when they are identical.
+
+    Plans with different initial towers or modifiers diverge at wave 1. Otherwise actions are
+    compared in plan order: the first differing (or missing) action decides the wave, and every
+    action before that wave is common to all plans because actions are sorted by wave.
+    """
+    first = builds[0]
+    if any(
+        (build.scenario_id, build.towers, build.active_global_modifiers)
+        != (first.scenario_id, first.towers, first.active_global_modifiers)
+        for build in builds[1:]
+    ):
+        return 1
+    position = 0
+    while True:
+        current = [build.actions[position] if position < len(build.actions) else None for build in builds]
+        if all(action is None for action in current):
+            return None
+        if any(action != current[0] for action in current[1:]):
+            return min(action.wave for action in current if action is not None)
+        position += 1
+
+
+def _combined_result(prefix: EvaluationResult, suffix: EvaluationResult) -> EvaluationResult:
+    """Joins a shared-prefix evaluation with one build's evaluation resumed at the divergence wave."""
+    sampling = suffix.sampling if suffix.sampling is not None else prefix.sampling
+    if prefix.sampling is not None and suffix.sampling is not None:
+        sampling = {
+            **suffix.sampling,
+            "runs_used": prefix.sampling["runs_used"] + suffix.sampling["runs_used"],
+            "converged": prefix.sampling["converged"] and suffix.sampling["converged"],
+        }
+    return replace(suffix, wave_results=prefix.wave_results + suffix.wave_results, sampling=sampling)
+
+
+def compare_builds(
+    scenario: ScenarioDefinition | CompiledScenario,
+    dataset_version: str,
+    builds: Sequence[BuildPlan],
+    mode: str,
+    seed: int,
+    monte_carlo_runs: int,
+    engine: str = "scalar",
+    workers: int = 1,
+    result_cache: WaveResultCache | None = None,
+    sampling_target: SamplingTarget | None = None,
+    variance_reduction: str = "none",
+    antithetic: bool = False,
+    bulk_dt_s: float = DEFAULT_BULK_DT_S,
+    screen_top_k: int | None = None,
+    screening_margin: float = DEFAULT_SCREENING_MARGIN,
+    diagnostics: EngineDiagnostics | None = None,
+) -> Dict[str, Any]:
+    """Evaluates every build in ``mode`` and ranks them by total combat damage.
+
+    With ``screen_top_k`` and a sampled mode, builds are first scored with the cheap expected
+    model and only those that can still reach the top K, assuming sampled damage stays within the
+    heuristic ``screening_margin`` of that estimate, are evaluated in ``mode``; the rest are listed
+    under ``screening.pruned``. Survivors keep their
+    original index and seed, so their results match an unscreened comparison.
+
+    When every build is evaluated with the same random numbers (``expected`` mode, or ``crn``),
+    the waves before the plans' divergence wave are evaluated once and each build resumes from a
+    shared checkpoint; ``shared_prefix`` reports the divergence wave and the wave evaluations
+    saved. Results equal separate evaluations. ``diagnostics`` collects every evaluation's timings.
+    """
+    random_streams = random_streams_for(variance_reduction)
+    if screen_top_k is not None and screen_top_k < 1:
+        raise ValueError(f"screen_top_k must be >= 1, got {screen_top_k}")
+    if not 0.0 <= screening_margin < 1.0:
+        raise ValueError(f"screening_margin must be in [0, 1), got {screening_margin}")
+    compiled = compile_scenario(scenario)
+    screening: Dict[str, Any] | None = None
+    selected: Sequence[int] = range(1, len(builds) + 1)
+    if screen_top_k is not None and builds and mode.lower().strip() != "expected":
+        selected, screening = _screen_builds(
+            compiled, dataset_version, builds, screen_top_k, screening_margin, result_cache
+        )
+
+    options: Dict[str, Any] = {
+        "scenario": compiled,
+        "dataset_version": dataset_version,
+        "mode": mode,
+        "monte_carlo_runs": monte_carlo_runs,
+        "engine": engine,
+        "workers": workers,
+        "result_cache": result_cache,
+        "sampling_target": sampling_target,
+        "random_streams": random_streams,
+        "antithetic": antithetic,
+        "bulk_dt_s": bulk_dt_s,
+        "diagnostics": diagnostics,
+    }
+    # Per-build seeds make every wave differ between builds; only shared draws allow sharing waves.
+    prefix: EvaluationResult | None = None
+    checkpoint = None
+    shared_prefix: Dict[str, Any] | None = None
+    divergence = _divergence_wave([builds[index - 1] for index in selected]) if len(selected) > 1 else 1
+    # Plans that differ at (or before, e.g. wave-0 actions) the first wave have no prefix to share.
+    shareable = divergence is None or divergence > compiled.waves[0].index
+    if shareable and (random_streams == "counter" or mode.lower().strip() == "expected"):
+        first = builds[selected[0] - 1]
+        until_wave = divergence if divergence is not None else compiled.waves[-1].index + 1
+        prefix = evaluate_timeline(build=first, seed=seed, until_wave=until_wave, **options)
+        checkpoint = checkpoint_timeline(compiled, first, until_wave)
+        shared_waves = len(prefix.wave_results)
+        shared_prefix = {
+            "divergence_wave": divergence,
+            "shared_waves": shared_waves,
+            "wave_evaluations_saved": shared_waves * (len(selected) - 1),
+        }
+
+    entries: List[Dict[str, Any]] = []
+    for index in selected:
+        build = builds[index - 1]
+        build_seed = seed if random_streams == "counter" else seed + index
+        if prefix is None:
+            result = evaluate_timeline(build=build, seed=build_seed, **options)
+        else:
+            result = _combined_result(
+                prefix, evaluate_timeline(build=build, seed=build_seed, checkpoint=checkpoint, **options)
+            )
+        entry = {
+            "index": index,
+            "scenario_id": build.scenario_id,
+            "totals": result.totals,
+            "mode": result.mode,
+        }
+        if result.sampling is not None:
+            entry["sampling"] = result.sampling
+        entries.append(entry)
+
     entries.sort(key=lambda item: item["totals"]["combat_damage"], reverse=True)
-    return {"ranked": entries}
+    response: Dict[str, Any] = {"ranked": entries}
+    if screening is not None:
+        response["screening"] = screening
+    if shared_prefix is not None:
+        response["shared_prefix"] = shared_prefix
+    return response
 
 
 def sensitivity_analysis(
-    scenario: ScenarioDefinition,
+    scenario: ScenarioDefinition | CompiledScenario,
     dataset_version: str,
     build: BuildPlan,
     parameter: str,
@@ -78,28 +297,50 @@ def sensitivity_analysis(
     mode: str,
     seed: int,
     monte_carlo_runs: int,
+    engine: str = "scalar",
+    workers: int = 1,
+    result_cache: WaveResultCache | None = None,
+    sampling_target: SamplingTarget | None = None,
+    variance_reduction: str = "none",
+    antithetic: bool = False,
+    bulk_dt_s: float = DEFAULT_BULK_DT_S,
 ) -> Dict[str, Any]:
+    random_streams = random_streams_for(variance_reduction)
+    compiled = compile_scenario(scenario)
     baseline = evaluate_timeline(
-        scenario=scenario,
+        scenario=compiled,
         build=build,
         dataset_version=dataset_version,
         mode=mode,
         seed=seed,
         monte_carlo_runs=monte_carlo_runs,
+        engine=engine,
+        workers=workers,
+        result_cache=result_cache,
+        sampling_target=sampling_target,
+        random_streams=random_streams,
+        antithetic=antithetic,
+        bulk_dt_s=bulk_dt_s,
     )
 
     baseline_combat = baseline.totals["combat_damage"]
     points: List[Dict[str, Any]] = []
     for value in values:
         factor = float(value)
-        adjusted = _scaled_scenario(scenario, parameter, factor)
         result = evaluate_timeline(
-            scenario=adjusted,
+            scenario=compiled.scaled(scales_for({parameter: factor})),
             build=build,
             dataset_version=dataset_version,
             mode=mode,
             seed=seed,
             monte_carlo_runs=monte_carlo_runs,
+            engine=engine,
+            workers=workers,
+            result_cache=result_cache,
+            sampling_target=sampling_target,
+            random_streams=random_streams,
+            antithetic=antithetic,
+            bulk_dt_s=bulk_dt_s,
         )
         combat = result.totals["combat_damage"]
         delta_pct = 0.0
@@ -120,6 +361,81 @@ def sensitivity_analysis(
     }
 
 
+def sensitivity_grid(
+    scenario: ScenarioDefinition | CompiledScenario,
+    dataset_version: str,
+    build: BuildPlan,
+    parameters: Dict[str, Sequence[float]],
+    mode: str,
+    seed: int,
+    monte_carlo_runs: int,
+    engine: str = "scalar",
+    workers: int = 1,
+    result_cache: WaveResultCache | None = None,
+    sampling_target: SamplingTarget | None = None,
+    variance_reduction: str = "none",
+    antithetic: bool = False,
+    bulk_dt_s: float = DEFAULT_BULK_DT_S,
+) -> Dict[str, Any]:
+    """Evaluates ``build`` on every point of the grid spanned by ``parameters`` (name -> factors).
+
+    The scenario is compiled once and each point runs on a ``CompiledScenario.scaled`` variant.
+    Grid points are spread over ``workers`` processes (each point evaluates serially, without
+    the result cache) and every point uses ``seed``. Metrics come back as dense nested lists
+    indexed in ``parameters`` order, next to the unscaled baseline totals.
+    """
+    if not parameters:
+        raise ValueError("Sensitivity grid needs at least one parameter")
+    names = list(parameters)
+    axes = [[float(value) for value in parameters[name]] for name in names]
+    shape = [len(values) for values in axes]
+    if any(size == 0 for size in shape):
+        raise ValueError("Every sensitivity grid parameter needs at least one value")
+    points = list(itertools.product(*axes))
+    if len(points) > MAX_SENSITIVITY_GRID_POINTS:
+        raise ValueError(f"Sensitivity grid has {len(points)} points, more than {MAX_SENSITIVITY_GRID_POINTS}")
+    grid_scales = [scales_for(dict(zip(names, point))) for point in points]
+
+    compiled = compile_scenario(scenario)
+    options: Dict[str, Any] = {
+        "dataset_version": dataset_version,
+        "mode": mode,
+        "seed": seed,
+        "monte_carlo_runs": monte_carlo_runs,
+        "engine": engine,
+        "workers": 1,
+        "result_cache": result_cache,
+        "sampling_target": sampling_target,
+        "random_streams": random_streams_for(variance_reduction),
+        "antithetic": antithetic,
+        "bulk_dt_s": bulk_dt_s,
+    }
+    baseline = grid_point_totals(compiled, ScenarioScales(), build, options)
+    workers = normalize_workers(workers)
+    # The result cache lives in this process, so pooled points run without it.
+    point_options = options if workers == 1 else {**options, "result_cache": None}
+    totals = map_ordered(
+        grid_point_totals,
+        [(compiled, scales, build, point_options) for scales in grid_scales],
+        workers,
+    )
+
+    baseline_combat = baseline["combat_damage"]
+    delta_pct = [
+        ((item["combat_damage"] - baseline_combat) / baseline_combat) * 100.0 if abs(baseline_combat) > 1e-9 else 0.0
+        for item in totals
+    ]
+    return {
+        "parameters": [{"name": name, "values": values} for name, values in zip(names, axes)],
+        "shape": shape,
+        "baseline": baseline,
+        "combat_damage": _dense_grid([item["combat_damage"] for item in totals], shape),
+        "potential_damage": _dense_grid([item["potential_damage"] for item in totals], shape),
+        "leaks": _dense_grid([item["leaks"] for item in totals], shape),
+        "delta_pct_vs_baseline": _dense_grid(delta_pct, shape),
+    }
+
+
 def forecast_from_history(history: Sequence[Dict[str, Any]], latest: EvaluationResult | None = None) -> Dict[str, Any]:
     if not history and latest is None:
         return {
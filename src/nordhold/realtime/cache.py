@@ -0,0 +1,172 @@
+from __future__ import annotations
+
+from collections import OrderedDict
+import contextlib
+import copy
+from dataclasses import asdict
+import hashlib
+import json
+import os
+from pathlib import Path
+import threading
+from typing import Any, Dict, Optional
+
+from .models import ScenarioDefinition, WaveResult
+
+
+# Bump when engine changes alter wave results, so stale on-disk entries are never served.
+CACHE_KEY_VERSION = 4
+DEFAULT_MAX_ENTRIES = 4096
+
+
+def _digest(payload: Any) -> str:
+    encoded = json.dumps(payload, sort_keys=True, separators=(",", ":"), ensure_ascii=True, default=str)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+def scenario_fingerprint(scenario: ScenarioDefinition) -> str:
+    """Content hash of a scenario, so reloaded or rebuilt definitions share cache entries."""
+    return _digest(asdict(scenario))
+
+
+def overlay_fingerprint(base_fingerprint: str, overlay: Any) -> str:
+    """Fingerprint of a scenario with an overlay applied (e.g. sensitivity scales)."""
+    return _digest([base_fingerprint, overlay])
+
+
+def wave_result_key(
+    scenario_hash: str,
+    dataset_version: str,
+    wave_index: int,
+    runtime: Any,
+    mode: str,
+    seed: int,
+    runs: int,
+    engine: str,
+    sampling: Any = None,
+    random_streams: str = "sequential",
+    antithetic: bool = False,
+    bulk_dt_s: float | None = None,
+    distribution_bins: int | None = None,
+) -> str:
+    return _digest(
+        [
+            CACHE_KEY_VERSION,
+            scenario_hash,
+            dataset_version,
+            wave_index,
+            runtime,
+            mode,
+            seed,
+            runs,
+            engine,
+            sampling,
+            random_streams,
+            antithetic,
+            bulk_dt_s,
+            distribution_bins,
+        ]
+    )
+
+
+class WaveResultCache:
+    """Thread-safe LRU of per-wave results with an optional on-disk second level.
+
+    Entries are content-addressed, so the same (scenario, runtime state, mode, seed, runs) hits the
+    cache from any request. Disk entries survive restarts and are promoted into memory on read.
+    Results are copied in and out, so callers may mutate what they get; disk writes are best-effort.
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES, directory: Optional[Path] = None):
+        self.max_entries = max(1, int(max_entries))
+        self.directory = directory
+        if directory is not None:
+            directory.mkdir(parents=True, exist_ok=True)
+        self._entries: "OrderedDict[str, WaveResult]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.disk_hits = 0
+        self.disk_writes = 0
+        self.disk_errors = 0
+
+    def _read_disk(self, key: str) -> WaveResult | None:
+        if self.directory is None:
+            return None
+        path = self.directory / key[:2] / f"{key}.json"
+        try:
+            payload = json.loads(path.read_text(encoding="utf-8"))
+            return WaveResult(**payload)
+        except FileNotFoundError:
+            return None
+        except (OSError, TypeError, ValueError):
+            # Corrupt or foreign entries are treated as misses and overwritten on the next put.
+            return None
+
+    def _write_disk(self, key: str, result: WaveResult) -> None:
+        if self.directory is None:
+            return
+        path = self.directory / key[:2] / f"{key}.json"
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path.write_text(json.dumps(asdict(result), ensure_ascii=False), encoding="utf-8")
+            os.replace(tmp_path, path)
+        except OSError:
+            # A full or read-only disk only costs the second level; the result is still in memory.
+            with contextlib.suppress(OSError):
+                tmp_path.unlink(missing_ok=True)
+            with self._lock:
+                self.disk_errors += 1
+            return
+        with self._lock:
+            self.disk_writes += 1
+
+    def _remember(self, key: str, result: WaveResult) -> None:
+        with self._lock:
+            self._entries[key] = result
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def get(self, key: str) -> WaveResult | None:
+        with self._lock:
+            result = self._entries.get(key)
+            if result is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return copy.deepcopy(result)
+
+        result = self._read_disk(key)
+        with self._lock:
+            if result is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.disk_hits += 1
+        self._remember(key, copy.deepcopy(result))
+        return result
+
+    def put(self, key: str, result: WaveResult) -> None:
+        self._remember(key, copy.deepcopy(result))
+        self._write_disk(key, result)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "disk_enabled": self.directory is not None,
+                "disk_hits": self.disk_hits,
+                "disk_writes": self.disk_writes,
+                "disk_errors": self.disk_errors,
+            }
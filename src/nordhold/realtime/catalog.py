@@ -3,8 +3,10 @@ from __future__ import annotations
 import json
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Any, Dict, Optional
+import threading
+from typing import Any, Dict, Optional, Tuple
 
+from .compiled import CompiledScenario
 from .models import ModelError, ScenarioDefinition
 
 
@@ -29,6 +31,9 @@ class CatalogRepository:
             project_root = Path(__file__).resolve().parents[3]
         self.project_root = project_root
         self.versions_index_path = self.project_root / "data" / "versions" / "index.json"
+        # (catalog path, scenario id) -> (catalog file stamp, compiled scenario).
+        self._compiled: Dict[Tuple[Path, str], Tuple[Tuple[int, int], CompiledScenario]] = {}
+        self._compiled_lock = threading.Lock()
 
     def _read_json(self, path: Path) -> Dict[str, Any]:
         if not path.exists():
@@ -64,18 +69,43 @@ class CatalogRepository:
             )
         raise CatalogError(f"Dataset version not found: {dataset_version}")
 
-    def load_scenario(self, scenario_id: str, dataset_version: Optional[str] = None) -> tuple[DatasetMeta, ScenarioDefinition]:
-        meta = self.get_dataset_meta(dataset_version) if dataset_version else self.get_active_dataset_meta()
+    def _parse_scenario(self, meta: DatasetMeta, scenario_id: str) -> ScenarioDefinition:
         payload = self._read_json(meta.catalog_path)
         for item in payload.get("scenarios", []):
             if str(item.get("id")) == scenario_id:
                 try:
-                    scenario = ScenarioDefinition.from_dict(item)
+                    return ScenarioDefinition.from_dict(item)
                 except ModelError as exc:
                     raise CatalogError(f"Scenario '{scenario_id}' is invalid: {exc}") from exc
-                return meta, scenario
         raise CatalogError(f"Scenario not found: {scenario_id}")
 
+    def load_compiled_scenario(
+        self,
+        scenario_id: str,
+        dataset_version: Optional[str] = None,
+    ) -> tuple[DatasetMeta, CompiledScenario]:
+        """Loads a scenario compiled for the engines, reusing it until the catalog file changes."""
+        meta = self.get_dataset_meta(dataset_version) if dataset_version else self.get_active_dataset_meta()
+        try:
+            stat = meta.catalog_path.stat()
+        except OSError as exc:
+            raise CatalogError(f"Required file not found: {meta.catalog_path}") from exc
+        stamp = (stat.st_mtime_ns, stat.st_size)
+        key = (meta.catalog_path, scenario_id)
+        with self._compiled_lock:
+            entry = self._compiled.get(key)
+        if entry is not None and entry[0] == stamp:
+            return meta, entry[1]
+
+        compiled = CompiledScenario(self._parse_scenario(meta, scenario_id))
+        with self._compiled_lock:
+            self._compiled[key] = (stamp, compiled)
+        return meta, compiled
+
+    def load_scenario(self, scenario_id: str, dataset_version: Optional[str] = None) -> tuple[DatasetMeta, ScenarioDefinition]:
+        meta, compiled = self.load_compiled_scenario(scenario_id, dataset_version)
+        return meta, compiled.definition
+
     def load_memory_signatures(self, dataset_version: Optional[str] = None) -> Dict[str, Any]:
         meta = self.get_dataset_meta(dataset_version) if dataset_version else self.get_active_dataset_meta()
         return self._read_json(meta.memory_signatures_path)
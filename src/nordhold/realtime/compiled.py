@@ -0,0 +1,223 @@
+from __future__ import annotations
+
+from array import array
+from dataclasses import asdict, dataclass, replace
+from typing import Dict, Tuple
+
+from .cache import overlay_fingerprint, scenario_fingerprint
+from .models import EnemyDefinition, ScenarioDefinition, TowerDefinition, WaveDefinition
+from .stats import ScenarioScales, TowerStatsCache
+
+
+@dataclass(frozen=True, slots=True)
+class CompiledWave:
+    """One wave with its spawn schedule expanded into per-enemy arrays, in spawn order."""
+
+    definition: WaveDefinition
+    # Per spawned enemy (slot): interned enemy index (``CompiledScenario.enemies``), spawn time and
+    # starting hp/barrier. Combat runs copy the hp/barrier columns instead of building objects.
+    enemy_kinds: array
+    spawn_times: array
+    initial_hp: array
+    initial_barrier: array
+    # Slots ordered by (spawn time, slot), and the matching spawn times.
+    spawn_order: Tuple[int, ...]
+    sorted_spawn_times: Tuple[float, ...]
+    # (enemy index, count) in first-spawn order, for the expected-value model.
+    enemy_counts: Tuple[Tuple[int, int], ...]
+    total_enemies: int
+    # hp + barrier summed per enemy kind (expected model) and per spawned enemy (combat models).
+    enemy_hp_pool: float
+    enemy_unit_pool: float
+    spawned_hp_pool: float
+
+    @property
+    def index(self) -> int:
+        return self.definition.index
+
+    @property
+    def duration_s(self) -> float:
+        return self.definition.duration_s
+
+
+def _compile_wave(
+    wave: WaveDefinition,
+    enemy_index: Dict[str, int],
+    enemies: Tuple[EnemyDefinition, ...],
+) -> CompiledWave:
+    counts: Dict[int, int] = {}
+    kinds = array("l")
+    spawn_times = array("d")
+    initial_hp = array("d")
+    initial_barrier = array("d")
+    spawned_hp_pool = 0.0
+    total_enemies = 0
+    for spawn in wave.spawns:
+        total_enemies += spawn.count
+        kind = enemy_index.get(spawn.enemy_id)
+        if kind is None:
+            continue
+        counts[kind] = counts.get(kind, 0) + spawn.count
+        enemy = enemies[kind]
+        for index in range(spawn.count):
+            kinds.append(kind)
+            spawn_times.append(spawn.at_s + (spawn.interval_s * index))
+            initial_hp.append(enemy.hp)
+            initial_barrier.append(enemy.barrier)
+            spawned_hp_pool += enemy.hp + enemy.barrier
+
+    spawn_order = tuple(sorted(range(len(kinds)), key=lambda slot: (spawn_times[slot], slot)))
+    enemy_hp_pool = 0.0
+    enemy_unit_pool = 0.0
+    for kind, count in counts.items():
+        enemy = enemies[kind]
+        enemy_hp_pool += (enemy.hp + enemy.barrier) * count
+        enemy_unit_pool += enemy.hp * count
+
+    return CompiledWave(
+        definition=wave,
+        enemy_kinds=kinds,
+        spawn_times=spawn_times,
+        initial_hp=initial_hp,
+        initial_barrier=initial_barrier,
+        spawn_order=spawn_order,
+        sorted_spawn_times=tuple(spawn_times[slot] for slot in spawn_order),
+        enemy_counts=tuple(counts.items()),
+        total_enemies=total_enemies,
+        enemy_hp_pool=enemy_hp_pool,
+        enemy_unit_pool=enemy_unit_pool,
+        spawned_hp_pool=spawned_hp_pool,
+    )
+
+
+def _scale_wave(wave: CompiledWave, enemies: Tuple[EnemyDefinition, ...]) -> CompiledWave:
+    """Re-derives a compiled wave's hp columns and pools for scaled enemies, keeping its schedule."""
+    initial_hp = array("d", (enemies[kind].hp for kind in wave.enemy_kinds))
+    spawned_hp_pool = 0.0
+    for slot, kind in enumerate(wave.enemy_kinds):
+        spawned_hp_pool += initial_hp[slot] + enemies[kind].barrier
+    enemy_hp_pool = 0.0
+    enemy_unit_pool = 0.0
+    for kind, count in wave.enemy_counts:
+        enemy = enemies[kind]
+        enemy_hp_pool += (enemy.hp + enemy.barrier) * count
+        enemy_unit_pool += enemy.hp * count
+    return replace(
+        wave,
+        initial_hp=initial_hp,
+        enemy_hp_pool=enemy_hp_pool,
+        enemy_unit_pool=enemy_unit_pool,
+        spawned_hp_pool=spawned_hp_pool,
+    )
+
+
+class CompiledScenario:
+    """A scenario compiled once for the engines.
+
+    Enemy and tower ids are interned to integer indices (dict order of the definition), spawn
+    schedules are pre-expanded per wave and resource baselines are indexed by wave. The compiled
+    form also owns a ``TowerStatsCache``, so scenarios cached by the catalog share resolved
+    tower stats across evaluations. ``scaled`` derives a variant with scaled tower/enemy stats
+    that shares the definition and spawn schedules instead of being recompiled.
+    """
+
+    __slots__ = (
+        "definition",
+        "enemy_ids",
+        "enemy_index",
+        "enemies",
+        "tower_ids",
+        "tower_index",
+        "towers",
+        "waves",
+        "stats_cache",
+        "scales",
+        "_baselines",
+        "_fingerprint",
+    )
+
+    def __init__(self, scenario: ScenarioDefinition):
+        self.definition = scenario
+        self.enemy_ids: Tuple[str, ...] = tuple(scenario.enemies)
+        self.enemy_index: Dict[str, int] = {enemy_id: index for index, enemy_id in enumerate(self.enemy_ids)}
+        self.enemies: Tuple[EnemyDefinition, ...] = tuple(scenario.enemies.values())
+        self.tower_ids: Tuple[str, ...] = tuple(scenario.towers)
+        self.tower_index: Dict[str, int] = {tower_id: index for index, tower_id in enumerate(self.tower_ids)}
+        self.towers: Tuple[TowerDefinition, ...] = tuple(scenario.towers.values())
+        self.waves: Tuple[CompiledWave, ...] = tuple(
+            _compile_wave(wave, self.enemy_index, self.enemies) for wave in scenario.waves
+        )
+        self.stats_cache = TowerStatsCache(scenario)
+        # None for the scenario as defined; set on variants derived by ``scaled``.
+        self.scales: ScenarioScales | None = None
+
+        baselines: Dict[int, Tuple[float, float]] = {}
+        for item in scenario.economy.wave_resource_baseline:
+            # The first entry for a wave wins, as with the former linear scan.
+            baselines.setdefault(item.wave, (item.gold, item.essence))
+        self._baselines = baselines
+        self._fingerprint: str | None = None
+
+    @property
+    def id(self) -> str:
+        return self.definition.id
+
+    @property
+    def fingerprint(self) -> str:
+        if self._fingerprint is None:
+            self._fingerprint = scenario_fingerprint(self.definition)
+        return self._fingerprint
+
+    def scaled(self, scales: ScenarioScales) -> "CompiledScenario":
+        """This scenario with ``scales`` applied; ids, spawn schedules and baselines are shared.
+
+        Enemy hp columns and pools are re-derived per wave and tower stats resolve through a
+        fresh stats cache, which is much cheaper than compiling a rebuilt definition.
+        """
+        if self.scales is not None:
+            raise ValueError("Scales apply to an unscaled scenario")
+        if scales.is_identity:
+            return self
+        variant = object.__new__(CompiledScenario)
+        variant.definition = self.definition
+        variant.enemy_ids = self.enemy_ids
+        variant.enemy_index = self.enemy_index
+        variant.enemies = tuple(scales.scale_enemy(enemy) for enemy in self.enemies)
+        variant.tower_ids = self.tower_ids
+        variant.tower_index = self.tower_index
+        variant.towers = self.towers
+        if scales.enemy_hp == 1.0:
+            variant.waves = self.waves
+        else:
+            variant.waves = tuple(_scale_wave(wave, variant.enemies) for wave in self.waves)
+        variant.stats_cache = TowerStatsCache(self.definition, scales)
+        variant.scales = scales
+        variant._baselines = self._baselines
+        variant._fingerprint = overlay_fingerprint(self.fingerprint, asdict(scales))
+        return variant
+
+    def baseline_resources(self, wave_index: int) -> Tuple[float, float]:
+        baseline = self._baselines.get(wave_index)
+        if baseline is not None:
+            return baseline
+        economy = self.definition.economy
+        return economy.default_wave_gold, economy.default_wave_essence
+
+    def tower(self, tower_id: str) -> TowerDefinition | None:
+        index = self.tower_index.get(tower_id)
+        return self.towers[index] if index is not None else None
+
+    def compile_wave(self, wave: WaveDefinition) -> CompiledWave:
+        """Compiles a wave that is not part of the scenario (ad-hoc batches, tests)."""
+        return _compile_wave(wave, self.enemy_index, self.enemies)
+
+
+def compile_scenario(scenario: ScenarioDefinition | CompiledScenario) -> CompiledScenario:
+    if isinstance(scenario, CompiledScenario):
+        return scenario
+    return CompiledScenario(scenario)
+
+
+def scenario_definition(scenario: ScenarioDefinition | CompiledScenario) -> ScenarioDefinition:
+    return scenario.definition if isinstance(scenario, CompiledScenario) else scenario
+
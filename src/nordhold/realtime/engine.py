@@ -1,10 +1,16 @@
 from __future__ import annotations
 
+from array import array
+import bisect
+from collections import deque
+from contextlib import closing, contextmanager
 import heapq
 import math
 import random
-from dataclasses import dataclass
-from typing import Dict, Iterable, List, Sequence, Tuple
+from dataclasses import dataclass, field, replace
+import threading
+import time
+from typing import Any, Deque, Dict, Iterator, List, Sequence, Tuple
 
 from .models import (
     BuildAction,
@@ -14,98 +20,37 @@ from .models import (
     EconomyPolicy,
     EnemyDefinition,
     EvaluationResult,
-    Modifier,
+    LiveSnapshot,
+    ModelError,
     Ruleset,
     ScenarioDefinition,
     TowerDefinition,
     TowerPlan,
+    TimelineCheckpoint,
+    TimelineProgress,
     TowerStats,
-    WaveDefinition,
     WaveResult,
     normalize_economy_totals,
 )
+from .cache import WaveResultCache, wave_result_key
+from .compiled import CompiledScenario, CompiledWave, compile_scenario
+from .parallel import imap_ordered, map_ordered, normalize_workers
+from .rng import RANDOM_STREAMS, CounterStreams, ShotStream
+from .sampling import DEFAULT_HISTOGRAM_BINS, MetricDistribution, RunningStats, SamplingTarget
+from .stats import CompiledTowerStats, TowerStatsCache
+from . import trace as _trace
+from .trace import DEFAULT_TRACE_CAPACITY, CombatTrace
 
 
 EPS = 1e-9
-
-
-def _clamp(value: float, low: float, high: float) -> float:
-    return max(low, min(high, value))
-
-
-def _apply_modifier(value: float, modifier: Modifier) -> float:
-    if modifier.op == "add":
-        return value + modifier.value
-    if modifier.op == "mul":
-        return value * modifier.value
-    if modifier.op == "set":
-        return modifier.value
-    if modifier.op == "cap_max":
-        return min(value, modifier.value)
-    if modifier.op == "cap_min":
-        return max(value, modifier.value)
-    return value
-
-
-def _apply_stat_modifiers(base: TowerStats, modifiers: Iterable[Modifier]) -> TowerStats:
-    values: Dict[str, float] = {
-        "damage": base.damage,
-        "fire_rate": base.fire_rate,
-        "crit_chance": base.crit_chance,
-        "crit_multiplier": base.crit_multiplier,
-        "accuracy": base.accuracy,
-        "penetration": base.penetration,
-        "barrier_damage_multiplier": base.barrier_damage_multiplier,
-    }
-    for modifier in modifiers:
-        if modifier.target not in values:
-            continue
-        values[modifier.target] = _apply_modifier(values[modifier.target], modifier)
-
-    return TowerStats(
-        damage=max(0.0, values["damage"]),
-        fire_rate=max(EPS, values["fire_rate"]),
-        crit_chance=_clamp(values["crit_chance"], 0.0, 1.0),
-        crit_multiplier=max(1.0, values["crit_multiplier"]),
-        accuracy=_clamp(values["accuracy"], 0.0, 1.0),
-        penetration=_clamp(values["penetration"], 0.0, 1.0),
-        barrier_damage_multiplier=max(0.01, values["barrier_damage_multiplier"]),
-    )
-
-
-def _resolve_tower_stats(
-    tower: TowerDefinition,
-    level: int,
-    global_modifiers: Sequence[Modifier],
-) -> TowerStats:
-    modifiers: List[Modifier] = []
-    for upgrade in sorted(tower.upgrade_levels, key=lambda item: item.level):
-        if upgrade.level > level:
-            break
-        modifiers.extend(upgrade.modifiers)
-    modifiers.extend(global_modifiers)
-    return _apply_stat_modifiers(tower.base_stats, modifiers)
-
-
-def _hit_chance(stats: TowerStats, enemy: EnemyDefinition, rules: Ruleset) -> float:
-    if rules.accuracy_block_model == "multiplicative":
-        return _clamp(stats.accuracy * (1.0 - enemy.block), 0.0, 1.0)
-    # linear_subtract: block is neutralized by equal/greater accuracy.
-    return _clamp(1.0 - max(0.0, enemy.block - stats.accuracy), 0.0, 1.0)
-
-
-def _effective_armor(enemy: EnemyDefinition, stats: TowerStats, rules: Ruleset) -> float:
-    if rules.armor_penetration_model == "multiplicative":
-        return _clamp(enemy.armor * (1.0 - stats.penetration), 0.0, 1.0)
-    return _clamp(max(0.0, enemy.armor - stats.penetration), 0.0, 1.0)
-
-
-def _armor_damage_factor(enemy: EnemyDefinition, stats: TowerStats, rules: Ruleset) -> float:
-    return max(0.0, 1.0 - _effective_armor(enemy, stats, rules))
-
-
-def _crit_factor_expected(stats: TowerStats) -> float:
-    return (1.0 - stats.crit_chance) + (stats.crit_chance * stats.crit_multiplier)
+# "combat_bulk" runs the combat model on a fixed timestep (see _simulate_wave_bulk).
+MODES = ("expected", "combat", "combat_bulk", "monte_carlo")
+DEFAULT_BULK_DT_S = 0.1
+# "scalar" is the reference implementation; "vectorized" batches Monte Carlo runs with numpy.
+ENGINES = ("scalar", "vectorized")
+# Monte Carlo runs are aggregated in fixed chunks so serial and process-pool evaluations sum
+# partial results in the same order and stay bit-identical.
+MONTE_CARLO_CHUNK_RUNS = {"scalar": 64, "vectorized": 512}
 
 
 @dataclass(slots=True)
@@ -147,73 +92,164 @@ def _initial_runtime_state(build: BuildPlan) -> RuntimeState:
     return RuntimeState(towers=towers, active_modifier_ids=list(build.active_global_modifiers))
 
 
-def _apply_action_to_state(state: RuntimeState, action: BuildAction) -> None:
-    action_type = action.type.lower().strip()
+def _checkpoint_runtime_state(checkpoint: TimelineCheckpoint) -> RuntimeState:
+    return _initial_runtime_state(
+        BuildPlan(
+            scenario_id=checkpoint.scenario_id,
+            towers=checkpoint.towers,
+            active_global_modifiers=checkpoint.active_global_modifiers,
+        )
+    )
 
-    if action_type == "build":
-        tower_id = str(action.payload.get("tower_id", action.target_id)).strip()
-        if not tower_id:
-            return
-        count = int(action.payload.get("count", max(1, int(action.value) if action.value else 1)))
-        level = int(action.payload.get("level", 0))
-        focus_priorities = tuple(action.payload.get("focus_priorities", ["progress", "lowest_hp"]))
-        focus_until_death = bool(action.payload.get("focus_until_death", False))
-        for _ in range(max(0, count)):
-            state.towers.append(
-                RuntimeTower(
-                    tower_id=tower_id,
-                    level=max(0, level),
-                    focus_priorities=focus_priorities,
-                    focus_until_death=focus_until_death,
-                )
+
+def _checkpoint_towers(runtime: RuntimeState) -> Tuple[TowerPlan, ...]:
+    plans: List[TowerPlan] = []
+    for tower in runtime.towers:
+        previous = plans[-1] if plans else None
+        if previous is not None and (
+            previous.tower_id,
+            previous.level,
+            previous.focus_priorities,
+            previous.focus_until_death,
+        ) == (tower.tower_id, tower.level, tower.focus_priorities, tower.focus_until_death):
+            plans[-1] = replace(previous, count=previous.count + 1)
+            continue
+        plans.append(
+            TowerPlan(
+                tower_id=tower.tower_id,
+                count=1,
+                level=tower.level,
+                focus_priorities=tuple(tower.focus_priorities),
+                focus_until_death=tower.focus_until_death,
             )
-        return
+        )
+    return tuple(plans)
+
+
+class _TimelineCursor:
+    """Walks a build plan wave by wave, applying every action exactly once.
+
+    Towers are kept by insertion serial with a tower_id index, so sell/upgrade/targeting no longer
+    scan the whole roster. Towers are replaced instead of mutated, which lets each wave's
+    RuntimeState snapshot share unchanged towers with earlier ones. With a checkpoint the walk
+    starts from its roster and skips the actions of waves before the checkpoint wave.
+    """
+
+    __slots__ = (
+        "build",
+        "checkpoint",
+        "wave_index",
+        "_position",
+        "_towers",
+        "_by_tower_id",
+        "_next_serial",
+        "_modifier_ids",
+    )
 
-    if action_type == "sell":
-        target_id = action.target_id
-        for idx, tower in enumerate(state.towers):
-            if tower.tower_id == target_id:
-                state.towers.pop(idx)
-                break
-        return
+    def __init__(self, build: BuildPlan, checkpoint: TimelineCheckpoint | None = None):
+        self.build = build
+        self.checkpoint = checkpoint
+        self._reset()
+
+    def _reset(self) -> None:
+        self.wave_index: int | None = None
+        self._position = 0
+        self._towers: Dict[int, RuntimeTower] = {}
+        self._by_tower_id: Dict[str, Deque[int]] = {}
+        self._next_serial = 0
+        if self.checkpoint is None:
+            initial = _initial_runtime_state(self.build)
+        else:
+            initial = _checkpoint_runtime_state(self.checkpoint)
+            actions = self.build.actions
+            while self._position < len(actions) and actions[self._position].wave < self.checkpoint.wave:
+                self._position += 1
+        self._modifier_ids = initial.active_modifier_ids
+        for tower in initial.towers:
+            self._add_tower(tower)
+
+    def _add_tower(self, tower: RuntimeTower) -> None:
+        serial = self._next_serial
+        self._next_serial += 1
+        self._towers[serial] = tower
+        self._by_tower_id.setdefault(tower.tower_id, deque()).append(serial)
+
+    def advance(self, wave_index: int) -> RuntimeState:
+        """Returns the runtime state with every action up to ``wave_index`` applied."""
+        if self.wave_index is not None and wave_index < self.wave_index:
+            self._reset()
+        actions = self.build.actions
+        while self._position < len(actions) and actions[self._position].wave <= wave_index:
+            self._apply(actions[self._position])
+            self._position += 1
+        self.wave_index = wave_index
+        return RuntimeState(towers=list(self._towers.values()), active_modifier_ids=list(self._modifier_ids))
+
+    def _apply(self, action: BuildAction) -> None:
+        action_type = action.type.lower().strip()
+
+        if action_type == "build":
+            tower_id = str(action.payload.get("tower_id", action.target_id)).strip()
+            if not tower_id:
+                return
+            count = int(action.payload.get("count", max(1, int(action.value) if action.value else 1)))
+            level = int(action.payload.get("level", 0))
+            focus_priorities = tuple(action.payload.get("focus_priorities", ["progress", "lowest_hp"]))
+            focus_until_death = bool(action.payload.get("focus_until_death", False))
+            for _ in range(max(0, count)):
+                self._add_tower(
+                    RuntimeTower(
+                        tower_id=tower_id,
+                        level=max(0, level),
+                        focus_priorities=focus_priorities,
+                        focus_until_death=focus_until_death,
+                    )
+                )
+            return
 
-    if action_type == "upgrade":
-        target_id = action.target_id
-        delta = int(action.payload.get("levels", action.value if action.value else 1))
-        for tower in state.towers:
-            if tower.tower_id == target_id:
-                tower.level = max(0, tower.level + delta)
-                break
-        return
+        if action_type == "sell":
+            serials = self._by_tower_id.get(action.target_id)
+            if serials:
+                del self._towers[serials.popleft()]
+            return
 
-    if action_type == "modifier":
-        modifier_id = str(action.payload.get("modifier_id", action.target_id)).strip()
-        if not modifier_id:
+        if action_type == "upgrade":
+            delta = int(action.payload.get("levels", action.value if action.value else 1))
+            serials = self._by_tower_id.get(action.target_id)
+            if serials:
+                tower = self._towers[serials[0]]
+                self._towers[serials[0]] = replace(tower, level=max(0, tower.level + delta))
             return
-        enable = bool(action.payload.get("enabled", action.value >= 0.0))
-        if enable and modifier_id not in state.active_modifier_ids:
-            state.active_modifier_ids.append(modifier_id)
-        if (not enable) and modifier_id in state.active_modifier_ids:
-            state.active_modifier_ids.remove(modifier_id)
-        return
 
-    if action_type == "targeting":
-        target_id = action.target_id
-        new_priorities = tuple(action.payload.get("focus_priorities", ["progress", "lowest_hp"]))
-        sticky = bool(action.payload.get("focus_until_death", False))
-        for tower in state.towers:
-            if tower.tower_id == target_id:
-                tower.focus_priorities = new_priorities
-                tower.focus_until_death = sticky
+        if action_type == "modifier":
+            modifier_id = str(action.payload.get("modifier_id", action.target_id)).strip()
+            if not modifier_id:
+                return
+            enable = bool(action.payload.get("enabled", action.value >= 0.0))
+            if enable and modifier_id not in self._modifier_ids:
+                self._modifier_ids.append(modifier_id)
+            if (not enable) and modifier_id in self._modifier_ids:
+                self._modifier_ids.remove(modifier_id)
+            return
 
+        if action_type == "targeting":
+            new_priorities = tuple(action.payload.get("focus_priorities", ["progress", "lowest_hp"]))
+            sticky = bool(action.payload.get("focus_until_death", False))
+            for serial in self._by_tower_id.get(action.target_id, ()):
+                self._towers[serial] = replace(
+                    self._towers[serial],
+                    focus_priorities=new_priorities,
+                    focus_until_death=sticky,
+                )
 
-def _runtime_for_wave(build: BuildPlan, wave_index: int) -> RuntimeState:
-    state = _initial_runtime_state(build)
-    for action in build.actions:
-        if action.wave > wave_index:
-            break
-        _apply_action_to_state(state, action)
-    return state
+
+def _runtime_fingerprint(runtime: RuntimeState) -> List[object]:
+    # Tower order is kept: it decides attack order and tie-breaks in combat, and the summation
+    # order of expected DPS, so reordered rosters are not guaranteed bit-identical results.
+    return [
+        [[tower.tower_id, tower.level, list(tower.focus_priorities), tower.focus_until_death] for tower in runtime.towers],
+        list(runtime.active_modifier_ids),
+    ]
 
 
 def _initial_economy_state(scenario: ScenarioDefinition) -> RuntimeEconomyState:
@@ -241,13 +277,6 @@ def _resolve_economy_policy(economy: EconomyDefinition, policy_id: str) -> Econo
     return EconomyPolicy(id="balanced")
 
 
-def _baseline_resources_for_wave(economy: EconomyDefinition, wave_index: int) -> Tuple[float, float]:
-    for item in economy.wave_resource_baseline:
-        if item.wave == wave_index:
-            return item.gold, item.essence
-    return economy.default_wave_gold, economy.default_wave_essence
-
-
 def _apply_worker_distribution(state: RuntimeEconomyState, workers_gold: int, workers_essence: int) -> None:
     workers_gold = max(0, workers_gold)
     workers_essence = max(0, workers_essence)
@@ -335,31 +364,74 @@ def _approx_build_cost(scenario: ScenarioDefinition, tower_id: str, level: int)
     return max(1.0, base + extra)
 
 
-def _evaluate_economy_totals(scenario: ScenarioDefinition, build: BuildPlan) -> Dict[str, object]:
-    economy = scenario.economy
-    state = _initial_economy_state(scenario)
-    actions_by_wave: Dict[int, List[BuildAction]] = {}
-    for action in build.actions:
-        actions_by_wave.setdefault(action.wave, []).append(action)
-
-    baseline_gold_total = 0.0
-    baseline_essence_total = 0.0
-    worker_gold_income_total = 0.0
-    worker_essence_income_total = 0.0
-    build_spend_gold_total = 0.0
-    build_inflation_gold_total = 0.0
-    build_actions_total = 0
-
-    for wave in scenario.waves:
-        baseline_gold, baseline_essence = _baseline_resources_for_wave(economy, wave.index)
-        baseline_gold_total += baseline_gold
-        baseline_essence_total += baseline_essence
+# Running sums of _EconomyLedger, stored in checkpoints as ``<name>`` for attribute ``<name>_total``.
+_LEDGER_TOTALS = (
+    "baseline_gold",
+    "baseline_essence",
+    "worker_gold_income",
+    "worker_essence_income",
+    "build_spend_gold",
+    "build_inflation_gold",
+    "build_actions",
+)
+
+
+class _EconomyLedger:
+    """Accumulates build economy totals wave by wave, in timeline order.
+
+    A checkpoint restores the worker/policy state and the sums of the waves before it, so a
+    resumed timeline ends with the same totals as a full one.
+    """
+
+    def __init__(self, scenario: CompiledScenario, build: BuildPlan, checkpoint: TimelineCheckpoint | None = None):
+        self.scenario = scenario
+        self.state = _initial_economy_state(scenario.definition)
+        self.actions_by_wave: Dict[int, List[BuildAction]] = {}
+        for action in build.actions:
+            if checkpoint is not None and action.wave < checkpoint.wave:
+                continue
+            self.actions_by_wave.setdefault(action.wave, []).append(action)
+
+        self.baseline_gold_total = 0.0
+        self.baseline_essence_total = 0.0
+        self.worker_gold_income_total = 0.0
+        self.worker_essence_income_total = 0.0
+        self.build_spend_gold_total = 0.0
+        self.build_inflation_gold_total = 0.0
+        self.build_actions_total = 0
+        if checkpoint is not None:
+            self._restore(checkpoint)
+
+    def _restore(self, checkpoint: TimelineCheckpoint) -> None:
+        state = self.state
+        for name, value in checkpoint.economy_state.items():
+            if name == "policy_id":
+                state.policy_id = str(value)
+            elif name in RuntimeEconomyState.__slots__:
+                setattr(state, name, max(0, int(value)))
+        for name in _LEDGER_TOTALS:
+            if name in checkpoint.economy_totals:
+                value = checkpoint.economy_totals[name]
+                setattr(self, f"{name}_total", int(value) if name == "build_actions" else float(value))
+
+    def checkpoint_state(self) -> Tuple[Dict[str, object], Dict[str, float]]:
+        state = {name: getattr(self.state, name) for name in RuntimeEconomyState.__slots__}
+        totals = {name: getattr(self, f"{name}_total") for name in _LEDGER_TOTALS}
+        return state, totals
+
+    def advance(self, wave: CompiledWave) -> None:
+        scenario = self.scenario.definition
+        economy = scenario.economy
+        state = self.state
+        baseline_gold, baseline_essence = self.scenario.baseline_resources(wave.index)
+        self.baseline_gold_total += baseline_gold
+        self.baseline_essence_total += baseline_essence
 
         policy = _resolve_economy_policy(economy, state.policy_id)
-        worker_gold_income_total += float(state.workers_gold) * economy.worker_gold_income_per_wave * policy.worker_gold_multiplier
-        worker_essence_income_total += float(state.workers_essence) * economy.worker_essence_income_per_wave * policy.worker_essence_multiplier
+        self.worker_gold_income_total += float(state.workers_gold) * economy.worker_gold_income_per_wave * policy.worker_gold_multiplier
+        self.worker_essence_income_total += float(state.workers_essence) * economy.worker_essence_income_per_wave * policy.worker_essence_multiplier
 
-        for action in actions_by_wave.get(wave.index, []):
+        for action in self.actions_by_wave.get(wave.index, []):
             action_type = action.type.lower().strip()
             if action_type == "assign_workers":
                 _apply_assign_workers_action(state, action)
@@ -387,55 +459,46 @@ def _evaluate_economy_totals(scenario: ScenarioDefinition, build: BuildPlan) ->
             policy_multiplier = max(0.1, current_policy.build_cost_multiplier)
             total_cost = base_cost * inflation_multiplier * policy_multiplier
 
-            build_spend_gold_total += total_cost
-            build_inflation_gold_total += max(0.0, total_cost - base_cost)
-            build_actions_total += count
+            self.build_spend_gold_total += total_cost
+            self.build_inflation_gold_total += max(0.0, total_cost - base_cost)
+            self.build_actions_total += count
             state.build_count += count
 
-    gross_gold_income = baseline_gold_total + worker_gold_income_total
-    gross_essence_income = baseline_essence_total + worker_essence_income_total
-    return normalize_economy_totals(
-        {
-            "baseline_gold": baseline_gold_total,
-            "baseline_essence": baseline_essence_total,
-            "worker_gold_income": worker_gold_income_total,
-            "worker_essence_income": worker_essence_income_total,
-            "gross_gold_income": gross_gold_income,
-            "gross_essence_income": gross_essence_income,
-            "build_spend_gold": build_spend_gold_total,
-            "build_inflation_gold": build_inflation_gold_total,
-            "build_actions": build_actions_total,
-            "net_gold": gross_gold_income - build_spend_gold_total,
-            "net_essence": gross_essence_income,
-            "policy_id": state.policy_id,
-            "workers": {
-                "total": state.total_workers,
-                "gold": state.workers_gold,
-                "essence": state.workers_essence,
-                "unassigned": state.workers_unassigned,
-            },
-        }
-    )
-
-
-def _dot_expected_dps(dot: DotEffect, rules: Ruleset, global_damage_factor: float) -> float:
-    total_ticks = max(1, int(dot.duration_s / max(EPS, dot.tick_interval_s)))
-    total = dot.damage_per_tick * float(total_ticks)
-    if rules.dot_scaling_policy == "global":
-        total *= global_damage_factor
-    return total / max(EPS, dot.duration_s)
+    def totals(self) -> Dict[str, object]:
+        state = self.state
+        gross_gold_income = self.baseline_gold_total + self.worker_gold_income_total
+        gross_essence_income = self.baseline_essence_total + self.worker_essence_income_total
+        return normalize_economy_totals(
+            {
+                "baseline_gold": self.baseline_gold_total,
+                "baseline_essence": self.baseline_essence_total,
+                "worker_gold_income": self.worker_gold_income_total,
+                "worker_essence_income": self.worker_essence_income_total,
+                "gross_gold_income": gross_gold_income,
+                "gross_essence_income": gross_essence_income,
+                "build_spend_gold": self.build_spend_gold_total,
+                "build_inflation_gold": self.build_inflation_gold_total,
+                "build_actions": self.build_actions_total,
+                "net_gold": gross_gold_income - self.build_spend_gold_total,
+                "net_essence": gross_essence_income,
+                "policy_id": state.policy_id,
+                "workers": {
+                    "total": state.total_workers,
+                    "gold": state.workers_gold,
+                    "essence": state.workers_essence,
+                    "unassigned": state.workers_unassigned,
+                },
+            }
+        )
 
 
 def _expected_wave(
-    scenario: ScenarioDefinition,
-    wave: WaveDefinition,
+    scenario: CompiledScenario,
+    wave: CompiledWave,
     runtime: RuntimeState,
+    stats_cache: TowerStatsCache,
 ) -> WaveResult:
-    enemy_counts: Dict[str, int] = {}
-    for spawn in wave.spawns:
-        enemy_counts[spawn.enemy_id] = enemy_counts.get(spawn.enemy_id, 0) + spawn.count
-
-    total_enemies = sum(enemy_counts.values())
+    total_enemies = wave.total_enemies
     if total_enemies <= 0:
         return WaveResult(
             wave=wave.index,
@@ -448,53 +511,37 @@ def _expected_wave(
             breakdown={},
         )
 
-    active_modifiers: List[Modifier] = []
-    for modifier_id in runtime.active_modifier_ids:
-        modifier = scenario.global_modifiers.get(modifier_id)
-        if modifier is not None:
-            active_modifiers.extend(modifier.modifiers)
-
+    enemies = scenario.enemies
     per_tower_dps: Dict[str, float] = {}
     effective_dps = 0.0
 
     for runtime_tower in runtime.towers:
-        tower_def = scenario.towers.get(runtime_tower.tower_id)
-        if tower_def is None:
+        compiled = stats_cache.resolve(runtime_tower.tower_id, runtime_tower.level, runtime.active_modifier_ids)
+        if compiled is None:
             continue
-        stats = _resolve_tower_stats(tower_def, runtime_tower.level, active_modifiers)
+        tower_def = scenario.towers[scenario.tower_index[runtime_tower.tower_id]]
+        stats = compiled.stats
+        dot_dps = compiled.dot_dps
         tower_mix_dps = 0.0
-        for enemy_id, count in enemy_counts.items():
-            enemy = scenario.enemies.get(enemy_id)
-            if enemy is None:
-                continue
+        for kind, count in wave.enemy_counts:
+            enemy = enemies[kind]
             weight = count / float(total_enemies)
-            hit = _hit_chance(stats, enemy, scenario.rules)
-            armor_factor = _armor_damage_factor(enemy, stats, scenario.rules)
-            direct_per_shot = stats.damage * _crit_factor_expected(stats) * hit * armor_factor
+            strike = compiled.strikes[kind]
+            direct_per_shot = stats.damage * compiled.crit_expected * strike.hit_chance * strike.armor_factor
             enemy_dps = direct_per_shot * stats.fire_rate
 
             if enemy.barrier > 0.0:
                 barrier_scale = (enemy.hp + enemy.barrier / max(EPS, stats.barrier_damage_multiplier)) / max(EPS, enemy.hp + enemy.barrier)
                 enemy_dps *= barrier_scale
 
-            dot_dps = 0.0
-            for dot in tower_def.dot_effects:
-                dot_dps += _dot_expected_dps(dot, scenario.rules, _crit_factor_expected(stats))
             tower_mix_dps += (enemy_dps + dot_dps) * weight
 
         key = tower_def.name
         per_tower_dps[key] = per_tower_dps.get(key, 0.0) + tower_mix_dps
         effective_dps += tower_mix_dps
 
-    enemy_hp_pool = 0.0
-    enemy_unit_pool = 0.0
-    for enemy_id, count in enemy_counts.items():
-        enemy = scenario.enemies.get(enemy_id)
-        if enemy is None:
-            continue
-        enemy_hp_pool += (enemy.hp + enemy.barrier) * count
-        enemy_unit_pool += enemy.hp * count
-
+    enemy_hp_pool = wave.enemy_hp_pool
+    enemy_unit_pool = wave.enemy_unit_pool
     potential_damage = effective_dps * wave.duration_s
     combat_damage = min(enemy_hp_pool, potential_damage)
     clear_time_s = enemy_hp_pool / max(EPS, effective_dps)
@@ -512,189 +559,505 @@ def _expected_wave(
     )
 
 
-@dataclass(slots=True)
-class _EnemyInstance:
-    uid: int
-    definition: EnemyDefinition
-    spawn_time: float
-    hp: float
-    barrier: float
-    dots: Dict[int, Dict[str, float]]
-    alive: bool = True
+class _EnemyStore:
+    """Struct-of-arrays state of one wave's enemies, addressed by slot (spawn index).
+
+    Kind and spawn time columns are shared with the ``CompiledWave``; hp, barrier, alive and the
+    lazy-regen step are per-run copies. ``stacks`` counts active DoT instances per
+    (slot, effect) so stack caps are a single lookup.
+
+    Regeneration is applied in steps between consecutive engine events, exactly as an eager pass
+    over every enemy on each event would. ``regen_times`` logs those event times and
+    ``regen_step[slot]`` is the last logged step already folded into ``hp[slot]``; see
+    ``_settle_regen``.
+    """
+
+    __slots__ = (
+        "definitions",
+        "kind",
+        "spawn_time",
+        "hp",
+        "barrier",
+        "alive",
+        "regenerates",
+        "regen_times",
+        "regen_step",
+        "effect_count",
+        "stacks",
+    )
+
+    def __init__(
+        self,
+        definitions: Sequence[EnemyDefinition],
+        kinds: Sequence[int],
+        spawn_times: Sequence[float],
+        hp: Sequence[float],
+        barrier: Sequence[float],
+        effect_count: int = 0,
+    ):
+        count = len(kinds)
+        self.definitions = definitions
+        self.kind = kinds
+        self.spawn_time = spawn_times
+        self.hp = array("d", hp)
+        self.barrier = array("d", barrier)
+        self.alive = bytearray(b"\x01") * count
+        self.regenerates = any(definition.regen_per_s > EPS for definition in definitions)
+        self.regen_times = array("d", [0.0])
+        self.regen_step = array("l", [0]) * count
+        self.effect_count = effect_count
+        self.stacks = array("l", [0]) * (count * effect_count)
+
+    @classmethod
+    def for_wave(cls, scenario: CompiledScenario, wave: CompiledWave, effect_count: int = 0) -> "_EnemyStore":
+        return cls(scenario.enemies, wave.enemy_kinds, wave.spawn_times, wave.initial_hp, wave.initial_barrier, effect_count)
+
+    def __len__(self) -> int:
+        return len(self.kind)
 
 
 @dataclass(slots=True)
 class _TowerInstance:
     uid: int
     definition: TowerDefinition
-    stats: TowerStats
+    compiled: CompiledTowerStats
     focus_priorities: Tuple[str, ...]
     focus_until_death: bool
-    sticky_target_uid: int | None = None
+    sticky_target: int | None = None
 
+    @property
+    def stats(self) -> TowerStats:
+        return self.compiled.stats
 
-def _target_score(enemy: _EnemyInstance, now: float, priority: str) -> float:
-    progress = max(0.0, now - enemy.spawn_time) * max(0.0, enemy.definition.speed)
-    hp_total = enemy.hp + enemy.barrier
+
+def _target_score(store: _EnemyStore, slot: int, now: float, priority: str) -> float:
+    definition = store.definitions[store.kind[slot]]
+    progress = max(0.0, now - store.spawn_time[slot]) * max(0.0, definition.speed)
 
     if priority == "progress" or priority == "closest_to_gate":
         return progress
     if priority == "lowest_hp":
-        return -hp_total
+        return -(store.hp[slot] + store.barrier[slot])
     if priority == "highest_hp":
-        return hp_total
+        return store.hp[slot] + store.barrier[slot]
     if priority == "fastest":
-        return enemy.definition.speed
+        return definition.speed
     if priority == "barrier":
-        return enemy.barrier
+        return store.barrier[slot]
     if priority == "boss_elite":
-        return 1.0 if "boss" in enemy.definition.tags or "elite" in enemy.definition.tags else 0.0
+        return 1.0 if "boss" in definition.tags or "elite" in definition.tags else 0.0
     if priority == "healer":
-        return 1.0 if "healer" in enemy.definition.tags else 0.0
+        return 1.0 if "healer" in definition.tags else 0.0
     if priority == "summoner" or priority == "spawner":
-        return 1.0 if "summoner" in enemy.definition.tags or "spawner" in enemy.definition.tags else 0.0
+        return 1.0 if "summoner" in definition.tags or "spawner" in definition.tags else 0.0
     return progress
 
 
-def _pick_target(now: float, tower: _TowerInstance, enemies: Sequence[_EnemyInstance]) -> _EnemyInstance | None:
-    alive = [enemy for enemy in enemies if enemy.alive and now >= enemy.spawn_time]
-    if not alive:
+def _log_regen_time(store: _EnemyStore, now: float) -> None:
+    """Records an engine event time as a regeneration step boundary."""
+    times = store.regen_times
+    if now > times[-1]:
+        times.append(now)
+
+
+def _settle_regen(store: _EnemyStore, slot: int) -> None:
+    """Brings ``hp[slot]`` up to the last logged event time.
+
+    The pending steps are replayed one by one, so the result is bit-for-bit what regenerating
+    every enemy on every event gives; a full-HP enemy stays full, which ends the replay early.
+    """
+    times = store.regen_times
+    last = len(times) - 1
+    step = store.regen_step[slot]
+    if step == last:
+        return
+    definition = store.definitions[store.kind[slot]]
+    regen = definition.regen_per_s
+    if regen > EPS:
+        hp = store.hp[slot]
+        max_hp = definition.hp
+        while step < last and hp < max_hp:
+            step += 1
+            hp = min(hp + regen * (times[step] - times[step - 1]), max_hp)
+        store.hp[slot] = hp
+    store.regen_step[slot] = last
+
+
+# Within one enemy definition speed and tags are shared, so these priorities never separate
+# group members; only spawn time (progress) and current HP/barrier can.
+_GROUP_CONSTANT_PRIORITIES = frozenset({"fastest", "boss_elite", "healer", "summoner", "spawner"})
+_HP_PRIORITIES = frozenset({"lowest_hp", "highest_hp", "barrier"})
+
+
+def _group_rank_term(store: _EnemyStore, slot: int, priority: str, moving: bool) -> float:
+    # Ascending order of these terms equals descending _target_score order inside one group.
+    if priority == "lowest_hp":
+        return store.hp[slot] + store.barrier[slot]
+    if priority == "highest_hp":
+        return -(store.hp[slot] + store.barrier[slot])
+    if priority == "barrier":
+        return -store.barrier[slot]
+    if priority in _GROUP_CONSTANT_PRIORITIES:
+        return 0.0
+    # progress/closest_to_gate (and unknown priorities): earlier spawns have walked further.
+    return store.spawn_time[slot] if moving else 0.0
+
+
+def _group_rank_key(store: _EnemyStore, slot: int, priorities: Tuple[str, ...], moving: bool) -> Tuple[float, ...]:
+    return tuple(_group_rank_term(store, slot, priority, moving) for priority in priorities)
+
+
+def _group_rank_column(store: _EnemyStore, slots: List[int], priority: str, moving: bool) -> List[float]:
+    """_group_rank_term for many slots at once; used by groups ranked with a full scan."""
+    hp = store.hp
+    barrier = store.barrier
+    if priority == "lowest_hp":
+        return [hp[slot] + barrier[slot] for slot in slots]
+    if priority == "highest_hp":
+        return [-(hp[slot] + barrier[slot]) for slot in slots]
+    if priority == "barrier":
+        return [-barrier[slot] for slot in slots]
+    if priority in _GROUP_CONSTANT_PRIORITIES or not moving:
+        return [0.0] * len(slots)
+    spawn_time = store.spawn_time
+    return [spawn_time[slot] for slot in slots]
+
+
+class _TargetGroup:
+    """Spawned enemies of one definition, so speed, tags and regeneration are group constants."""
+
+    __slots__ = ("store", "definition", "moving", "members", "heaps", "scan")
+
+    def __init__(self, store: _EnemyStore, definition: EnemyDefinition):
+        self.store = store
+        self.definition = definition
+        self.moving = definition.speed > 0.0
+        self.members: List[int] = []
+        self.heaps: Dict[Tuple[str, ...], List[Tuple[Tuple[float, ...], int]]] = {}
+        # Regenerating enemies change HP between hits, so their group is ranked by a scan.
+        self.scan = definition.regen_per_s > EPS
+
+    def add(self, slot: int) -> None:
+        self.members.append(slot)
+        for priorities, heap in self.heaps.items():
+            heapq.heappush(heap, (_group_rank_key(self.store, slot, priorities, self.moving), slot))
+
+    def touch(self, slot: int) -> None:
+        if self.scan:
+            return
+        for priorities, heap in self.heaps.items():
+            if _HP_PRIORITIES.intersection(priorities):
+                heapq.heappush(heap, (_group_rank_key(self.store, slot, priorities, self.moving), slot))
+
+    def _settle_members(self) -> None:
+        # Inlined _settle_regen over the whole group; regen and max hp are shared.
+        regen = self.definition.regen_per_s
+        max_hp = self.definition.hp
+        hp = self.store.hp
+        times = self.store.regen_times
+        last = len(times) - 1
+        regen_step = self.store.regen_step
+        for slot in self.members:
+            step = regen_step[slot]
+            if step == last:
+                continue
+            value = hp[slot]
+            while step < last and value < max_hp:
+                step += 1
+                value = min(value + regen * (times[step] - times[step - 1]), max_hp)
+            hp[slot] = value
+            regen_step[slot] = last
+
+    def best(self, priorities: Tuple[str, ...], now: float) -> int | None:
+        store = self.store
+        alive = store.alive
+        if self.scan:
+            self.members = [slot for slot in self.members if alive[slot]]
+            if not self.members:
+                return None
+            self._settle_members()
+            columns = [_group_rank_column(store, self.members, priority, self.moving) for priority in priorities]
+            # Rows are (term..., slot), which orders like ((term...), slot).
+            return min(zip(*columns, self.members))[-1]
+
+        heap = self.heaps.get(priorities)
+        if heap is None:
+            self.members = [slot for slot in self.members if alive[slot]]
+            heap = [(_group_rank_key(store, slot, priorities, self.moving), slot) for slot in self.members]
+            heapq.heapify(heap)
+            self.heaps[priorities] = heap
+
+        while heap:
+            key, slot = heap[0]
+            # Entries are never updated in place: dead enemies and superseded HP keys are dropped here.
+            if alive[slot] and key == _group_rank_key(store, slot, priorities, self.moving):
+                return slot
+            heapq.heappop(heap)
         return None
 
-    if tower.focus_until_death and tower.sticky_target_uid is not None:
-        for candidate in alive:
-            if candidate.uid == tower.sticky_target_uid:
-                return candidate
 
-    priorities = tower.focus_priorities or ("progress",)
-    alive.sort(
-        key=lambda enemy: tuple(_target_score(enemy, now, priority) for priority in priorities),
-        reverse=True,
-    )
-    target = alive[0]
-    if tower.focus_until_death:
-        tower.sticky_target_uid = target.uid
-    return target
+class _TargetIndex:
+    """Incremental replacement for sorting every alive enemy on each tower shot.
+
+    Enemies are grouped by definition. Each group keeps one lazy heap per focus-priority profile,
+    so a pick costs O(log E) per group plus one exact _target_score comparison between group
+    leaders. Ties resolve to the lowest slot, which is what the stable descending sort returned.
+    """
+
+    __slots__ = ("store", "pending", "next_spawn", "groups")
+
+    def __init__(self, store: _EnemyStore, spawn_order: Sequence[int] | None = None):
+        self.store = store
+        if spawn_order is None:
+            spawn_order = sorted(range(len(store)), key=lambda slot: (store.spawn_time[slot], slot))
+        self.pending = spawn_order
+        self.next_spawn = 0
+        self.groups: Dict[int, _TargetGroup] = {}
+
+    def _activate_spawned(self, now: float) -> None:
+        store = self.store
+        pending = self.pending
+        while self.next_spawn < len(pending) and store.spawn_time[pending[self.next_spawn]] <= now:
+            slot = pending[self.next_spawn]
+            self.next_spawn += 1
+            kind = store.kind[slot]
+            group = self.groups.get(kind)
+            if group is None:
+                group = _TargetGroup(store, store.definitions[kind])
+                self.groups[kind] = group
+            group.add(slot)
+
+    def touch(self, slot: int) -> None:
+        """Re-ranks an enemy after its HP or barrier changed."""
+        if not self.store.alive[slot]:
+            return
+        group = self.groups.get(self.store.kind[slot])
+        if group is not None:
+            group.touch(slot)
+
+    def pick(self, now: float, tower: _TowerInstance) -> int | None:
+        self._activate_spawned(now)
+        store = self.store
+
+        held = tower.sticky_target
+        if tower.focus_until_death and held is not None:
+            if store.alive[held] and now >= store.spawn_time[held]:
+                return held
+
+        priorities = tower.focus_priorities or ("progress",)
+        target: int | None = None
+        target_score: Tuple[float, ...] = tuple()
+        for group in self.groups.values():
+            candidate = group.best(priorities, now)
+            if candidate is None:
+                continue
+            score = tuple(_target_score(store, candidate, now, priority) for priority in priorities)
+            if target is None or score > target_score or (score == target_score and candidate < target):
+                target = candidate
+                target_score = score
+
+        if target is not None and tower.focus_until_death:
+            tower.sticky_target = target
+        return target
 
 
 def _apply_direct_damage(
-    enemy: _EnemyInstance,
+    store: _EnemyStore,
+    slot: int,
     tower: _TowerInstance,
     rules: Ruleset,
-    rng: random.Random,
+    rng: random.Random | ShotStream,
     sampled: bool,
+    trace: CombatTrace | None = None,
+    now: float = 0.0,
+    tower_ref: int = -1,
 ) -> float:
-    if not enemy.alive:
+    if not store.alive[slot]:
         return 0.0
 
-    stats = tower.stats
-    hit = _hit_chance(stats, enemy.definition, rules)
-    if sampled and rng.random() > hit:
+    compiled = tower.compiled
+    stats = compiled.stats
+    strike = compiled.strikes[store.kind[slot]]
+    if sampled and rng.random() > strike.hit_chance:
+        if trace is not None:
+            trace.record(now, _trace.MISS, tower_ref, slot)
         return 0.0
 
     if sampled:
         critical = stats.crit_multiplier if rng.random() < stats.crit_chance else 1.0
+        if trace is not None and critical != 1.0:
+            trace.record(now, _trace.CRIT, tower_ref, slot, critical)
     else:
-        critical = _crit_factor_expected(stats)
+        critical = compiled.crit_expected
 
     direct = stats.damage * critical
-    armor_factor = _armor_damage_factor(enemy.definition, stats, rules)
+    armor_factor = strike.armor_factor
+    hp = store.hp[slot]
+    barrier = store.barrier[slot]
 
     total_damage = 0.0
-    if enemy.barrier > EPS:
+    if barrier > EPS:
         barrier_factor = armor_factor if rules.barrier_inherits_armor else 1.0
         barrier_damage = direct * stats.barrier_damage_multiplier * barrier_factor
-        absorbed = min(enemy.barrier, barrier_damage)
-        enemy.barrier -= absorbed
+        absorbed = min(barrier, barrier_damage)
+        barrier -= absorbed
         total_damage += absorbed
+        if trace is not None:
+            trace.record(now, _trace.BARRIER_ABSORB, tower_ref, slot, absorbed)
 
         overflow = max(0.0, barrier_damage - absorbed)
         if overflow > EPS:
             hp_damage = overflow * armor_factor
-            dealt = min(enemy.hp, hp_damage)
-            enemy.hp -= dealt
+            dealt = min(hp, hp_damage)
+            hp -= dealt
             total_damage += dealt
     else:
         hp_damage = direct * armor_factor
-        dealt = min(enemy.hp, hp_damage)
-        enemy.hp -= dealt
+        dealt = min(hp, hp_damage)
+        hp -= dealt
         total_damage += dealt
 
-    if enemy.hp <= EPS and enemy.barrier <= EPS:
-        enemy.alive = False
+    store.hp[slot] = hp
+    store.barrier[slot] = barrier
+    if hp <= EPS and barrier <= EPS:
+        store.alive[slot] = 0
+    if trace is not None:
+        trace.record(now, _trace.HIT, tower_ref, slot, total_damage)
     return total_damage
 
 
-def _apply_regen(enemies: Sequence[_EnemyInstance], delta_s: float) -> None:
-    if delta_s <= 0:
-        return
-    for enemy in enemies:
-        if not enemy.alive:
-            continue
-        if enemy.definition.regen_per_s <= EPS:
-            continue
-        enemy.hp += enemy.definition.regen_per_s * delta_s
-        enemy.hp = min(enemy.hp, enemy.definition.hp)
+_TOWER_ATTACK = 0
+_DOT_TICK = 1
 
 
-def _simulate_wave_combat(
-    scenario: ScenarioDefinition,
-    wave: WaveDefinition,
+def _combat_towers(
+    scenario: CompiledScenario,
     runtime: RuntimeState,
-    seed: int,
-    sampled: bool,
-) -> WaveResult:
-    rng = random.Random(seed)
-
-    active_modifiers: List[Modifier] = []
-    for modifier_id in runtime.active_modifier_ids:
-        modifier = scenario.global_modifiers.get(modifier_id)
-        if modifier is not None:
-            active_modifiers.extend(modifier.modifiers)
+    stats_cache: TowerStatsCache,
+) -> Tuple[List[_TowerInstance], List[List[Tuple[int, DotEffect]]], int]:
+    """Resolves the runtime towers and interns their DoT effects for one simulation.
 
+    Returns the towers, per-tower (effect index, effect) lists and the number of effects.
+    """
     towers: List[_TowerInstance] = []
     for idx, runtime_tower in enumerate(runtime.towers, start=1):
-        tower_def = scenario.towers.get(runtime_tower.tower_id)
-        if tower_def is None:
+        compiled = stats_cache.resolve(runtime_tower.tower_id, runtime_tower.level, runtime.active_modifier_ids)
+        if compiled is None:
             continue
-        stats = _resolve_tower_stats(tower_def, runtime_tower.level, active_modifiers)
         towers.append(
             _TowerInstance(
                 uid=idx,
-                definition=tower_def,
-                stats=stats,
+                definition=scenario.towers[scenario.tower_index[runtime_tower.tower_id]],
+                compiled=compiled,
                 focus_priorities=runtime_tower.focus_priorities,
                 focus_until_death=runtime_tower.focus_until_death,
             )
         )
 
-    enemies: List[_EnemyInstance] = []
-    enemy_uid = 1
-    enemy_hp_pool = 0.0
-    for spawn in wave.spawns:
-        enemy_def = scenario.enemies.get(spawn.enemy_id)
-        if enemy_def is None:
-            continue
-        for index in range(spawn.count):
-            at_s = spawn.at_s + (spawn.interval_s * index)
-            enemies.append(
-                _EnemyInstance(
-                    uid=enemy_uid,
-                    definition=enemy_def,
-                    spawn_time=at_s,
-                    hp=enemy_def.hp,
-                    barrier=enemy_def.barrier,
-                    dots={},
-                )
-            )
-            enemy_uid += 1
-            enemy_hp_pool += enemy_def.hp + enemy_def.barrier
+    effect_index: Dict[str, int] = {}
+    tower_dots: List[List[Tuple[int, DotEffect]]] = []
+    for tower in towers:
+        tower_dots.append(
+            [(effect_index.setdefault(dot.id, len(effect_index)), dot) for dot in tower.definition.dot_effects]
+        )
+    return towers, tower_dots, len(effect_index)
+
+
+def _combat_result(
+    wave: CompiledWave,
+    store: _EnemyStore,
+    towers: Sequence[_TowerInstance],
+    total_damage: float,
+    clear_time: float,
+) -> WaveResult:
+    alive = store.alive
+    spawn_time = store.spawn_time
+    leaks = float(sum(1 for slot in range(len(store)) if alive[slot] and spawn_time[slot] <= wave.duration_s))
+    effective_dps = total_damage / max(EPS, wave.duration_s)
+
+    breakdown: Dict[str, float] = {}
+    if towers:
+        per_tower_share = total_damage / float(len(towers))
+        for tower in towers:
+            breakdown[tower.definition.name] = breakdown.get(tower.definition.name, 0.0) + per_tower_share
+
+    enemy_hp_pool = wave.spawned_hp_pool
+    return WaveResult(
+        wave=wave.index,
+        potential_damage=total_damage,
+        combat_damage=min(enemy_hp_pool, total_damage),
+        effective_dps=effective_dps,
+        clear_time_s=min(clear_time, wave.duration_s),
+        leaks=leaks,
+        enemy_hp_pool=enemy_hp_pool,
+        breakdown=breakdown,
+    )
+
+
+def _wave_cleared(
+    spawn_times: Sequence[float],
+    spawns_within_wave: int,
+    now: float,
+    alive_count: int,
+    enemy_count: int,
+) -> bool:
+    """True once every enemy spawned by ``now`` is dead and no further spawn falls within the wave.
+
+    Only a kill can clear a wave, so the combat engine checks this after every kill.
+    """
+    # Enemies cannot be damaged before they spawn, so every unspawned enemy is still alive.
+    spawned = bisect.bisect_right(spawn_times, now)
+    return alive_count - (enemy_count - spawned) <= 0 and spawns_within_wave <= spawned
 
-    events: List[Tuple[float, int, str, Dict[str, int]]] = []
+
+def _simulate_wave_combat(
+    scenario: CompiledScenario,
+    wave: CompiledWave,
+    runtime: RuntimeState,
+    draws: random.Random | CounterStreams,
+    sampled: bool,
+    stats_cache: TowerStatsCache,
+    trace: CombatTrace | None = None,
+    counters: Dict[str, int] | None = None,
+) -> WaveResult:
+    # Counter streams hand out an independent stream per (tower slot, shot index).
+    streams = draws if isinstance(draws, CounterStreams) else None
+    shots_fired = [0] * len(runtime.towers)
+
+    rules = scenario.definition.rules
+    # DoT effects are interned per simulation; per-tower lists hold (effect index, effect).
+    towers, tower_dots, effect_count = _combat_towers(scenario, runtime, stats_cache)
+    store = _EnemyStore.for_wave(scenario, wave, effect_count)
+    if trace is not None:
+        trace.begin(wave.index, [tower.definition.name for tower in towers], scenario.enemy_ids, wave.enemy_kinds)
+    enemy_count = len(store)
+    alive = store.alive
+    hp = store.hp
+    barrier = store.barrier
+    stacks = store.stacks
+    regenerates = store.regenerates
+
+    target_index = _TargetIndex(store, wave.spawn_order)
+    spawn_times = wave.sorted_spawn_times
+    spawns_within_wave = bisect.bisect_right(spawn_times, wave.duration_s)
+    alive_count = enemy_count
+
+    # Active DoT instances, indexed by the DoT id carried in tick events.
+    dot_stack = array("l")
+    dot_damage = array("d")
+    dot_interval = array("d")
+    dot_end = array("d")
+    # Tower index that applied each DoT instance; only filled when tracing.
+    dot_source = array("l")
+
+    # Events are (at_s, serial, kind, ref, dot_id); ref is a tower index or an enemy slot.
+    # Regeneration is not an O(E) pass per event: event times are logged and enemies replay
+    # the steps they missed when hit or ranked.
+    events: List[Tuple[float, int, int, int, int]] = []
     serial = 0
 
-    for tower in towers:
-        heapq.heappush(events, (0.0, serial, "tower_attack", {"tower_uid": tower.uid}))
+    for tower_index in range(len(towers)):
+        heapq.heappush(events, (0.0, serial, _TOWER_ATTACK, tower_index, 0))
         serial += 1
 
     now = 0.0
@@ -702,133 +1065,818 @@ def _simulate_wave_combat(
     clear_time = wave.duration_s
 
     while events:
-        at_s, _, event_type, data = heapq.heappop(events)
+        at_s, _, event_type, ref, dot_id = heapq.heappop(events)
         if at_s > wave.duration_s:
             break
 
-        _apply_regen(enemies, at_s - now)
         now = at_s
+        if regenerates:
+            _log_regen_time(store, now)
 
-        if event_type == "tower_attack":
-            tower_uid = data["tower_uid"]
-            tower = next((item for item in towers if item.uid == tower_uid), None)
-            if tower is None:
-                continue
-
-            target = _pick_target(now, tower, enemies)
+        if event_type == _TOWER_ATTACK:
+            tower = towers[ref]
+            target = target_index.pick(now, tower)
             if target is not None:
-                total_damage += _apply_direct_damage(target, tower, scenario.rules, rng, sampled)
-
-                for dot in tower.definition.dot_effects:
+                _settle_regen(store, target)
+                if streams is not None:
+                    shot_draws: random.Random | ShotStream = streams.shot(tower.uid, shots_fired[ref])
+                    shots_fired[ref] += 1
+                else:
+                    shot_draws = draws
+                if trace is None:
+                    total_damage += _apply_direct_damage(store, target, tower, rules, shot_draws, sampled)
+                else:
+                    trace.record(now, _trace.ATTACK, ref, target)
+                    total_damage += _apply_direct_damage(store, target, tower, rules, shot_draws, sampled, trace, now, ref)
+                if alive[target]:
+                    target_index.touch(target)
+                else:
+                    alive_count -= 1
+                    if trace is not None:
+                        trace.record(now, _trace.KILL, ref, target)
+                    if _wave_cleared(spawn_times, spawns_within_wave, now, alive_count, enemy_count):
+                        clear_time = now
+                        break
+
+                for effect, dot in tower_dots[ref]:
                     # lightweight DoT model: schedule ticks for each hit with per-effect stack cap.
-                    active_count = sum(1 for dot_state in target.dots.values() if int(dot_state["effect_hash"]) == hash(dot.id))
-                    if active_count >= max(1, dot.max_stacks):
+                    stack = target * effect_count + effect
+                    if stacks[stack] >= max(1, dot.max_stacks):
                         continue
+                    stacks[stack] += 1
 
-                    duration_end = now + dot.duration_s
                     tick_interval = max(EPS, dot.tick_interval_s)
-                    dot_uid = serial + 100000
                     base_dot_damage = dot.damage_per_tick
-                    if scenario.rules.dot_scaling_policy == "global":
-                        base_dot_damage *= _crit_factor_expected(tower.stats)
-                    target.dots[dot_uid] = {
-                        "effect_hash": float(hash(dot.id)),
-                        "damage": base_dot_damage,
-                        "tick_interval": tick_interval,
-                        "end": duration_end,
-                    }
-                    heapq.heappush(events, (now + tick_interval, serial, "dot_tick", {"enemy_uid": target.uid, "dot_uid": dot_uid}))
+                    if rules.dot_scaling_policy == "global":
+                        base_dot_damage *= tower.compiled.crit_expected
+                    new_dot_id = len(dot_stack)
+                    dot_stack.append(stack)
+                    dot_damage.append(base_dot_damage)
+                    dot_interval.append(tick_interval)
+                    dot_end.append(now + dot.duration_s)
+                    if trace is not None:
+                        dot_source.append(ref)
+                    heapq.heappush(events, (now + tick_interval, serial, _DOT_TICK, target, new_dot_id))
                     serial += 1
 
             next_attack = now + (1.0 / max(EPS, tower.stats.fire_rate))
-            heapq.heappush(events, (next_attack, serial, "tower_attack", {"tower_uid": tower.uid}))
+            heapq.heappush(events, (next_attack, serial, _TOWER_ATTACK, ref, 0))
             serial += 1
             continue
 
-        if event_type == "dot_tick":
-            enemy_uid_ref = data["enemy_uid"]
-            dot_uid = data["dot_uid"]
-            enemy = next((item for item in enemies if item.uid == enemy_uid_ref), None)
-            if enemy is None or not enemy.alive:
-                continue
-            dot_state = enemy.dots.get(dot_uid)
-            if dot_state is None:
-                continue
-            if now > float(dot_state["end"]) + EPS:
-                enemy.dots.pop(dot_uid, None)
-                continue
+        if not alive[ref]:
+            continue
+        if now > dot_end[dot_id] + EPS:
+            stacks[dot_stack[dot_id]] -= 1
+            continue
+
+        _settle_regen(store, ref)
+        dealt = min(hp[ref], dot_damage[dot_id])
+        hp[ref] -= dealt
+        total_damage += dealt
+        if trace is not None:
+            trace.record(now, _trace.DOT_TICK, dot_source[dot_id], ref, dealt)
+        if hp[ref] <= EPS and barrier[ref] <= EPS:
+            alive[ref] = 0
+            alive_count -= 1
+            if trace is not None:
+                trace.record(now, _trace.KILL, dot_source[dot_id], ref)
+            if _wave_cleared(spawn_times, spawns_within_wave, now, alive_count, enemy_count):
+                clear_time = now
+                break
+            continue
+
+        target_index.touch(ref)
+
+        next_tick = now + dot_interval[dot_id]
+        if next_tick <= dot_end[dot_id] + EPS:
+            heapq.heappush(events, (next_tick, serial, _DOT_TICK, ref, dot_id))
+            serial += 1
+        else:
+            stacks[dot_stack[dot_id]] -= 1
+
+    if trace is not None:
+        for slot in range(enemy_count):
+            if alive[slot] and store.spawn_time[slot] <= wave.duration_s:
+                trace.record(wave.duration_s, _trace.LEAK, -1, slot, hp[slot] + barrier[slot])
+    if counters is not None:
+        # Every scheduled event that is no longer queued was processed.
+        counters["events"] = serial - len(events)
+    return _combat_result(wave, store, towers, total_damage, clear_time)
 
-            dealt = min(enemy.hp, float(dot_state["damage"]))
-            enemy.hp -= dealt
-            total_damage += dealt
-            if enemy.hp <= EPS and enemy.barrier <= EPS:
-                enemy.alive = False
-                enemy.dots.clear()
-                continue
 
-            next_tick = now + float(dot_state["tick_interval"])
-            if next_tick <= float(dot_state["end"]) + EPS:
-                heapq.heappush(events, (next_tick, serial, "dot_tick", {"enemy_uid": enemy.uid, "dot_uid": dot_uid}))
-                serial += 1
+@dataclass(slots=True)
+class _BulkDot:
+    slot: int
+    stack: int
+    damage: float
+    interval: float
+    next_tick: float
+    end: float
+
+
+def _simulate_wave_bulk(
+    scenario: CompiledScenario,
+    wave: CompiledWave,
+    runtime: RuntimeState,
+    draws: random.Random | CounterStreams,
+    sampled: bool,
+    stats_cache: TowerStatsCache,
+    dt_s: float,
+    counters: Dict[str, int] | None = None,
+) -> WaveResult:
+    """Fixed-timestep variant of ``_simulate_wave_combat`` for very large waves.
+
+    Time advances in steps of ``dt_s`` with no event heap. At the end of each step every tower
+    fires all shots due by then, keeping one target until it dies, and the DoT ticks due in the
+    step are summed per enemy and applied at once. Shot times accumulate exactly as in the event
+    engine and each DoT instance keeps its own tick schedule, so the number of shots per tower and
+    ticks per instance is exact. Compared with the event engine:
+
+    - DoT damage and kills land at most ``dt_s`` late: within a step the shots of all towers fire
+      in shot-time order (ties by slot) and DoTs resolve after them;
+    - a tower picks a target at the time of the shot that needs one (only enemies spawned by
+      then qualify, since picks happen in time order) and keeps it for the rest of the step
+      unless it dies, so re-ranking by progress or HP lags by at most ``dt_s``;
+    - a DoT stack frees its slot at the end of the step in which it expired;
+    - ``clear_time_s`` is the end of the step in which the last enemy died (resolution ``dt_s``);
+    - regeneration steps at every shot time and step end instead of at every event.
+
+    Damage totals therefore differ only through overkill and target choice near kills, bounded
+    per kill by one step of the damage aimed at that enemy; with no kills they match exactly.
+    """
+    streams = draws if isinstance(draws, CounterStreams) else None
+    shots_fired = [0] * len(runtime.towers)
+
+    rules = scenario.definition.rules
+    towers, tower_dots, effect_count = _combat_towers(scenario, runtime, stats_cache)
+    store = _EnemyStore.for_wave(scenario, wave, effect_count)
+    enemy_count = len(store)
+    alive = store.alive
+    hp = store.hp
+    barrier = store.barrier
+    stacks = store.stacks
+    regenerates = store.regenerates
+
+    target_index = _TargetIndex(store, wave.spawn_order)
+    spawn_times = wave.sorted_spawn_times
+    spawns_within_wave = bisect.bisect_right(spawn_times, wave.duration_s)
+    alive_count = enemy_count
+
+    next_shot = [0.0] * len(towers)
+    intervals = [1.0 / max(EPS, tower.stats.fire_rate) for tower in towers]
+    dots: List[_BulkDot] = []
+    total_damage = 0.0
+    clear_time = wave.duration_s
+    step = 0
+
+    while True:
+        step += 1
+        now = min(wave.duration_s, step * dt_s)
+
+        # The step's shots fire in shot-time order across towers (ties by slot), so the target
+        # index never activates a spawn later than the shot that picks a target.
+        shots = [(next_shot[ref], ref) for ref in range(len(towers)) if next_shot[ref] <= now]
+        heapq.heapify(shots)
+        targets: List[int | None] = [None] * len(towers)
+        while shots:
+            shot_at, ref = heapq.heappop(shots)
+            tower = towers[ref]
+            next_shot[ref] = shot_at + intervals[ref]
+            if next_shot[ref] <= now:
+                heapq.heappush(shots, (next_shot[ref], ref))
+            if regenerates:
+                _log_regen_time(store, shot_at)
+            target = targets[ref]
+            if target is None or not alive[target]:
+                target = targets[ref] = target_index.pick(shot_at, tower)
+                if target is None:
+                    # Nothing to shoot at yet; this shot is spent, as in the event engine.
+                    continue
+            _settle_regen(store, target)
+            if streams is not None:
+                shot_draws: random.Random | ShotStream = streams.shot(tower.uid, shots_fired[ref])
+                shots_fired[ref] += 1
             else:
-                enemy.dots.pop(dot_uid, None)
+                shot_draws = draws
+            total_damage += _apply_direct_damage(store, target, tower, rules, shot_draws, sampled)
+            if alive[target]:
+                target_index.touch(target)
+            else:
+                alive_count -= 1
+
+            for effect, dot in tower_dots[ref]:
+                stack = target * effect_count + effect
+                if stacks[stack] >= max(1, dot.max_stacks):
+                    continue
+                stacks[stack] += 1
+                tick_interval = max(EPS, dot.tick_interval_s)
+                base_dot_damage = dot.damage_per_tick
+                if rules.dot_scaling_policy == "global":
+                    base_dot_damage *= tower.compiled.crit_expected
+                dots.append(
+                    _BulkDot(target, stack, base_dot_damage, tick_interval, shot_at + tick_interval, shot_at + dot.duration_s)
+                )
 
-        if all(not enemy.alive or now < enemy.spawn_time for enemy in enemies):
-            # wait for future spawn only; if no future spawn, wave is done.
-            future_spawn_exists = any(now < enemy.spawn_time <= wave.duration_s for enemy in enemies)
-            if not future_spawn_exists:
-                clear_time = now
-                break
+        if regenerates:
+            _log_regen_time(store, now)
+        if dots:
+            due: Dict[int, float] = {}
+            active: List[_BulkDot] = []
+            for dot in dots:
+                if not alive[dot.slot]:
+                    continue
+                tick = dot.next_tick
+                end = dot.end + EPS
+                ticks = 0
+                while tick <= now and tick <= end:
+                    ticks += 1
+                    tick += dot.interval
+                if ticks:
+                    due[dot.slot] = due.get(dot.slot, 0.0) + dot.damage * ticks
+                if tick > end:
+                    stacks[dot.stack] -= 1
+                else:
+                    dot.next_tick = tick
+                    active.append(dot)
+            dots = active
+
+            for slot, damage in due.items():
+                _settle_regen(store, slot)
+                dealt = min(hp[slot], damage)
+                hp[slot] -= dealt
+                total_damage += dealt
+                if hp[slot] <= EPS and barrier[slot] <= EPS:
+                    alive[slot] = 0
+                    alive_count -= 1
+                else:
+                    target_index.touch(slot)
+
+        spawned = bisect.bisect_right(spawn_times, now)
+        if alive_count - (enemy_count - spawned) <= 0 and spawns_within_wave <= spawned:
+            clear_time = now
+            break
+        if now >= wave.duration_s:
+            break
 
-    alive_count = sum(1 for enemy in enemies if enemy.alive and enemy.spawn_time <= wave.duration_s)
-    leaks = float(alive_count)
-    effective_dps = total_damage / max(EPS, wave.duration_s)
+    if counters is not None:
+        counters["steps"] = step
+    return _combat_result(wave, store, towers, total_damage, clear_time)
 
-    breakdown: Dict[str, float] = {}
-    if towers:
-        per_tower_share = total_damage / float(len(towers))
-        for tower in towers:
-            breakdown[tower.definition.name] = breakdown.get(tower.definition.name, 0.0) + per_tower_share
 
-    return WaveResult(
-        wave=wave.index,
-        potential_damage=total_damage,
-        combat_damage=min(enemy_hp_pool, total_damage),
-        effective_dps=effective_dps,
-        clear_time_s=min(clear_time, wave.duration_s),
-        leaks=leaks,
-        enemy_hp_pool=enemy_hp_pool,
-        breakdown=breakdown,
+def _batch_tower_specs(
+    scenario: CompiledScenario,
+    runtime: RuntimeState,
+    stats_cache: TowerStatsCache,
+) -> Tuple[List[Tuple[TowerDefinition, CompiledTowerStats, Tuple[str, ...], bool]], List[int]]:
+    """Vectorized engine tower specs plus each tower's counter-stream slot (``_TowerInstance.uid``)."""
+    specs: List[Tuple[TowerDefinition, CompiledTowerStats, Tuple[str, ...], bool]] = []
+    slots: List[int] = []
+    for idx, runtime_tower in enumerate(runtime.towers, start=1):
+        compiled = stats_cache.resolve(runtime_tower.tower_id, runtime_tower.level, runtime.active_modifier_ids)
+        if compiled is None:
+            continue
+        slots.append(idx)
+        specs.append(
+            (
+                scenario.towers[scenario.tower_index[runtime_tower.tower_id]],
+                compiled,
+                runtime_tower.focus_priorities,
+                runtime_tower.focus_until_death,
+            )
+        )
+    return specs, slots
+
+
+@dataclass(slots=True)
+class _MonteCarloPartial:
+    runs: int = 0
+    combat_damage: float = 0.0
+    effective_dps: float = 0.0
+    clear_time_s: float = 0.0
+    leaks: float = 0.0
+    breakdown: Dict[str, float] = field(default_factory=dict)
+    combat_stats: RunningStats = field(default_factory=RunningStats)
+    leak_stats: RunningStats = field(default_factory=RunningStats)
+    # Only when distributions were requested: constant-size sketches/histograms of the samples.
+    leak_distribution: MetricDistribution | None = None
+    clear_time_distribution: MetricDistribution | None = None
+
+    @classmethod
+    def for_wave(cls, wave: CompiledWave, distribution_bins: int | None) -> "_MonteCarloPartial":
+        if distribution_bins is None:
+            return cls()
+        # Leaks are whole enemies spawned within the wave, so with enough bins each count gets its own bin.
+        max_leaks = bisect.bisect_right(wave.sorted_spawn_times, wave.duration_s)
+        return cls(
+            leak_distribution=MetricDistribution.empty(0.0, float(max_leaks + 1), min(distribution_bins, max_leaks + 1)),
+            clear_time_distribution=MetricDistribution.empty(0.0, wave.duration_s, distribution_bins),
+        )
+
+    def add_distributions(self, leaks: Sequence[float], clear_times: Sequence[float]) -> None:
+        if self.leak_distribution is None or self.clear_time_distribution is None:
+            return
+        for value in leaks:
+            self.leak_distribution.add(value)
+        for value in clear_times:
+            self.clear_time_distribution.add(value)
+
+    def add(self, sample: WaveResult) -> None:
+        self.runs += 1
+        self.combat_damage += sample.combat_damage
+        self.effective_dps += sample.effective_dps
+        self.clear_time_s += sample.clear_time_s
+        self.leaks += sample.leaks
+        for key, value in sample.breakdown.items():
+            self.breakdown[key] = self.breakdown.get(key, 0.0) + value
+        self.combat_stats.add(sample.combat_damage)
+        self.leak_stats.add(sample.leaks)
+        self.add_distributions((sample.leaks,), (sample.clear_time_s,))
+
+    def merge(self, other: "_MonteCarloPartial") -> None:
+        self.runs += other.runs
+        self.combat_damage += other.combat_damage
+        self.effective_dps += other.effective_dps
+        self.clear_time_s += other.clear_time_s
+        self.leaks += other.leaks
+        for key, value in other.breakdown.items():
+            self.breakdown[key] = self.breakdown.get(key, 0.0) + value
+        self.combat_stats.merge(other.combat_stats)
+        self.leak_stats.merge(other.leak_stats)
+        # A fresh merge target adopts the first chunk's distributions, which fixes the bins.
+        if other.leak_distribution is not None and other.clear_time_distribution is not None:
+            if self.leak_distribution is None or self.clear_time_distribution is None:
+                self.leak_distribution = other.leak_distribution
+                self.clear_time_distribution = other.clear_time_distribution
+            else:
+                self.leak_distribution.merge(other.leak_distribution)
+                self.clear_time_distribution.merge(other.clear_time_distribution)
+
+    def converged(self, target: SamplingTarget) -> bool:
+        return target.metric_converged(self.combat_stats) and target.metric_converged(self.leak_stats)
+
+    def sampling_summary(self, target: SamplingTarget) -> Dict[str, object]:
+        return {
+            "runs": self.runs,
+            "converged": self.converged(target),
+            "combat_damage": target.describe(self.combat_stats),
+            "leaks": target.describe(self.leak_stats),
+        }
+
+    def distribution_summary(self) -> Dict[str, object] | None:
+        if self.leak_distribution is None or self.clear_time_distribution is None:
+            return None
+        return {
+            "leaks": self.leak_distribution.to_dict(),
+            "clear_time_s": self.clear_time_distribution.to_dict(),
+        }
+
+    def to_wave_result(self, expected: WaveResult, sampling: Dict[str, object] | None = None) -> WaveResult:
+        runs = max(1, self.runs)
+        return WaveResult(
+            wave=expected.wave,
+            potential_damage=expected.potential_damage,
+            combat_damage=self.combat_damage / runs,
+            effective_dps=self.effective_dps / runs,
+            clear_time_s=self.clear_time_s / runs,
+            leaks=self.leaks / runs,
+            enemy_hp_pool=expected.enemy_hp_pool,
+            breakdown={key: value / runs for key, value in self.breakdown.items()},
+            sampling=sampling,
+            distribution=self.distribution_summary(),
+        )
+
+
+class _AntitheticRandom(random.Random):
+    """Mirrors every uniform draw (``1 - u``) of the stream it was seeded with."""
+
+    def random(self) -> float:
+        return 1.0 - super().random()
+
+
+def _run_draws(
+    seed: int,
+    wave_index: int,
+    run_index: int,
+    random_streams: str,
+    antithetic: bool,
+) -> random.Random | CounterStreams:
+    if random_streams == "counter":
+        return CounterStreams(seed, wave_index, run_index, antithetic)
+    # Antithetic pairs (2k, 2k + 1) share run 2k's seed; chunk sizes are even, so pairs never split.
+    stream_index = run_index - (run_index % 2) if antithetic else run_index
+    run_seed = seed + (wave_index * 1009) + (stream_index * 37)
+    if antithetic and run_index % 2 == 1:
+        return _AntitheticRandom(run_seed)
+    return random.Random(run_seed)
+
+
+def _monte_carlo_chunk(
+    scenario: CompiledScenario,
+    wave: CompiledWave,
+    runtime: RuntimeState,
+    seed: int,
+    run_start: int,
+    run_stop: int,
+    engine: str,
+    stats_cache: TowerStatsCache,
+    random_streams: str = "sequential",
+    antithetic: bool = False,
+    distribution_bins: int | None = None,
+) -> _MonteCarloPartial:
+    partial = _MonteCarloPartial.for_wave(wave, distribution_bins)
+    if engine == "vectorized":
+        from .vectorized import simulate_wave_batch
+
+        specs, slots = _batch_tower_specs(scenario, runtime, stats_cache)
+        batch = simulate_wave_batch(
+            scenario,
+            wave,
+            specs,
+            seed=seed if random_streams == "counter" else (seed + (wave.index * 1009), run_start),
+            runs=run_stop - run_start,
+            antithetic=antithetic,
+            random_streams=random_streams,
+            run_start=run_start,
+            tower_slots=slots,
+        )
+        partial.runs = batch.runs
+        partial.combat_damage = float(batch.combat_damage.sum())
+        partial.effective_dps = float(batch.effective_dps.sum())
+        partial.clear_time_s = float(batch.clear_time_s.sum())
+        partial.leaks = float(batch.leaks.sum())
+        partial.breakdown = {key: float(values.sum()) for key, values in batch.breakdown.items()}
+        for stats, values in ((partial.combat_stats, batch.combat_damage), (partial.leak_stats, batch.leaks)):
+            stats.count = int(values.shape[0])
+            stats.mean = float(values.mean())
+            stats.m2 = float(((values - stats.mean) ** 2).sum())
+        partial.add_distributions(batch.leaks.tolist(), batch.clear_time_s.tolist())
+        return partial
+
+    for run_index in range(run_start, run_stop):
+        draws = _run_draws(seed, wave.index, run_index, random_streams, antithetic)
+        partial.add(_simulate_wave_combat(scenario, wave, runtime, draws, sampled=True, stats_cache=stats_cache))
+    return partial
+
+
+def _combat_wave(
+    scenario: CompiledScenario,
+    wave: CompiledWave,
+    runtime: RuntimeState,
+    seed: int,
+    stats_cache: TowerStatsCache,
+    random_streams: str = "sequential",
+    bulk_dt_s: float | None = None,
+    trace: CombatTrace | None = None,
+    counters: Dict[str, int] | None = None,
+) -> WaveResult:
+    if random_streams == "counter":
+        draws: random.Random | CounterStreams = CounterStreams(seed, wave.index, 0)
+    else:
+        draws = random.Random(seed + (wave.index * 997))
+    if bulk_dt_s is not None:
+        return _simulate_wave_bulk(scenario, wave, runtime, draws, True, stats_cache, bulk_dt_s, counters)
+    return _simulate_wave_combat(
+        scenario, wave, runtime, draws, sampled=True, stats_cache=stats_cache, trace=trace, counters=counters
     )
 
 
-def evaluate_timeline(
-    scenario: ScenarioDefinition,
+def _counted_combat_wave(*args: Any) -> Tuple[WaveResult, Dict[str, int]]:
+    # Process-pool friendly: counters filled in a worker come back with the result.
+    counters: Dict[str, int] = {}
+    return _combat_wave(*args, counters=counters), counters
+
+
+def _adaptive_wave(
+    scenario: CompiledScenario,
+    wave: CompiledWave,
+    runtime: RuntimeState,
+    expected: WaveResult,
+    seed: int,
+    max_runs: int,
+    engine: str,
+    stats_cache: TowerStatsCache,
+    workers: int,
+    target: SamplingTarget,
+    random_streams: str = "sequential",
+    antithetic: bool = False,
+    distribution_bins: int | None = None,
+) -> WaveResult:
+    """Samples one wave chunk by chunk until its combat_damage and leaks CIs meet ``target``.
+
+    Chunks use the same seeds as fixed-run Monte Carlo and convergence is checked after each
+    chunk in order, so a wave that stops at N runs equals a fixed N-run evaluation. With several
+    workers each round computes ``workers`` chunks ahead; chunks past the stopping point are
+    discarded, which keeps results independent of the worker count.
+    """
+    chunk_runs = MONTE_CARLO_CHUNK_RUNS[engine]
+    merged = _MonteCarloPartial()
+    next_start = 0
+    while True:
+        tasks: List[Tuple[object, ...]] = []
+        for _ in range(workers):
+            if next_start >= max_runs:
+                break
+            run_stop = min(max_runs, next_start + chunk_runs)
+            tasks.append(
+                (
+                    scenario,
+                    wave,
+                    runtime,
+                    seed,
+                    next_start,
+                    run_stop,
+                    engine,
+                    stats_cache,
+                    random_streams,
+                    antithetic,
+                    distribution_bins,
+                )
+            )
+            next_start = run_stop
+
+        for partial in map_ordered(_monte_carlo_chunk, tasks, workers):
+            merged.merge(partial)
+            if merged.converged(target) or merged.runs >= max_runs:
+                return merged.to_wave_result(expected, sampling=merged.sampling_summary(target))
+
+
+class EngineDiagnostics:
+    """Wall time and call counts per evaluation phase, plus per-wave timings and work counters.
+
+    Phases: ``compile`` (scenario compile, usually a cache hit), ``replay`` (build actions),
+    ``cache`` (result cache lookups/stores), one phase per mode for freshly computed waves
+    (``expected``, ``combat``, ``combat_bulk``, ``monte_carlo``) and ``economy`` (ledger totals).
+    Callers may add their own (e.g. ``scenario_load``). Per-wave entries carry the wall time spent
+    waiting for the wave, whether it was a cache hit and, for combat modes, the processed event
+    count (``combat``) or timestep count (``combat_bulk``).
+    """
+
+    __slots__ = ("phases", "waves", "_counters", "_started")
+
+    def __init__(self) -> None:
+        self.phases: Dict[str, List[float]] = {}
+        # (wave index, seconds, cached, work counters or None), in timeline order.
+        self.waves: List[Tuple[int, float, bool, Dict[str, int] | None]] = []
+        self._counters: Dict[int, Dict[str, int]] = {}
+        self._started = time.perf_counter()
+
+    def add(self, phase: str, seconds: float, calls: int = 1) -> None:
+        entry = self.phases.get(phase)
+        if entry is None:
+            self.phases[phase] = [seconds, calls]
+        else:
+            entry[0] += seconds
+            entry[1] += calls
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - started)
+
+    def note_counters(self, wave_index: int, counters: Dict[str, int]) -> None:
+        """Work counters of a wave computed ahead of its ``wave`` entry (parallel workers)."""
+        self._counters[wave_index] = counters
+
+    def wave(self, wave_index: int, seconds: float, cached: bool) -> None:
+        self.waves.append((wave_index, seconds, cached, self._counters.pop(wave_index, None)))
+
+    def to_dict(self) -> Dict[str, Any]:
+        waves: List[Dict[str, Any]] = []
+        for wave_index, seconds, cached, counters in self.waves:
+            entry: Dict[str, Any] = {"wave": wave_index, "seconds": seconds, "cached": cached}
+            if counters:
+                entry.update(counters)
+            waves.append(entry)
+        return {
+            "total_s": time.perf_counter() - self._started,
+            "phases": {name: {"seconds": seconds, "calls": int(calls)} for name, (seconds, calls) in self.phases.items()},
+            "waves": waves,
+        }
+
+
+class EngineMetrics:
+    """Process-wide, thread-safe totals of every finished timeline evaluation's diagnostics."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.evaluations = 0
+            self.waves = 0
+            self.cached_waves = 0
+            self.phases: Dict[str, List[float]] = {}
+            self.work: Dict[str, int] = {}
+            self.by_mode: Dict[str, int] = {}
+
+    def merge(self, mode: str, diagnostics: EngineDiagnostics) -> None:
+        waves = diagnostics.waves
+        cached = sum(1 for entry in waves if entry[2])
+        with self._lock:
+            self.evaluations += 1
+            self.by_mode[mode] = self.by_mode.get(mode, 0) + 1
+            self.waves += len(waves)
+            self.cached_waves += cached
+            for name, (seconds, calls) in diagnostics.phases.items():
+                entry = self.phases.get(name)
+                if entry is None:
+                    self.phases[name] = [seconds, calls]
+                else:
+                    entry[0] += seconds
+                    entry[1] += calls
+            for _, _, _, counters in waves:
+                if counters:
+                    for name, value in counters.items():
+                        self.work[name] = self.work.get(name, 0) + value
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "evaluations": self.evaluations,
+                "evaluations_by_mode": dict(self.by_mode),
+                "waves": self.waves,
+                "cached_waves": self.cached_waves,
+                "phases": {
+                    name: {"seconds": seconds, "calls": int(calls)} for name, (seconds, calls) in self.phases.items()
+                },
+                "combat_events": self.work.get("events", 0),
+                "combat_bulk_steps": self.work.get("steps", 0),
+            }
+
+
+ENGINE_METRICS = EngineMetrics()
+
+
+@dataclass(slots=True, frozen=True)
+class _TimelineRequest:
+    scenario: CompiledScenario
+    build: BuildPlan
+    dataset_version: str
+    mode: str
+    seed: int
+    runs: int
+    engine: str
+    workers: int
+    stats_cache: TowerStatsCache
+    result_cache: WaveResultCache | None
+    # Adaptive sampling only applies to monte_carlo; ``runs`` becomes the per-wave cap.
+    adaptive: SamplingTarget | None
+    random_streams: str
+    antithetic: bool
+    # Step size of combat_bulk; None for every other mode.
+    bulk_dt_s: float | None
+    # Resume point: only waves from checkpoint.wave on are evaluated.
+    checkpoint: TimelineCheckpoint | None
+    diagnostics: EngineDiagnostics
+    # Histogram bins of per-wave Monte Carlo distributions; None when distributions are off.
+    distribution_bins: int | None = None
+    # End point: only waves before until_wave are evaluated; None runs to the last wave.
+    until_wave: int | None = None
+
+
+def _timeline_request(
+    scenario: ScenarioDefinition | CompiledScenario,
     build: BuildPlan,
     dataset_version: str,
     mode: str,
     seed: int,
     monte_carlo_runs: int,
-) -> EvaluationResult:
+    engine: str,
+    workers: int,
+    stats_cache: TowerStatsCache | None,
+    result_cache: WaveResultCache | None,
+    sampling_target: SamplingTarget | None,
+    random_streams: str,
+    antithetic: bool,
+    bulk_dt_s: float,
+    checkpoint: TimelineCheckpoint | None,
+    diagnostics: EngineDiagnostics | None,
+    distributions: bool = False,
+    histogram_bins: int = DEFAULT_HISTOGRAM_BINS,
+    until_wave: int | None = None,
+) -> _TimelineRequest:
+    if diagnostics is None:
+        diagnostics = EngineDiagnostics()
     normalized_mode = mode.lower().strip()
-    if normalized_mode not in {"expected", "combat", "monte_carlo"}:
+    if normalized_mode not in MODES:
         raise ValueError(f"Unsupported mode: {mode}")
+    if normalized_mode == "combat_bulk" and not (bulk_dt_s > 0.0 and math.isfinite(bulk_dt_s)):
+        raise ValueError(f"bulk_dt_s must be a positive number of seconds, got {bulk_dt_s}")
+    normalized_engine = engine.lower().strip()
+    if normalized_engine not in ENGINES:
+        raise ValueError(f"Unsupported engine: {engine}")
+    if normalized_engine == "vectorized" and normalized_mode == "monte_carlo":
+        from .vectorized import vectorized_available
+
+        if not vectorized_available():
+            raise ValueError("Vectorized engine requires numpy. Install it with: pip install numpy")
+    normalized_streams = random_streams.lower().strip()
+    if normalized_streams not in RANDOM_STREAMS:
+        raise ValueError(f"Unsupported random_streams: {random_streams}")
+    if distributions and histogram_bins < 1:
+        raise ValueError(f"histogram_bins must be >= 1, got {histogram_bins}")
+    if until_wave is not None and until_wave < 1:
+        raise ValueError(f"until_wave must be >= 1, got {until_wave}")
+    started = time.perf_counter()
+    compiled = compile_scenario(scenario)
+    diagnostics.add("compile", time.perf_counter() - started)
+    if stats_cache is None:
+        stats_cache = compiled.stats_cache
+    elif stats_cache.scenario is not compiled.definition or stats_cache.scales != compiled.scales:
+        raise ValueError("stats_cache was built for a different scenario")
+    if checkpoint is not None and checkpoint.scenario_id != compiled.id:
+        raise ValueError(f"Checkpoint is for scenario {checkpoint.scenario_id!r}, not {compiled.id!r}")
+
+    return _TimelineRequest(
+        scenario=compiled,
+        build=build,
+        dataset_version=dataset_version,
+        mode=normalized_mode,
+        seed=seed,
+        runs=max(1, monte_carlo_runs),
+        engine=normalized_engine,
+        workers=normalize_workers(workers),
+        stats_cache=stats_cache,
+        result_cache=result_cache,
+        adaptive=sampling_target if normalized_mode == "monte_carlo" else None,
+        random_streams=normalized_streams,
+        antithetic=bool(antithetic) and normalized_mode == "monte_carlo",
+        bulk_dt_s=float(bulk_dt_s) if normalized_mode == "combat_bulk" else None,
+        checkpoint=checkpoint,
+        diagnostics=diagnostics,
+        distribution_bins=int(histogram_bins) if distributions and normalized_mode == "monte_carlo" else None,
+        until_wave=until_wave,
+    )
 
-    wave_results: List[WaveResult] = []
-
-    for wave in scenario.waves:
-        runtime = _runtime_for_wave(build, wave.index)
-        expected = _expected_wave(scenario, wave, runtime)
-
-        if normalized_mode == "expected":
-            wave_results.append(expected)
-            continue
 
-        if normalized_mode == "combat":
-            combat = _simulate_wave_combat(scenario, wave, runtime, seed + (wave.index * 997), sampled=True)
-            # Keep deterministic expected potential side-by-side for UI.
-            wave_results.append(
-                WaveResult(
+def _wave_cache_keys(
+    request: _TimelineRequest,
+    timeline: Sequence[Tuple[CompiledWave, RuntimeState]],
+) -> List[str | None]:
+    if request.result_cache is None:
+        return [None] * len(timeline)
+    mode = request.mode
+    scenario_hash = request.scenario.fingerprint
+    # Only inputs that can change a mode's output are part of its key.
+    key_seed = request.seed if mode != "expected" else 0
+    key_runs = request.runs if mode == "monte_carlo" else 1
+    key_engine = request.engine if mode == "monte_carlo" else "scalar"
+    key_sampling = request.adaptive.to_dict() if request.adaptive is not None else None
+    key_streams = request.random_streams if mode != "expected" else "sequential"
+    return [
+        wave_result_key(
+            scenario_hash,
+            request.dataset_version,
+            wave.index,
+            _runtime_fingerprint(runtime),
+            mode,
+            key_seed,
+            key_runs,
+            key_engine,
+            sampling=key_sampling,
+            random_streams=key_streams,
+            antithetic=request.antithetic,
+            bulk_dt_s=request.bulk_dt_s,
+            distribution_bins=request.distribution_bins,
+        )
+        for wave, runtime in timeline
+    ]
+
+
+def _fresh_wave_results(
+    request: _TimelineRequest,
+    pending: Sequence[Tuple[CompiledWave, RuntimeState]],
+) -> Iterator[WaveResult]:
+    """Computes cache misses in timeline order, yielding each wave as soon as it is done.
+
+    Closing the generator closes the pool iterator, which cancels the tasks that have not started.
+    """
+    scenario = request.scenario
+    stats_cache = request.stats_cache
+    if request.mode == "expected":
+        for wave, runtime in pending:
+            yield _expected_wave(scenario, wave, runtime, stats_cache)
+
+    elif request.mode in ("combat", "combat_bulk"):
+        combats = imap_ordered(
+            _counted_combat_wave,
+            [
+                (scenario, wave, runtime, request.seed, stats_cache, request.random_streams, request.bulk_dt_s)
+                for wave, runtime in pending
+            ],
+            request.workers,
+        )
+        with closing(combats):
+            for (wave, runtime), (combat, counters) in zip(pending, combats):
+                request.diagnostics.note_counters(wave.index, counters)
+                expected = _expected_wave(scenario, wave, runtime, stats_cache)
+                # Keep deterministic expected potential side-by-side for UI.
+                yield WaveResult(
                     wave=wave.index,
                     potential_damage=expected.potential_damage,
                     combat_damage=combat.combat_damage,
@@ -838,46 +1886,409 @@ def evaluate_timeline(
                     enemy_hp_pool=combat.enemy_hp_pool,
                     breakdown=combat.breakdown,
                 )
+
+    elif request.adaptive is not None:
+        for wave, runtime in pending:
+            yield _adaptive_wave(
+                scenario,
+                wave,
+                runtime,
+                _expected_wave(scenario, wave, runtime, stats_cache),
+                request.seed,
+                request.runs,
+                request.engine,
+                stats_cache,
+                request.workers,
+                request.adaptive,
+                random_streams=request.random_streams,
+                antithetic=request.antithetic,
+                distribution_bins=request.distribution_bins,
             )
-            continue
 
-        runs = max(1, monte_carlo_runs)
-        samples: List[WaveResult] = []
-        for run_index in range(runs):
-            run_seed = seed + (wave.index * 1009) + (run_index * 37)
-            samples.append(_simulate_wave_combat(scenario, wave, runtime, run_seed, sampled=True))
-
-        avg_combat = sum(item.combat_damage for item in samples) / runs
-        avg_dps = sum(item.effective_dps for item in samples) / runs
-        avg_clear = sum(item.clear_time_s for item in samples) / runs
-        avg_leaks = sum(item.leaks for item in samples) / runs
-
-        breakdown: Dict[str, float] = {}
-        for sample in samples:
-            for key, value in sample.breakdown.items():
-                breakdown[key] = breakdown.get(key, 0.0) + (value / runs)
-
-        wave_results.append(
-            WaveResult(
-                wave=wave.index,
-                potential_damage=expected.potential_damage,
-                combat_damage=avg_combat,
-                effective_dps=avg_dps,
-                clear_time_s=avg_clear,
-                leaks=avg_leaks,
-                enemy_hp_pool=expected.enemy_hp_pool,
-                breakdown=breakdown,
+    else:
+        runs = request.runs
+        chunk_runs = MONTE_CARLO_CHUNK_RUNS[request.engine]
+        tasks: List[Tuple[object, ...]] = []
+        chunks_per_wave: List[int] = []
+        for wave, runtime in pending:
+            starts = range(0, runs, chunk_runs)
+            chunks_per_wave.append(len(starts))
+            for run_start in starts:
+                tasks.append(
+                    (
+                        scenario,
+                        wave,
+                        runtime,
+                        request.seed,
+                        run_start,
+                        min(runs, run_start + chunk_runs),
+                        request.engine,
+                        stats_cache,
+                        request.random_streams,
+                        request.antithetic,
+                        request.distribution_bins,
+                    )
+                )
+
+        with closing(imap_ordered(_monte_carlo_chunk, tasks, request.workers)) as partials:
+            for (wave, runtime), chunk_count in zip(pending, chunks_per_wave):
+                merged = _MonteCarloPartial()
+                for _ in range(chunk_count):
+                    merged.merge(next(partials))
+                yield merged.to_wave_result(_expected_wave(scenario, wave, runtime, stats_cache))
+
+
+def _stream_timeline(request: _TimelineRequest) -> Iterator[TimelineProgress]:
+    diagnostics = request.diagnostics
+    try:
+        yield from _stream_timeline_waves(request, diagnostics)
+    finally:
+        ENGINE_METRICS.merge(request.mode, diagnostics)
+
+
+def _stream_timeline_waves(request: _TimelineRequest, diagnostics: EngineDiagnostics) -> Iterator[TimelineProgress]:
+    clock = time.perf_counter
+    scenario = request.scenario
+    checkpoint = request.checkpoint
+    until_wave = request.until_wave
+    started = clock()
+    cursor = _TimelineCursor(request.build, checkpoint)
+    timeline = [
+        (wave, cursor.advance(wave.index))
+        for wave in scenario.waves
+        if (checkpoint is None or wave.index >= checkpoint.wave) and (until_wave is None or wave.index < until_wave)
+    ]
+
+    replayed = clock()
+    diagnostics.add("replay", replayed - started)
+    result_cache = request.result_cache
+    cache_keys = _wave_cache_keys(request, timeline)
+    cached: List[WaveResult | None] = [
+        result_cache.get(key) if result_cache is not None and key is not None else None for key in cache_keys
+    ]
+    diagnostics.add("cache", clock() - replayed)
+    fresh = _fresh_wave_results(
+        request,
+        [(wave, runtime) for (wave, runtime), hit in zip(timeline, cached) if hit is None],
+    )
+
+    ledger = _EconomyLedger(scenario, request.build, checkpoint)
+    potential = combat = leaks = 0.0
+    runs_used = 0
+    converged = True
+    # Per-wave phase times are summed locally and reported once, also when the stream is closed early.
+    compute_s = economy_s = store_s = 0.0
+    computed_waves = 0
+    try:
+        for position, (wave, _) in enumerate(timeline):
+            result = cached[position]
+            started = clock()
+            if result is None:
+                result = next(fresh)
+                computed = clock()
+                compute_s += computed - started
+                computed_waves += 1
+                diagnostics.wave(wave.index, computed - started, cached=False)
+                if result_cache is not None and cache_keys[position] is not None:
+                    result_cache.put(cache_keys[position], result)
+                    store_s += clock() - computed
+            else:
+                diagnostics.wave(wave.index, 0.0, cached=True)
+            started = clock()
+            ledger.advance(wave)
+            economy_totals = ledger.totals()
+            economy_s += clock() - started
+            potential += result.potential_damage
+            combat += result.combat_damage
+            leaks += result.leaks
+
+            sampling = None
+            if request.adaptive is not None:
+                wave_sampling = result.sampling or {}
+                runs_used += int(wave_sampling.get("runs", 0))
+                converged = converged and bool(wave_sampling.get("converged"))
+                sampling = {
+                    **request.adaptive.to_dict(),
+                    "max_runs_per_wave": request.runs,
+                    "runs_used": runs_used,
+                    "converged": converged,
+                }
+
+            yield TimelineProgress(
+                wave_result=result,
+                completed=position + 1,
+                total_waves=len(timeline),
+                potential_damage=potential,
+                combat_damage=combat,
+                leaks=leaks,
+                economy_totals=economy_totals,
+                sampling=sampling,
             )
-        )
+    finally:
+        # Cancels pool tasks of waves not reached yet when the consumer (e.g. an SSE client) goes away.
+        fresh.close()
+        if computed_waves:
+            diagnostics.add(request.mode, compute_s, calls=computed_waves)
+        diagnostics.add("economy", economy_s, calls=len(diagnostics.waves))
+        if store_s:
+            diagnostics.add("cache", store_s, calls=0)
+
+
+def iter_timeline(
+    scenario: ScenarioDefinition | CompiledScenario,
+    build: BuildPlan,
+    dataset_version: str,
+    mode: str,
+    seed: int,
+    monte_carlo_runs: int,
+    engine: str = "scalar",
+    workers: int = 1,
+    stats_cache: TowerStatsCache | None = None,
+    result_cache: WaveResultCache | None = None,
+    sampling_target: SamplingTarget | None = None,
+    random_streams: str = "sequential",
+    antithetic: bool = False,
+    bulk_dt_s: float = DEFAULT_BULK_DT_S,
+    checkpoint: TimelineCheckpoint | None = None,
+    diagnostics: EngineDiagnostics | None = None,
+    distributions: bool = False,
+    histogram_bins: int = DEFAULT_HISTOGRAM_BINS,
+    until_wave: int | None = None,
+) -> Iterator[TimelineProgress]:
+    """Streams ``evaluate_timeline`` one wave at a time, in wave order.
+
+    Arguments are validated before the first wave is computed, so invalid input raises here
+    rather than on the first ``next()``. Each item carries the wave result plus totals
+    accumulated through that wave; the last item's totals equal the full evaluation's.
+    """
+    request = _timeline_request(
+        scenario,
+        build,
+        dataset_version,
+        mode,
+        seed,
+        monte_carlo_runs,
+        engine,
+        workers,
+        stats_cache,
+        result_cache,
+        sampling_target,
+        random_streams,
+        antithetic,
+        bulk_dt_s,
+        checkpoint,
+        diagnostics,
+        distributions,
+        histogram_bins,
+        until_wave,
+    )
+    return _stream_timeline(request)
 
-    economy_totals = _evaluate_economy_totals(scenario, build)
+
+def evaluate_timeline(
+    scenario: ScenarioDefinition | CompiledScenario,
+    build: BuildPlan,
+    dataset_version: str,
+    mode: str,
+    seed: int,
+    monte_carlo_runs: int,
+    engine: str = "scalar",
+    workers: int = 1,
+    stats_cache: TowerStatsCache | None = None,
+    result_cache: WaveResultCache | None = None,
+    sampling_target: SamplingTarget | None = None,
+    random_streams: str = "sequential",
+    antithetic: bool = False,
+    bulk_dt_s: float = DEFAULT_BULK_DT_S,
+    checkpoint: TimelineCheckpoint | None = None,
+    diagnostics: EngineDiagnostics | None = None,
+    distributions: bool = False,
+    histogram_bins: int = DEFAULT_HISTOGRAM_BINS,
+    until_wave: int | None = None,
+) -> EvaluationResult:
+    """Evaluates every wave of the scenario, or only the waves left after ``checkpoint``.
+
+    A resumed evaluation returns the remaining waves; its economy totals continue the
+    checkpoint's sums, so resuming from ``checkpoint_timeline`` ends with the full run's totals.
+    ``until_wave`` stops before that wave, so an evaluation up to ``checkpoint.wave`` followed by
+    one resumed from the checkpoint covers the full timeline.
+    Pass an ``EngineDiagnostics`` to receive per-phase and per-wave timings; every evaluation
+    is also added to the process-wide ``ENGINE_METRICS``. With ``distributions`` each
+    ``monte_carlo`` wave also reports P5/P50/P95 and a ``histogram_bins``-bin histogram of leaks and
+    clear time under ``distribution``, accumulated in constant memory per wave.
+    """
+    request = _timeline_request(
+        scenario,
+        build,
+        dataset_version,
+        mode,
+        seed,
+        monte_carlo_runs,
+        engine,
+        workers,
+        stats_cache,
+        result_cache,
+        sampling_target,
+        random_streams,
+        antithetic,
+        bulk_dt_s,
+        checkpoint,
+        diagnostics,
+        distributions,
+        histogram_bins,
+        until_wave,
+    )
+    wave_results: List[WaveResult] = []
+    last: TimelineProgress | None = None
+    for last in _stream_timeline(request):
+        wave_results.append(last.wave_result)
+    if last is not None:
+        economy_totals = last.economy_totals
+    else:
+        economy_totals = _EconomyLedger(request.scenario, build, checkpoint).totals()
 
     return EvaluationResult(
-        mode=normalized_mode,
-        scenario_id=scenario.id,
+        mode=request.mode,
+        scenario_id=request.scenario.id,
         dataset_version=dataset_version,
         seed=seed,
-        monte_carlo_runs=max(1, monte_carlo_runs if normalized_mode == "monte_carlo" else 1),
+        monte_carlo_runs=max(1, monte_carlo_runs if request.mode == "monte_carlo" else 1),
         wave_results=tuple(wave_results),
         economy_totals=economy_totals,
+        sampling=last.sampling if last is not None else None,
+    )
+
+
+def checkpoint_timeline(
+    scenario: ScenarioDefinition | CompiledScenario,
+    build: BuildPlan,
+    wave: int,
+    checkpoint: TimelineCheckpoint | None = None,
+) -> TimelineCheckpoint:
+    """Captures the timeline state at the start of ``wave`` without simulating any combat.
+
+    Build actions and economy are replayed through ``wave - 1`` (from ``checkpoint`` if given);
+    ``evaluate_timeline(..., checkpoint=...)`` then evaluates ``wave`` onwards.
+    """
+    compiled = compile_scenario(scenario)
+    if wave < 1:
+        raise ValueError(f"Checkpoint wave must be >= 1, got {wave}")
+    if checkpoint is not None:
+        if checkpoint.scenario_id != compiled.id:
+            raise ValueError(f"Checkpoint is for scenario {checkpoint.scenario_id!r}, not {compiled.id!r}")
+        if wave < checkpoint.wave:
+            raise ValueError(f"Cannot checkpoint wave {wave} before the resume wave {checkpoint.wave}")
+
+    cursor = _TimelineCursor(build, checkpoint)
+    runtime = cursor.advance(wave - 1)
+    ledger = _EconomyLedger(compiled, build, checkpoint)
+    for compiled_wave in compiled.waves:
+        if compiled_wave.index >= wave:
+            break
+        if checkpoint is None or compiled_wave.index >= checkpoint.wave:
+            ledger.advance(compiled_wave)
+    economy_state, economy_totals = ledger.checkpoint_state()
+    return TimelineCheckpoint(
+        scenario_id=compiled.id,
+        wave=wave,
+        towers=_checkpoint_towers(runtime),
+        active_global_modifiers=tuple(runtime.active_modifier_ids),
+        economy_state=economy_state,
+        economy_totals=economy_totals,
+        gold=checkpoint.gold if checkpoint is not None else None,
+        essence=checkpoint.essence if checkpoint is not None else None,
+        source=checkpoint.source if checkpoint is not None else "timeline",
     )
+
+
+def affordable_net_gold(
+    scenario: ScenarioDefinition | CompiledScenario,
+    build: BuildPlan,
+    checkpoint: TimelineCheckpoint | None = None,
+) -> float | None:
+    """Gold left after the last wave, or None if build spending outruns gold income at any wave.
+
+    Only the economy is replayed (baseline and worker gold against build costs); no combat runs.
+    With a ``checkpoint_timeline`` checkpoint of ``build`` the replay starts at its wave on top of
+    its economy sums, so the waves before it are assumed affordable and not checked again.
+    """
+    compiled = compile_scenario(scenario)
+    ledger = _EconomyLedger(compiled, build, checkpoint)
+    for wave in compiled.waves:
+        if checkpoint is not None and wave.index < checkpoint.wave:
+            continue
+        ledger.advance(wave)
+        if ledger.build_spend_gold_total > ledger.baseline_gold_total + ledger.worker_gold_income_total + EPS:
+            return None
+    return ledger.baseline_gold_total + ledger.worker_gold_income_total - ledger.build_spend_gold_total
+
+
+def checkpoint_from_live_snapshot(
+    scenario: ScenarioDefinition | CompiledScenario,
+    snapshot: LiveSnapshot,
+    build: BuildPlan,
+) -> TimelineCheckpoint:
+    """Checkpoints a live session at the snapshot's (current) wave.
+
+    The roster and active modifiers come from the snapshot's ``build`` when it reports them, and
+    otherwise from ``build`` as planned up to that wave. Worker/policy state follows the plan.
+    Economy sums start at zero, because the waves already played are observed rather than
+    simulated; the observed bank is kept in ``gold``/``essence``. Actions of ``build`` from the
+    snapshot wave on are applied on top when the checkpoint is evaluated.
+    """
+    compiled = compile_scenario(scenario)
+    planned = checkpoint_timeline(compiled, build, max(1, int(snapshot.wave)))
+    observed = snapshot.build if isinstance(snapshot.build, dict) else {}
+
+    towers = planned.towers
+    observed_towers = observed.get("towers")
+    if isinstance(observed_towers, list) and observed_towers:
+        try:
+            towers = tuple(TowerPlan.from_dict(item) for item in observed_towers)
+        except (ModelError, TypeError, ValueError) as exc:
+            raise ValueError(f"Invalid towers in live snapshot: {exc}") from exc
+    modifier_ids = planned.active_global_modifiers
+    observed_modifiers = observed.get("active_global_modifiers")
+    if isinstance(observed_modifiers, list):
+        modifier_ids = tuple(str(item) for item in observed_modifiers)
+
+    return replace(
+        planned,
+        towers=towers,
+        active_global_modifiers=modifier_ids,
+        economy_totals={},
+        gold=float(snapshot.gold),
+        essence=float(snapshot.essence),
+        source=f"live_{snapshot.source_mode}",
+    )
+
+
+def trace_combat_wave(
+    scenario: ScenarioDefinition | CompiledScenario,
+    build: BuildPlan,
+    wave_index: int,
+    seed: int,
+    random_streams: str = "sequential",
+    capacity: int = DEFAULT_TRACE_CAPACITY,
+    stats_cache: TowerStatsCache | None = None,
+) -> Tuple[WaveResult, CombatTrace]:
+    """Re-runs one ``combat`` wave with a ``CombatTrace`` attached.
+
+    Uses the same draws as ``evaluate_timeline(mode="combat")``, so combat damage, leaks and clear
+    time equal that wave's result; ``potential_damage`` is the simulated total rather than the
+    expected-model value. ``CombatTrace.breakdown()`` holds the true per-tower attribution.
+    """
+    compiled = compile_scenario(scenario)
+    if stats_cache is None:
+        stats_cache = compiled.stats_cache
+    normalized_streams = random_streams.lower().strip()
+    if normalized_streams not in RANDOM_STREAMS:
+        raise ValueError(f"Unsupported random_streams: {random_streams}")
+    wave = next((item for item in compiled.waves if item.index == wave_index), None)
+    if wave is None:
+        raise ValueError(f"Scenario {compiled.id!r} has no wave {wave_index}")
+
+    runtime = _TimelineCursor(build).advance(wave_index)
+    trace = CombatTrace(capacity)
+    result = _combat_wave(compiled, wave, runtime, seed, stats_cache, normalized_streams, trace=trace)
+    return result, trace
@@ -0,0 +1,316 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Dict, List, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - optional dependency in minimal installs
+    np = None
+
+from .compiled import CompiledScenario, CompiledWave, compile_scenario
+from .engine import RuntimeState, _TimelineCursor
+from .models import BuildPlan, ScenarioDefinition
+from .stats import ScenarioScales, TowerStatsCache
+
+
+EPS = 1e-9
+
+
+def expected_kernel_available() -> bool:
+    return np is not None
+
+
+def _require_numpy() -> None:
+    if np is None:
+        raise ValueError("The expected-mode kernel requires numpy. Install it with: pip install numpy")
+
+
+@dataclass(frozen=True, slots=True)
+class ExpectedBatchScores:
+    """Expected-mode wave metrics of a batch; every array is shaped (builds or scale points, waves)."""
+
+    wave_indices: Tuple[int, ...]
+    effective_dps: "np.ndarray"
+    potential_damage: "np.ndarray"
+    combat_damage: "np.ndarray"
+    clear_time_s: "np.ndarray"
+    leaks: "np.ndarray"
+
+    def __len__(self) -> int:
+        return int(self.effective_dps.shape[0])
+
+    def totals(self) -> Dict[str, "np.ndarray"]:
+        """Per-build totals, matching ``EvaluationResult.totals`` without the economy block."""
+        return {
+            "potential_damage": self.potential_damage.sum(axis=1),
+            "combat_damage": self.combat_damage.sum(axis=1),
+            "leaks": self.leaks.sum(axis=1),
+        }
+
+
+class ExpectedKernel:
+    """The expected-mode model of ``_expected_wave`` as a tower x enemy-kind matrix kernel.
+
+    Every distinct (tower id, level, active modifiers) configuration becomes one row. Its DPS
+    against each enemy kind is evaluated for all rows at once by broadcasting hit chance, armor
+    factor, barrier scale and the enemy-independent DoT DPS, then mixed per wave through a
+    (waves x kinds) spawn-weight matrix. A build's effective DPS in a wave is the sum of its
+    towers' rows, so scoring many builds is a gather and a ``bincount``. Rows are resolved
+    lazily and kept, so repeated scoring (optimizers) only pays for new tower configurations.
+
+    Results match ``evaluate_timeline(mode="expected")`` up to floating-point summation order.
+    """
+
+    def __init__(self, scenario: ScenarioDefinition | CompiledScenario, stats_cache: TowerStatsCache | None = None):
+        _require_numpy()
+        compiled = compile_scenario(scenario)
+        if stats_cache is None:
+            stats_cache = compiled.stats_cache
+        elif stats_cache.scenario is not compiled.definition or stats_cache.scales != compiled.scales:
+            raise ValueError("stats_cache was built for a different scenario")
+        self.scenario = compiled
+        self.stats_cache = stats_cache
+
+        waves = compiled.waves
+        self.wave_indices = tuple(wave.index for wave in waves)
+        self._weights = _spawn_weights(waves, len(compiled.enemies))
+        self._has_enemies = np.array([wave.total_enemies > 0 for wave in waves], dtype=bool)
+        self._durations = np.array([wave.duration_s for wave in waves], dtype=np.float64)
+        self._hp_pools = np.array([wave.enemy_hp_pool for wave in waves], dtype=np.float64)
+        self._unit_pools = np.array([wave.enemy_unit_pool for wave in waves], dtype=np.float64)
+        self._enemy_hp = np.array([enemy.hp for enemy in compiled.enemies], dtype=np.float64)
+        self._enemy_barrier = np.array([enemy.barrier for enemy in compiled.enemies], dtype=np.float64)
+
+        self._row_index: Dict[Tuple[str, int, Tuple[str, ...]], int] = {}
+        self._pending: List[Tuple[float, float, float, float, float, List[float], List[float]]] = []
+        # Row-major (rows, waves) mixed DPS of every resolved configuration.
+        self._mix = np.zeros((0, len(waves)), dtype=np.float64)
+
+    @property
+    def rows(self) -> int:
+        return len(self._row_index)
+
+    def _row(self, tower_id: str, level: int, modifier_ids: Tuple[str, ...]) -> int | None:
+        key = (tower_id, level, modifier_ids)
+        row = self._row_index.get(key)
+        if row is not None:
+            return row
+        compiled = self.stats_cache.resolve(tower_id, level, modifier_ids)
+        if compiled is None:
+            return None
+        stats = compiled.stats
+        self._pending.append(
+            (
+                stats.damage,
+                compiled.crit_expected,
+                stats.fire_rate,
+                stats.barrier_damage_multiplier,
+                compiled.dot_dps,
+                [strike.hit_chance for strike in compiled.strikes],
+                [strike.armor_factor for strike in compiled.strikes],
+            )
+        )
+        row = len(self._row_index)
+        self._row_index[key] = row
+        return row
+
+    def _flush(self) -> None:
+        if not self._pending:
+            return
+        damage, crit, fire_rate, barrier_multiplier, dot_dps, hit, armor = (
+            np.array(column, dtype=np.float64) for column in zip(*self._pending)
+        )
+        self._pending.clear()
+        kind_dps = _kind_dps(
+            damage, crit, fire_rate, barrier_multiplier, dot_dps, hit, armor, self._enemy_hp, self._enemy_barrier
+        )
+        self._mix = np.concatenate([self._mix, kind_dps @ self._weights.T])
+
+    def runtime_dps(self, runtime: RuntimeState) -> "np.ndarray":
+        """Effective DPS per wave of one runtime tower set, shaped (waves,)."""
+        modifier_ids = tuple(runtime.active_modifier_ids)
+        rows = [self._row(tower.tower_id, tower.level, modifier_ids) for tower in runtime.towers]
+        self._flush()
+        rows = [row for row in rows if row is not None]
+        if not rows:
+            return np.zeros(len(self.wave_indices), dtype=np.float64)
+        return self._mix[rows].sum(axis=0)
+
+    def score(self, builds: Sequence[BuildPlan]) -> ExpectedBatchScores:
+        """Scores every build plan over the scenario's waves, honouring their timeline actions."""
+        wave_count = len(self.wave_indices)
+        build_ids: List[int] = []
+        wave_ids: List[int] = []
+        row_ids: List[int] = []
+        for build_id, build in enumerate(builds):
+            cursor = _TimelineCursor(build)
+            for position, wave_index in enumerate(self.wave_indices):
+                runtime = cursor.advance(wave_index)
+                modifier_ids = tuple(runtime.active_modifier_ids)
+                for tower in runtime.towers:
+                    row = self._row(tower.tower_id, tower.level, modifier_ids)
+                    if row is None:
+                        continue
+                    build_ids.append(build_id)
+                    wave_ids.append(position)
+                    row_ids.append(row)
+        self._flush()
+
+        cells = len(builds) * wave_count
+        if row_ids:
+            build_array = np.array(build_ids, dtype=np.int64)
+            wave_array = np.array(wave_ids, dtype=np.int64)
+            contributions = self._mix[np.array(row_ids, dtype=np.int64), wave_array]
+            flat = np.bincount(build_array * wave_count + wave_array, weights=contributions, minlength=cells)
+        else:
+            flat = np.zeros(cells, dtype=np.float64)
+        effective_dps = flat.reshape(len(builds), wave_count)
+        return self._wave_metrics(effective_dps)
+
+    def _wave_metrics(self, effective_dps: "np.ndarray") -> ExpectedBatchScores:
+        return _wave_metrics(
+            self.wave_indices, effective_dps, self._has_enemies, self._durations, self._hp_pools, self._unit_pools
+        )
+
+
+def _spawn_weights(waves: Sequence[CompiledWave], kinds: int) -> "np.ndarray":
+    """(waves, kinds) share of every enemy kind in each wave's spawns."""
+    weights = np.zeros((len(waves), kinds), dtype=np.float64)
+    for position, wave in enumerate(waves):
+        if wave.total_enemies <= 0:
+            continue
+        for kind, count in wave.enemy_counts:
+            weights[position, kind] = count / float(wave.total_enemies)
+    return weights
+
+
+def _kind_dps(
+    damage: "np.ndarray",
+    crit: "np.ndarray",
+    fire_rate: "np.ndarray",
+    barrier_multiplier: "np.ndarray",
+    dot_dps: "np.ndarray",
+    hit: "np.ndarray",
+    armor: "np.ndarray",
+    enemy_hp: "np.ndarray",
+    enemy_barrier: "np.ndarray",
+) -> "np.ndarray":
+    """DPS of every row against every enemy kind, shaped like ``hit`` (..., rows, kinds).
+
+    Row columns are shaped (..., rows) and enemy columns (..., kinds); the operation order is the
+    scalar loop's, broadcast over all axes.
+    """
+    enemy_hp = enemy_hp[..., None, :]
+    enemy_barrier = enemy_barrier[..., None, :]
+    direct_per_shot = (damage * crit)[..., None] * hit * armor
+    kind_dps = direct_per_shot * fire_rate[..., None]
+    barrier_scale = (enemy_hp + enemy_barrier / np.maximum(EPS, barrier_multiplier)[..., None]) / np.maximum(
+        EPS, enemy_hp + enemy_barrier
+    )
+    kind_dps = np.where(enemy_barrier > 0.0, kind_dps * barrier_scale, kind_dps)
+    return kind_dps + dot_dps[..., None]
+
+
+def _wave_metrics(
+    wave_indices: Tuple[int, ...],
+    effective_dps: "np.ndarray",
+    has_enemies: "np.ndarray",
+    durations: "np.ndarray",
+    hp_pools: "np.ndarray",
+    unit_pools: "np.ndarray",
+) -> ExpectedBatchScores:
+    # Wave columns are (waves,) or, when enemies are scaled per batch row, (batch, waves).
+    effective_dps = np.where(has_enemies, effective_dps, 0.0)
+    potential = effective_dps * durations
+    combat = np.minimum(hp_pools, potential)
+    clear_time = np.minimum(durations, hp_pools / np.maximum(EPS, effective_dps))
+    leaks = np.maximum(0.0, hp_pools - potential) / np.maximum(EPS, unit_pools)
+    return ExpectedBatchScores(
+        wave_indices=wave_indices,
+        effective_dps=effective_dps,
+        potential_damage=potential,
+        combat_damage=combat,
+        clear_time_s=np.where(has_enemies, clear_time, 0.0),
+        leaks=np.where(has_enemies, leaks, 0.0),
+    )
+
+
+def score_builds_expected(
+    scenario: ScenarioDefinition | CompiledScenario,
+    builds: Sequence[BuildPlan],
+    stats_cache: TowerStatsCache | None = None,
+) -> ExpectedBatchScores:
+    """One-shot batched expected-mode scoring; keep an ``ExpectedKernel`` to reuse resolved rows."""
+    return ExpectedKernel(scenario, stats_cache).score(builds)
+
+
+def score_scales_expected(
+    scenario: ScenarioDefinition | CompiledScenario,
+    build: BuildPlan,
+    scales: Sequence[ScenarioScales],
+) -> ExpectedBatchScores:
+    """Expected-mode scores of one build under many scale overlays, one batch row per overlay.
+
+    The build's timeline is replayed once. Scales apply to base stats before upgrades and
+    modifiers, so every overlay resolves the build's tower configurations through its own scaled
+    stats cache; the DPS mix and wave metrics of all overlays then run as one array batch.
+    Results match ``evaluate_timeline(mode="expected")`` on ``scaled`` scenarios up to
+    floating-point summation order.
+    """
+    _require_numpy()
+    compiled = compile_scenario(scenario)
+    waves = compiled.waves
+    kinds = len(compiled.enemies)
+
+    configurations: Dict[Tuple[str, int, Tuple[str, ...]], int] = {}
+    placements: List[Tuple[int, int]] = []
+    cursor = _TimelineCursor(build)
+    for position, wave in enumerate(waves):
+        runtime = cursor.advance(wave.index)
+        modifier_ids = tuple(runtime.active_modifier_ids)
+        for tower in runtime.towers:
+            key = (tower.tower_id, tower.level, modifier_ids)
+            placements.append((configurations.setdefault(key, len(configurations)), position))
+    # (configurations, waves): how many towers of each configuration fight in each wave.
+    counts = np.zeros((len(configurations), len(waves)), dtype=np.float64)
+    for row, position in placements:
+        counts[row, position] += 1.0
+
+    points = len(scales)
+    rows = len(configurations)
+    damage, crit, fire_rate, barrier_multiplier, dot_dps = (np.zeros((points, rows)) for _ in range(5))
+    hit, armor = np.zeros((points, rows, kinds)), np.zeros((points, rows, kinds))
+    enemy_hp, enemy_barrier = np.zeros((points, kinds)), np.zeros((points, kinds))
+    hp_pools, unit_pools = np.zeros((points, len(waves))), np.zeros((points, len(waves)))
+    for point, overlay in enumerate(scales):
+        variant = compiled.scaled(overlay)
+        for (tower_id, level, modifier_ids), row in configurations.items():
+            resolved = variant.stats_cache.resolve(tower_id, level, modifier_ids)
+            if resolved is None:
+                continue
+            stats = resolved.stats
+            damage[point, row] = stats.damage
+            crit[point, row] = resolved.crit_expected
+            fire_rate[point, row] = stats.fire_rate
+            barrier_multiplier[point, row] = stats.barrier_damage_multiplier
+            dot_dps[point, row] = resolved.dot_dps
+            hit[point, row] = [strike.hit_chance for strike in resolved.strikes]
+            armor[point, row] = [strike.armor_factor for strike in resolved.strikes]
+        enemy_hp[point] = [enemy.hp for enemy in variant.enemies]
+        enemy_barrier[point] = [enemy.barrier for enemy in variant.enemies]
+        hp_pools[point] = [wave.enemy_hp_pool for wave in variant.waves]
+        unit_pools[point] = [wave.enemy_unit_pool for wave in variant.waves]
+
+    kind_dps = _kind_dps(damage, crit, fire_rate, barrier_multiplier, dot_dps, hit, armor, enemy_hp, enemy_barrier)
+    # (points, rows, waves) mixed DPS per configuration, weighted by the towers fighting each wave.
+    mix = kind_dps @ _spawn_weights(waves, kinds).T
+    effective_dps = (mix * counts[None, :, :]).sum(axis=1)
+    return _wave_metrics(
+        tuple(wave.index for wave in waves),
+        effective_dps,
+        np.array([wave.total_enemies > 0 for wave in waves], dtype=bool),
+        np.array([wave.duration_s for wave in waves], dtype=np.float64),
+        hp_pools,
+        unit_pools,
+    )
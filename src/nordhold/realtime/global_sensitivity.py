@@ -0,0 +1,226 @@
+from __future__ import annotations
+
+import math
+import random
+from typing import Any, Dict, List, Sequence, Tuple
+
+from .analytics import SENSITIVITY_PARAMETERS, grid_point_totals, random_streams_for, scales_for
+from .compiled import CompiledScenario, compile_scenario
+from .engine import DEFAULT_BULK_DT_S
+from .expected_kernel import expected_kernel_available, score_scales_expected
+from .models import BuildPlan, ScenarioDefinition
+from .parallel import map_ordered, normalize_workers
+from .sampling import SamplingTarget
+from .stats import ScenarioScales
+
+
+# "sobol": Saltelli sampling with first-order (Saltelli 2010) and total (Jansen) estimators,
+# N * (d + 2) evaluations. "morris": elementary-effects screening, r * (d + 1) evaluations.
+GSA_METHODS = ("sobol", "morris")
+GSA_METRICS = ("combat_damage", "potential_damage", "leaks")
+DEFAULT_FACTOR_BOUNDS = (0.8, 1.2)
+DEFAULT_MORRIS_LEVELS = 4
+MAX_GSA_EVALUATIONS = 20000
+
+
+def _factor_bounds(parameters: Dict[str, Sequence[float]] | None) -> List[Tuple[str, float, float]]:
+    if parameters is None:
+        parameters = {name: DEFAULT_FACTOR_BOUNDS for name in SENSITIVITY_PARAMETERS}
+    if not parameters:
+        raise ValueError("Global sensitivity needs at least one parameter")
+    bounds: List[Tuple[str, float, float]] = []
+    for name, values in parameters.items():
+        if name not in SENSITIVITY_PARAMETERS:
+            raise ValueError(f"Unsupported sensitivity parameter: {name}")
+        if len(values) != 2:
+            raise ValueError(f"Parameter {name} needs [low, high] bounds")
+        low, high = float(values[0]), float(values[1])
+        if not 0.0 <= low <= high:
+            raise ValueError(f"Parameter {name} bounds must satisfy 0 <= low <= high, got [{low}, {high}]")
+        bounds.append((name, low, high))
+    return bounds
+
+
+def _scales_at(bounds: Sequence[Tuple[str, float, float]], unit: Sequence[float]) -> ScenarioScales:
+    """Maps a point of the unit hypercube onto the factor bounds."""
+    return scales_for({name: low + (high - low) * u for (name, low, high), u in zip(bounds, unit)})
+
+
+def _mean(values: Sequence[float]) -> float:
+    return sum(values) / len(values) if values else 0.0
+
+
+def _sobol_plan(dimensions: int, samples: int, rng: random.Random) -> List[List[float]]:
+    """Saltelli design: rows of A, then B, then A with column i taken from B for every i."""
+    a = [[rng.random() for _ in range(dimensions)] for _ in range(samples)]
+    b = [[rng.random() for _ in range(dimensions)] for _ in range(samples)]
+    plan = a + b
+    for column in range(dimensions):
+        plan.extend(row_a[:column] + [row_b[column]] + row_a[column + 1 :] for row_a, row_b in zip(a, b))
+    return plan
+
+
+def _sobol_indices(names: Sequence[str], samples: int, outputs: Sequence[float]) -> Dict[str, Any]:
+    f_a = outputs[:samples]
+    f_b = outputs[samples : 2 * samples]
+    mean = _mean(outputs[: 2 * samples])
+    variance = _mean([(value - mean) ** 2 for value in outputs[: 2 * samples]])
+    indices: Dict[str, Dict[str, float]] = {}
+    for position, name in enumerate(names):
+        start = (2 + position) * samples
+        f_ab = outputs[start : start + samples]
+        if variance <= 0.0:
+            indices[name] = {"first_order": 0.0, "total": 0.0}
+            continue
+        # Centering f_B leaves the estimator unbiased and keeps a large output mean from swamping it.
+        first = _mean([(fb - mean) * (fab - fa) for fa, fb, fab in zip(f_a, f_b, f_ab)]) / variance
+        total = 0.5 * _mean([(fa - fab) ** 2 for fa, fab in zip(f_a, f_ab)]) / variance
+        indices[name] = {"first_order": first, "total": total}
+    return {"mean": mean, "variance": variance, "indices": indices}
+
+
+def _morris_plan(
+    dimensions: int,
+    trajectories: int,
+    levels: int,
+    rng: random.Random,
+) -> Tuple[List[List[float]], List[List[Tuple[int, float]]]]:
+    """One-at-a-time trajectories on a ``levels``-point grid with step ``levels / (2 (levels - 1))``.
+
+    Base coordinates are drawn from the grid values at most ``1 - delta`` and every factor moves
+    once by ``+delta``, so all points stay inside the unit cube for odd ``levels`` too.
+    Returns the points and, per trajectory, the (factor, step) taken between consecutive points.
+    """
+    delta = levels / (2.0 * (levels - 1))
+    bases = [level / (levels - 1) for level in range(levels) if level / (levels - 1) + delta <= 1.0 + 1e-12]
+    plan: List[List[float]] = []
+    steps: List[List[Tuple[int, float]]] = []
+    for _ in range(trajectories):
+        point = [rng.choice(bases) for _ in range(dimensions)]
+        order = list(range(dimensions))
+        rng.shuffle(order)
+        plan.append(list(point))
+        trajectory: List[Tuple[int, float]] = []
+        for factor in order:
+            point[factor] += delta
+            plan.append(list(point))
+            trajectory.append((factor, delta))
+        steps.append(trajectory)
+    return plan, steps
+
+
+def _morris_indices(
+    names: Sequence[str],
+    steps: Sequence[Sequence[Tuple[int, float]]],
+    outputs: Sequence[float],
+) -> Dict[str, Any]:
+    effects: List[List[float]] = [[] for _ in names]
+    position = 0
+    for trajectory in steps:
+        for factor, step in trajectory:
+            effects[factor].append((outputs[position + 1] - outputs[position]) / step)
+            position += 1
+        position += 1
+    indices: Dict[str, Dict[str, float]] = {}
+    for name, values in zip(names, effects):
+        mu = _mean(values)
+        sigma = math.sqrt(sum((value - mu) ** 2 for value in values) / (len(values) - 1)) if len(values) > 1 else 0.0
+        indices[name] = {"mu": mu, "mu_star": _mean([abs(value) for value in values]), "sigma": sigma}
+    return {"indices": indices}
+
+
+def global_sensitivity(
+    scenario: ScenarioDefinition | CompiledScenario,
+    dataset_version: str,
+    build: BuildPlan,
+    mode: str,
+    seed: int,
+    monte_carlo_runs: int,
+    method: str = "sobol",
+    parameters: Dict[str, Sequence[float]] | None = None,
+    samples: int = 256,
+    levels: int = DEFAULT_MORRIS_LEVELS,
+    metric: str = "combat_damage",
+    engine: str = "scalar",
+    workers: int = 1,
+    sampling_target: SamplingTarget | None = None,
+    variance_reduction: str = "none",
+    antithetic: bool = False,
+    bulk_dt_s: float = DEFAULT_BULK_DT_S,
+) -> Dict[str, Any]:
+    """Global sensitivity of a timeline total to tower/enemy scale factors drawn from ``parameters``.
+
+    ``parameters`` maps sensitivity parameter names to ``[low, high]`` factor bounds (all five at
+    ``DEFAULT_FACTOR_BOUNDS`` when omitted). ``sobol`` uses ``samples`` base rows and returns
+    first-order and total indices; ``morris`` runs ``samples`` trajectories on a ``levels`` grid and
+    returns mu, mu* and sigma of the elementary effects per unit of the normalized factor range.
+    Every point is a ``CompiledScenario.scaled`` variant of one compile evaluated with ``seed``.
+    Expected-mode points are scored as one ``ExpectedKernel`` batch when numpy is available (and
+    run in-process otherwise); other modes are spread over ``workers`` processes. The design is
+    drawn from ``seed``, so results are reproducible.
+    """
+    normalized_method = method.lower().strip()
+    if normalized_method not in GSA_METHODS:
+        raise ValueError(f"Unsupported global sensitivity method: {method}")
+    if metric not in GSA_METRICS:
+        raise ValueError(f"Unsupported global sensitivity metric: {metric}")
+    if samples < 2:
+        raise ValueError(f"samples must be >= 2, got {samples}")
+    if normalized_method == "morris" and levels < 2:
+        raise ValueError(f"levels must be >= 2, got {levels}")
+    random_streams = random_streams_for(variance_reduction)
+    bounds = _factor_bounds(parameters)
+    names = [name for name, _, _ in bounds]
+    dimensions = len(bounds)
+    evaluations = samples * (dimensions + 2) if normalized_method == "sobol" else samples * (dimensions + 1)
+    if evaluations > MAX_GSA_EVALUATIONS:
+        raise ValueError(f"Global sensitivity needs {evaluations} evaluations, more than {MAX_GSA_EVALUATIONS}")
+
+    rng = random.Random(seed)
+    steps: List[List[Tuple[int, float]]] = []
+    if normalized_method == "sobol":
+        plan = _sobol_plan(dimensions, samples, rng)
+    else:
+        plan, steps = _morris_plan(dimensions, samples, levels, rng)
+
+    compiled = compile_scenario(scenario)
+    normalized_mode = mode.lower().strip()
+    if normalized_mode == "expected" and expected_kernel_available():
+        scores = score_scales_expected(compiled, build, [_scales_at(bounds, unit) for unit in plan])
+        outputs = [float(value) for value in scores.totals()[metric]]
+    else:
+        options: Dict[str, Any] = {
+            "dataset_version": dataset_version,
+            "mode": mode,
+            "seed": seed,
+            "monte_carlo_runs": monte_carlo_runs,
+            "engine": engine,
+            "workers": 1,
+            "sampling_target": sampling_target,
+            "random_streams": random_streams,
+            "antithetic": antithetic,
+            "bulk_dt_s": bulk_dt_s,
+        }
+        # A process pool only pays off when a point costs more than shipping the scenario to a worker.
+        pool_workers = 1 if normalized_mode == "expected" else normalize_workers(workers)
+        totals = map_ordered(
+            grid_point_totals,
+            [(compiled, _scales_at(bounds, unit), build, options) for unit in plan],
+            pool_workers,
+        )
+        outputs = [float(item[metric]) for item in totals]
+
+    if normalized_method == "sobol":
+        summary = _sobol_indices(names, samples, outputs)
+    else:
+        summary = _morris_indices(names, steps, outputs)
+        summary["levels"] = levels
+    return {
+        "method": normalized_method,
+        "metric": metric,
+        "mode": normalized_mode,
+        "samples": samples,
+        "evaluations": len(outputs),
+        "parameters": [{"name": name, "low": low, "high": high} for name, low, high in bounds],
+        **summary,
+    }
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import math
 from dataclasses import asdict, dataclass, field
 from typing import Any, Dict, Iterable, List, Literal, Optional
 
@@ -48,6 +49,28 @@ def _to_int(value: Any, default: int = 0) -> int:
         return default
 
 
+def _checkpoint_number(section: str, key: str, value: Any) -> int | float:
+    # Checkpoints come back from clients; reject what the ledger could not restore instead of failing later.
+    if isinstance(value, bool) or not isinstance(value, (int, float, str)):
+        raise ModelError(f"Checkpoint {section}.{key} must be a number, got {value!r}")
+    try:
+        number = float(value)
+    except ValueError:
+        raise ModelError(f"Checkpoint {section}.{key} must be a number, got {value!r}") from None
+    if not math.isfinite(number):
+        raise ModelError(f"Checkpoint {section}.{key} must be finite, got {value!r}")
+    return value if isinstance(value, int) else number
+
+
+def _checkpoint_section(payload: Dict[str, Any], section: str) -> Dict[str, Any]:
+    value = payload.get(section, {})
+    if value is None:
+        return {}
+    if not isinstance(value, dict):
+        raise ModelError(f"Checkpoint {section} must be an object")
+    return value
+
+
 def normalize_economy_totals(payload: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
     source = payload if isinstance(payload, dict) else {}
     workers_source = source.get("workers", {})
@@ -481,6 +504,15 @@ class BuildPlan:
             actions=actions,
         )
 
+    def to_dict(self) -> Dict[str, Any]:
+        """The ``from_dict`` payload of this plan."""
+        return {
+            "scenario_id": self.scenario_id,
+            "towers": [{**asdict(tower), "focus_priorities": list(tower.focus_priorities)} for tower in self.towers],
+            "active_global_modifiers": list(self.active_global_modifiers),
+            "actions": [asdict(action) for action in self.actions],
+        }
+
 
 @dataclass(slots=True, frozen=True)
 class WaveResult:
@@ -492,6 +524,19 @@ class WaveResult:
     leaks: float
     enemy_hp_pool: float
     breakdown: Dict[str, float]
+    # Adaptive Monte Carlo only: runs used and confidence intervals of the sampled means.
+    sampling: Optional[Dict[str, Any]] = None
+    # Monte Carlo with distributions only: quantiles and histograms of leaks and clear time.
+    distribution: Optional[Dict[str, Any]] = None
+
+
+def _wave_result_payload(item: WaveResult) -> Dict[str, Any]:
+    payload = asdict(item)
+    if item.sampling is None:
+        payload.pop("sampling", None)
+    if item.distribution is None:
+        payload.pop("distribution", None)
+    return payload
 
 
 @dataclass(slots=True, frozen=True)
@@ -503,6 +548,7 @@ class EvaluationResult:
     monte_carlo_runs: int
     wave_results: tuple[WaveResult, ...]
     economy_totals: Dict[str, Any] = field(default_factory=dict)
+    sampling: Optional[Dict[str, Any]] = None
 
     @property
     def totals(self) -> Dict[str, Any]:
@@ -519,11 +565,101 @@ class EvaluationResult:
     def to_dict(self) -> Dict[str, Any]:
         payload = asdict(self)
         payload.pop("economy_totals", None)
-        payload["wave_results"] = [asdict(item) for item in self.wave_results]
+        if self.sampling is None:
+            payload.pop("sampling", None)
+        payload["wave_results"] = [_wave_result_payload(item) for item in self.wave_results]
         payload["totals"] = self.totals
         return _stabilize_numeric_payload(payload)
 
 
+@dataclass(slots=True, frozen=True)
+class TimelineProgress:
+    """One wave streamed by ``iter_timeline`` with totals accumulated through that wave."""
+
+    wave_result: WaveResult
+    completed: int
+    total_waves: int
+    potential_damage: float
+    combat_damage: float
+    leaks: float
+    economy_totals: Dict[str, Any] = field(default_factory=dict)
+    sampling: Optional[Dict[str, Any]] = None
+
+    @property
+    def totals(self) -> Dict[str, Any]:
+        return {
+            "potential_damage": self.potential_damage,
+            "combat_damage": self.combat_damage,
+            "leaks": self.leaks,
+            "economy": normalize_economy_totals(self.economy_totals),
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        payload: Dict[str, Any] = {
+            "wave_result": _wave_result_payload(self.wave_result),
+            "completed": self.completed,
+            "total_waves": self.total_waves,
+            "totals": self.totals,
+        }
+        if self.sampling is not None:
+            payload["sampling"] = self.sampling
+        return _stabilize_numeric_payload(payload)
+
+
+@dataclass(slots=True, frozen=True)
+class TimelineCheckpoint:
+    """Engine state at the start of ``wave``; evaluations resumed from it simulate only the waves left.
+
+    ``towers`` is the runtime roster in attack order (runs of identical towers are merged),
+    ``economy_state`` holds the worker/policy state and ``economy_totals`` the economy sums of the
+    waves before ``wave``. ``gold``/``essence`` are the bank observed by live checkpoints.
+    """
+
+    scenario_id: str
+    wave: int
+    towers: tuple[TowerPlan, ...]
+    active_global_modifiers: tuple[str, ...] = tuple()
+    economy_state: Dict[str, Any] = field(default_factory=dict)
+    economy_totals: Dict[str, Any] = field(default_factory=dict)
+    gold: Optional[float] = None
+    essence: Optional[float] = None
+    source: str = "timeline"
+
+    @classmethod
+    def from_dict(cls, payload: Dict[str, Any]) -> "TimelineCheckpoint":
+        wave = int(_require(payload, "wave"))
+        if wave < 1:
+            raise ModelError(f"Checkpoint wave must be >= 1, got {wave}")
+        gold = payload.get("gold")
+        essence = payload.get("essence")
+        return cls(
+            scenario_id=str(_require(payload, "scenario_id")),
+            wave=wave,
+            towers=tuple(TowerPlan.from_dict(item) for item in payload.get("towers", [])),
+            active_global_modifiers=tuple(str(item) for item in payload.get("active_global_modifiers", [])),
+            economy_state={
+                str(key): str(value) if key == "policy_id" else int(_checkpoint_number("economy_state", key, value))
+                for key, value in _checkpoint_section(payload, "economy_state").items()
+            },
+            economy_totals={
+                str(key): _checkpoint_number("economy_totals", key, value)
+                for key, value in _checkpoint_section(payload, "economy_totals").items()
+            },
+            gold=float(gold) if gold is not None else None,
+            essence=float(essence) if essence is not None else None,
+            source=str(payload.get("source", "timeline")),
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        # Not rounded like results: resumed totals must continue the exact running sums.
+        payload = asdict(self)
+        payload["towers"] = [
+            {**asdict(tower), "focus_priorities": list(tower.focus_priorities)} for tower in self.towers
+        ]
+        payload["active_global_modifiers"] = list(self.active_global_modifiers)
+        return payload
+
+
 @dataclass(slots=True, frozen=True)
 class ReplaySnapshot:
     timestamp: float
@@ -0,0 +1,420 @@
+from __future__ import annotations
+
+import itertools
+import random
+from typing import Any, Dict, List, Sequence, Tuple
+
+from .analytics import random_streams_for
+from .compiled import CompiledScenario, compile_scenario
+from .engine import DEFAULT_BULK_DT_S, affordable_net_gold, checkpoint_timeline, evaluate_timeline
+from .expected_kernel import ExpectedKernel, expected_kernel_available
+from .models import BuildAction, BuildPlan, ScenarioDefinition, TimelineCheckpoint
+from .parallel import map_ordered, normalize_workers
+from .sampling import SamplingTarget
+
+
+EPS = 1e-9
+
+# "beam" extends the best ``beam_width`` schedules one wave at a time; "genetic" evolves a
+# population of whole schedules. Both rank candidates with the expected model as a surrogate.
+OPTIMIZER_STRATEGIES = ("beam", "genetic")
+DEFAULT_BEAM_WIDTH = 8
+# Beam bundles of two or more purchases are formed only from this many best single purchases.
+DEFAULT_SHORTLIST = 4
+DEFAULT_POPULATION = 32
+DEFAULT_GENERATIONS = 20
+DEFAULT_MUTATION_RATE = 0.3
+MAX_BUILDS_PER_WAVE = 4
+DAMAGE_DIGITS = 6
+
+# One tower bought at the start of a wave, as (tower_id, level).
+Purchase = Tuple[str, int]
+# The purchases of every scenario wave, in wave order; the search space of both strategies.
+Schedule = Tuple[Tuple[Purchase, ...], ...]
+
+
+def _purchase_options(compiled: CompiledScenario, tower_ids: Sequence[str] | None) -> List[Purchase]:
+    if tower_ids is not None:
+        unknown = [tower_id for tower_id in tower_ids if compiled.tower(tower_id) is None]
+        if unknown:
+            raise ValueError(f"Unknown tower ids: {', '.join(unknown)}")
+    options: List[Purchase] = []
+    for tower in compiled.towers:
+        if tower_ids is not None and tower.id not in tower_ids:
+            continue
+        levels = sorted({0, *(upgrade.level for upgrade in tower.upgrade_levels)})
+        options.extend((tower.id, level) for level in levels)
+    if not options:
+        raise ValueError("Build optimizer needs at least one tower to place")
+    return options
+
+
+def _wave_bundles(options: Sequence[Purchase], max_builds_per_wave: int) -> List[Tuple[Purchase, ...]]:
+    """Every multiset of up to ``max_builds_per_wave`` purchases, the empty one first."""
+    bundles: List[Tuple[Purchase, ...]] = [()]
+    for size in range(1, max_builds_per_wave + 1):
+        bundles.extend(itertools.combinations_with_replacement(options, size))
+    return bundles
+
+
+def _random_bundle(options: Sequence[Purchase], max_builds_per_wave: int, rng: random.Random) -> Tuple[Purchase, ...]:
+    """A multiset of up to ``max_builds_per_wave`` purchases, in ``options`` order like ``_wave_bundles``."""
+    picks = sorted(rng.randrange(len(options)) for _ in range(rng.randint(0, max_builds_per_wave)))
+    return tuple(options[pick] for pick in picks)
+
+
+def _with_bundle(schedule: Schedule, position: int, bundle: Tuple[Purchase, ...]) -> Schedule:
+    return schedule[:position] + (bundle,) + schedule[position + 1 :]
+
+
+def _schedule_plan(base: BuildPlan, wave_indices: Sequence[int], schedule: Schedule) -> BuildPlan:
+    actions = list(base.actions)
+    for wave_index, bundle in zip(wave_indices, schedule):
+        for (tower_id, level), group in itertools.groupby(bundle):
+            actions.append(
+                BuildAction(
+                    wave=wave_index,
+                    at_s=0.0,
+                    type="build",
+                    target_id=tower_id,
+                    payload={"tower_id": tower_id, "count": len(list(group)), "level": level},
+                )
+            )
+    actions.sort(key=lambda action: (action.wave, action.at_s))
+    return BuildPlan(
+        scenario_id=base.scenario_id,
+        towers=base.towers,
+        active_global_modifiers=base.active_global_modifiers,
+        actions=tuple(actions),
+    )
+
+
+def _expected_totals(scenario: CompiledScenario, build: BuildPlan, dataset_version: str) -> Dict[str, Any]:
+    return evaluate_timeline(
+        scenario=scenario,
+        build=build,
+        dataset_version=dataset_version,
+        mode="expected",
+        seed=0,
+        monte_carlo_runs=1,
+    ).totals
+
+
+def _evaluate_finalist(scenario: CompiledScenario, build: BuildPlan, options: Dict[str, Any]) -> Dict[str, Any]:
+    return evaluate_timeline(scenario=scenario, build=build, **options).to_dict()
+
+
+class _SurrogateScorer:
+    """Scores schedules once each: affordability from the economy ledger, then expected totals.
+
+    Expected totals come from one ``ExpectedKernel`` batch per call when numpy is available,
+    otherwise from scalar expected evaluations spread over ``workers`` processes.
+    """
+
+    def __init__(self, compiled: CompiledScenario, dataset_version: str, base: BuildPlan, workers: int):
+        self.compiled = compiled
+        self.dataset_version = dataset_version
+        self.base = base
+        self.workers = workers
+        self.wave_indices = [wave.index for wave in compiled.waves]
+        self.kernel = ExpectedKernel(compiled) if expected_kernel_available() else None
+        # Schedule -> candidate, or None when the schedule is not affordable.
+        self.seen: Dict[Schedule, Dict[str, Any] | None] = {}
+
+    def score(
+        self,
+        schedules: Sequence[Schedule],
+        checkpoints: Sequence[TimelineCheckpoint | None] | None = None,
+    ) -> None:
+        """Scores new schedules; ``checkpoints[i]`` resumes the affordability check of ``schedules[i]``."""
+        resume = dict(zip(schedules, checkpoints if checkpoints is not None else itertools.repeat(None)))
+        pending: List[Tuple[Schedule, BuildPlan, float]] = []
+        for schedule, checkpoint in resume.items():
+            if schedule in self.seen:
+                continue
+            plan = _schedule_plan(self.base, self.wave_indices, schedule)
+            net_gold = affordable_net_gold(self.compiled, plan, checkpoint)
+            if net_gold is None:
+                self.seen[schedule] = None
+                continue
+            pending.append((schedule, plan, net_gold))
+        if not pending:
+            return
+
+        plans = [plan for _, plan, _ in pending]
+        if self.kernel is not None:
+            totals = self.kernel.score(plans).totals()
+            scores = zip(totals["combat_damage"].tolist(), totals["leaks"].tolist())
+        else:
+            results = map_ordered(
+                _expected_totals,
+                [(self.compiled, plan, self.dataset_version) for plan in plans],
+                self.workers,
+            )
+            scores = ((item["combat_damage"], item["leaks"]) for item in results)
+        for (schedule, plan, net_gold), (combat_damage, leaks) in zip(pending, scores):
+            self.seen[schedule] = {
+                "schedule": schedule,
+                "plan": plan,
+                "combat_damage": float(combat_damage),
+                "leaks": float(leaks),
+                "net_gold": net_gold,
+            }
+
+    def ranked(self, schedules: Sequence[Schedule] | None = None) -> List[Dict[str, Any]]:
+        """Affordable candidates, best first: most combat damage, fewest leaks, most gold left."""
+        pool = self.seen if schedules is None else {schedule: self.seen[schedule] for schedule in schedules}
+        candidates = [candidate for candidate in pool.values() if candidate is not None]
+        return sorted(candidates, key=_candidate_key)
+
+
+def _ranking_key(combat_damage: float, leaks: float, net_gold: float) -> Tuple[float, float, float]:
+    # Strong plans all deal the wave HP total; rounding keeps summation noise from outranking leaks.
+    return (-round(combat_damage, DAMAGE_DIGITS), leaks, -net_gold)
+
+
+def _candidate_key(candidate: Dict[str, Any]) -> Tuple[Any, ...]:
+    return (*_ranking_key(candidate["combat_damage"], candidate["leaks"], candidate["net_gold"]), candidate["schedule"])
+
+
+def _timeline_key(item: Dict[str, Any]) -> Tuple[float, float, float]:
+    totals = item["timeline"]["totals"]
+    return _ranking_key(totals["combat_damage"], totals["leaks"], totals["economy"]["net_gold"])
+
+
+def _shortlist(
+    scorer: _SurrogateScorer,
+    schedule: Schedule,
+    position: int,
+    options: Sequence[Purchase],
+    size: int,
+) -> set[Purchase]:
+    """The ``size`` scored single purchases worth bundling at ``position`` of ``schedule``.
+
+    Half are the best ranked; the rest add the most damage per gold spent, because several
+    cheap towers can beat any single expensive one.
+    """
+    current = scorer.seen[_with_bundle(schedule, position, ())]
+    ranked = scorer.ranked([_with_bundle(schedule, position, (option,)) for option in options])
+    chosen = [candidate["schedule"][position][0] for candidate in ranked[: (size + 1) // 2]]
+    if current is not None:
+        efficient = sorted(
+            ranked,
+            key=lambda candidate: (
+                -(candidate["combat_damage"] - current["combat_damage"])
+                / max(EPS, current["net_gold"] - candidate["net_gold"]),
+                candidate["schedule"],
+            ),
+        )
+        for candidate in efficient:
+            if len(chosen) >= size:
+                break
+            purchase = candidate["schedule"][position][0]
+            if purchase not in chosen:
+                chosen.append(purchase)
+    return set(chosen)
+
+
+def _beam_search(
+    scorer: _SurrogateScorer,
+    options: Sequence[Purchase],
+    max_builds_per_wave: int,
+    width: int,
+    shortlist: int,
+) -> None:
+    """Fills the schedule wave by wave, keeping the ``width`` best schedules.
+
+    Each beam schedule is extended with nothing or one purchase, and bundles of more purchases
+    are formed only from its ``_shortlist`` of single purchases, so a wave scores at most
+    width * (options + shortlist ** max_builds_per_wave) plans rather than every multiset.
+    Every beam schedule carries a checkpoint at its wave, so checking a candidate's economy
+    replays only the waves from there.
+    """
+    wave_count = len(scorer.wave_indices)
+    beam: List[Tuple[Schedule, TimelineCheckpoint | None]] = [(tuple(() for _ in range(wave_count)), None)]
+    singles = [()] + [(option,) for option in options]
+    for position in range(wave_count):
+        expanded: List[Schedule] = []
+        resume: Dict[Schedule, TimelineCheckpoint | None] = {}
+        for schedule, checkpoint in beam:
+            for bundle in singles:
+                extended = _with_bundle(schedule, position, bundle)
+                expanded.append(extended)
+                resume[extended] = checkpoint
+        scorer.score(expanded, [resume[schedule] for schedule in expanded])
+
+        if max_builds_per_wave > 1:
+            bundled: List[Schedule] = []
+            for schedule, checkpoint in beam:
+                best = _shortlist(scorer, schedule, position, options, shortlist)
+                # Shortlisted purchases stay in option order, so bundles are the canonical multisets.
+                for bundle in _wave_bundles([option for option in options if option in best], max_builds_per_wave):
+                    if len(bundle) > 1:
+                        extended = _with_bundle(schedule, position, bundle)
+                        bundled.append(extended)
+                        resume[extended] = checkpoint
+            scorer.score(bundled, [resume[schedule] for schedule in bundled])
+            expanded.extend(bundled)
+
+        survivors = scorer.ranked(expanded)[:width]
+        if not survivors or position + 1 == wave_count:
+            return
+        next_wave = scorer.wave_indices[position + 1]
+        beam = [
+            (
+                candidate["schedule"],
+                checkpoint_timeline(scorer.compiled, candidate["plan"], next_wave, resume[candidate["schedule"]]),
+            )
+            for candidate in survivors
+        ]
+
+
+def _genetic_search(
+    scorer: _SurrogateScorer,
+    options: Sequence[Purchase],
+    max_builds_per_wave: int,
+    population: int,
+    generations: int,
+    mutation_rate: float,
+    rng: random.Random,
+) -> None:
+    """Elitist generations with binary tournaments, per-wave uniform crossover and bundle mutation."""
+    wave_count = len(scorer.wave_indices)
+    # The empty schedule is always affordable, so selection never runs out of parents.
+    members: List[Schedule] = [tuple(() for _ in range(wave_count))]
+    members.extend(
+        tuple(_random_bundle(options, max_builds_per_wave, rng) for _ in range(wave_count)) for _ in range(population - 1)
+    )
+    elite = max(1, population // 8)
+    for _ in range(generations):
+        scorer.score(members)
+        parents = [candidate["schedule"] for candidate in scorer.ranked(members)]
+        children: List[Schedule] = parents[:elite]
+        while len(children) < population:
+            # Parents are ranked best first, so the lower of two random positions wins the tournament.
+            mother = parents[min(rng.randrange(len(parents)), rng.randrange(len(parents)))]
+            father = parents[min(rng.randrange(len(parents)), rng.randrange(len(parents)))]
+            children.append(
+                tuple(
+                    _random_bundle(options, max_builds_per_wave, rng)
+                    if rng.random() < mutation_rate
+                    else rng.choice((left, right))
+                    for left, right in zip(mother, father)
+                )
+            )
+        members = children
+    scorer.score(members)
+
+
+def optimize_build(
+    scenario: ScenarioDefinition | CompiledScenario,
+    dataset_version: str,
+    build: BuildPlan,
+    mode: str,
+    seed: int,
+    monte_carlo_runs: int,
+    strategy: str = "beam",
+    top_k: int = 5,
+    tower_ids: Sequence[str] | None = None,
+    max_builds_per_wave: int = 2,
+    beam_width: int = DEFAULT_BEAM_WIDTH,
+    shortlist: int = DEFAULT_SHORTLIST,
+    population: int = DEFAULT_POPULATION,
+    generations: int = DEFAULT_GENERATIONS,
+    mutation_rate: float = DEFAULT_MUTATION_RATE,
+    engine: str = "scalar",
+    workers: int = 1,
+    sampling_target: SamplingTarget | None = None,
+    variance_reduction: str = "none",
+    antithetic: bool = False,
+    bulk_dt_s: float = DEFAULT_BULK_DT_S,
+) -> Dict[str, Any]:
+    """Searches per-wave tower purchases added to ``build`` and returns the ``top_k`` plans.
+
+    Candidates add ``build`` actions (up to ``max_builds_per_wave`` towers from ``tower_ids``, at
+    any catalog level) to the waves of ``build``. Only build actions are searched: the economy
+    ledger prices builds (a tower bought at level L pays its upgrades up to L) but not
+    ``upgrade`` actions, so upgrading placed towers is out of scope. The beam strategy bundles
+    several towers of a wave only from a ``shortlist`` of its single purchases. A plan is kept
+    only if its build spend never exceeds the gold income of the economy ledger up to any wave;
+    its towers, modifiers and actions are kept as they are. The search ranks candidates with the expected model and the
+    finalists are then evaluated in ``mode`` over ``workers`` processes (and re-ranked by its
+    combat damage, leaks and net gold unless ``mode`` is ``expected``), returning each plan with
+    its timeline. Plans with equal combat damage rank by fewer leaks, then more gold left. The
+    genetic strategy draws from ``seed``; finalist seeds follow ``compare_builds``.
+    """
+    normalized_strategy = strategy.lower().strip()
+    if normalized_strategy not in OPTIMIZER_STRATEGIES:
+        raise ValueError(f"Unsupported optimizer strategy: {strategy}")
+    if top_k < 1:
+        raise ValueError(f"top_k must be >= 1, got {top_k}")
+    if not 1 <= max_builds_per_wave <= MAX_BUILDS_PER_WAVE:
+        raise ValueError(f"max_builds_per_wave must be between 1 and {MAX_BUILDS_PER_WAVE}, got {max_builds_per_wave}")
+    if beam_width < 1 or shortlist < 1:
+        raise ValueError(f"beam_width and shortlist must be >= 1, got {beam_width} and {shortlist}")
+    if population < 2 or generations < 0:
+        raise ValueError(f"population must be >= 2 and generations >= 0, got {population} and {generations}")
+    if not 0.0 <= mutation_rate <= 1.0:
+        raise ValueError(f"mutation_rate must be within [0, 1], got {mutation_rate}")
+    random_streams = random_streams_for(variance_reduction)
+
+    compiled = compile_scenario(scenario)
+    workers = normalize_workers(workers)
+    if affordable_net_gold(compiled, build) is None:
+        raise ValueError("The base build plan already spends more gold than the economy provides")
+    purchase_options = _purchase_options(compiled, tower_ids)
+    scorer = _SurrogateScorer(compiled, dataset_version, build, workers)
+    if normalized_strategy == "beam":
+        _beam_search(scorer, purchase_options, max_builds_per_wave, beam_width, shortlist)
+    else:
+        _genetic_search(
+            scorer, purchase_options, max_builds_per_wave, population, generations, mutation_rate, random.Random(seed)
+        )
+
+    finalists = scorer.ranked()[:top_k]
+    normalized_mode = mode.lower().strip()
+    options: Dict[str, Any] = {
+        "dataset_version": dataset_version,
+        "mode": mode,
+        "monte_carlo_runs": monte_carlo_runs,
+        "engine": engine,
+        "sampling_target": sampling_target,
+        "random_streams": random_streams,
+        "antithetic": antithetic,
+        "bulk_dt_s": bulk_dt_s,
+    }
+    # Expected finalists are cheap enough that shipping them to a pool would cost more.
+    timelines = map_ordered(
+        _evaluate_finalist,
+        [
+            (compiled, candidate["plan"], {**options, "seed": seed if random_streams == "counter" else seed + rank})
+            for rank, candidate in enumerate(finalists, start=1)
+        ],
+        1 if normalized_mode == "expected" else workers,
+    )
+
+    plans = [
+        {
+            "surrogate": {
+                "combat_damage": candidate["combat_damage"],
+                "leaks": candidate["leaks"],
+                "net_gold": candidate["net_gold"],
+            },
+            "build_plan": candidate["plan"].to_dict(),
+            "timeline": timeline,
+        }
+        for candidate, timeline in zip(finalists, timelines)
+    ]
+    if normalized_mode != "expected":
+        plans.sort(key=_timeline_key)
+    for rank, item in enumerate(plans, start=1):
+        item["rank"] = rank
+    affordable = sum(1 for candidate in scorer.seen.values() if candidate is not None)
+    return {
+        "strategy": normalized_strategy,
+        "mode": normalized_mode,
+        "surrogate": "expected_kernel" if scorer.kernel is not None else "expected",
+        "evaluated_plans": len(scorer.seen),
+        "affordable_plans": affordable,
+        "plans": plans,
+    }
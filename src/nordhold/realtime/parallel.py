@@ -0,0 +1,131 @@
+from __future__ import annotations
+
+import atexit
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+import threading
+from typing import Any, Callable, Dict, Iterator, Sequence, Tuple
+
+
+MAX_WORKERS = 64
+
+# One pool shared by every evaluation, sized to the largest worker count asked for so far.
+_EXECUTOR: ProcessPoolExecutor | None = None
+_EXECUTOR_WORKERS = 0
+_EXECUTORS_LOCK = threading.Lock()
+
+
+def normalize_workers(workers: int) -> int:
+    try:
+        value = int(workers)
+    except (TypeError, ValueError) as exc:
+        raise ValueError(f"Invalid workers value: {workers}") from exc
+    if value < 1:
+        raise ValueError(f"workers must be >= 1, got {value}")
+    return min(value, MAX_WORKERS)
+
+
+def get_executor(workers: int) -> ProcessPoolExecutor:
+    """Returns the shared process pool, grown to at least ``workers`` processes.
+
+    Growing replaces the pool; the old one finishes the tasks already submitted to it and exits.
+    """
+    global _EXECUTOR, _EXECUTOR_WORKERS
+    workers = normalize_workers(workers)
+    retired = None
+    with _EXECUTORS_LOCK:
+        if _EXECUTOR is None or _EXECUTOR_WORKERS < workers:
+            retired = _EXECUTOR
+            _EXECUTOR = ProcessPoolExecutor(max_workers=workers)
+            _EXECUTOR_WORKERS = workers
+        executor = _EXECUTOR
+    if retired is not None:
+        retired.shutdown(wait=False)
+    return executor
+
+
+def _discard_executor(executor: ProcessPoolExecutor) -> None:
+    global _EXECUTOR, _EXECUTOR_WORKERS
+    with _EXECUTORS_LOCK:
+        if _EXECUTOR is executor:
+            _EXECUTOR = None
+            _EXECUTOR_WORKERS = 0
+    executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _submit(workers: int, function: Callable[..., Any], task: Tuple[Any, ...]) -> Tuple[Future, ProcessPoolExecutor]:
+    while True:
+        executor = get_executor(workers)
+        try:
+            return executor.submit(function, *task), executor
+        except RuntimeError:
+            # Another evaluation grew the pool between the lookup and the submit; use the new one.
+            if executor is _EXECUTOR:
+                raise
+
+
+def shutdown_executors() -> None:
+    global _EXECUTOR, _EXECUTOR_WORKERS
+    with _EXECUTORS_LOCK:
+        executor = _EXECUTOR
+        _EXECUTOR = None
+        _EXECUTOR_WORKERS = 0
+    if executor is not None:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+atexit.register(shutdown_executors)
+
+
+def imap_ordered(
+    function: Callable[..., Any],
+    tasks: Sequence[Tuple[Any, ...]],
+    workers: int,
+) -> Iterator[Any]:
+    """Yields ``function(*task)`` results in task order as soon as each one is available.
+
+    With one worker (or a single task) tasks run lazily in-process. Otherwise at most ``workers``
+    tasks are in flight on the shared pool at a time, the next one submitted as soon as any
+    finishes, and closing the iterator early cancels the tasks that have not started yet.
+    """
+    workers = normalize_workers(workers)
+    if workers == 1 or len(tasks) <= 1:
+        for task in tasks:
+            yield function(*task)
+        return
+
+    running: Dict[Future, Tuple[int, ProcessPoolExecutor]] = {}
+    finished: Dict[int, Any] = {}
+    submitted = 0
+    try:
+        for position in range(len(tasks)):
+            while position not in finished:
+                while len(running) < workers and submitted < len(tasks):
+                    future, executor = _submit(workers, function, tasks[submitted])
+                    running[future] = (submitted, executor)
+                    submitted += 1
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    index, executor = running.pop(future)
+                    try:
+                        finished[index] = future.result()
+                    except BrokenProcessPool:
+                        _discard_executor(executor)
+                        raise
+            yield finished.pop(position)
+    finally:
+        for future in running:
+            future.cancel()
+
+
+def map_ordered(
+    function: Callable[..., Any],
+    tasks: Sequence[Tuple[Any, ...]],
+    workers: int,
+) -> List[Any]:
+    """Runs ``function(*task)`` for every task and returns results in task order.
+
+    With one worker (or a single task) everything runs in-process, so callers get the same
+    results either way and only pay for a pool when there is work to spread.
+    """
+    return list(imap_ordered(function, tasks, workers))
@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+
+# "sequential" draws from one random.Random per run; "counter" derives every draw from its
+# (seed, wave, run, tower slot, shot, draw) coordinates so builds share random numbers.
+RANDOM_STREAMS = ("sequential", "counter")
+
+_MASK64 = (1 << 64) - 1
+_GOLDEN_GAMMA = 0x9E3779B97F4A7C15
+_UNIT = 1.0 / float(1 << 53)
+
+
+def _mix64(value: int) -> int:
+    # SplitMix64 finalizer: a bijective avalanche over 64-bit integers.
+    value = (value + _GOLDEN_GAMMA) & _MASK64
+    value = ((value ^ (value >> 30)) * 0xBF58476D1CE4E5B9) & _MASK64
+    value = ((value ^ (value >> 27)) * 0x94D049BB133111EB) & _MASK64
+    return value ^ (value >> 31)
+
+
+def stream_key(*parts: int) -> int:
+    key = 0
+    for part in parts:
+        key = _mix64(key ^ (int(part) & _MASK64))
+    return key
+
+
+def counter_uniform(key: int) -> float:
+    """Maps a stream key to a uniform float in [0, 1) with 53 random bits."""
+    return (_mix64(key) >> 11) * _UNIT
+
+
+class ShotStream:
+    """Draws for one tower shot; exposes ``random()`` like ``random.Random``."""
+
+    __slots__ = ("_key", "_draw", "_mirror")
+
+    def __init__(self, key: int, mirror: bool):
+        self._key = key
+        self._draw = 0
+        self._mirror = mirror
+
+    def random(self) -> float:
+        value = counter_uniform(stream_key(self._key, self._draw))
+        self._draw += 1
+        return 1.0 - value if self._mirror else value
+
+
+class CounterStreams:
+    """Counter-based random numbers for one sampled run of one wave.
+
+    The draw for (tower slot, shot index, draw index) depends only on those coordinates and
+    the run, so two builds or two parameter factors evaluated with the same seed see the same
+    numbers for the same tower slot and shot (common random numbers). With ``antithetic`` runs
+    are paired: run ``2k + 1`` reuses the stream of run ``2k`` mirrored as ``1 - u``.
+    """
+
+    __slots__ = ("_key", "_mirror")
+
+    def __init__(self, seed: int, wave_index: int, run_index: int, antithetic: bool = False):
+        stream_run = run_index // 2 if antithetic else run_index
+        self._key = stream_key(seed, wave_index, stream_run)
+        self._mirror = antithetic and run_index % 2 == 1
+
+    def shot(self, slot: int, shot_index: int) -> ShotStream:
+        return ShotStream(stream_key(self._key, slot, shot_index), self._mirror)
@@ -0,0 +1,244 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+import math
+from statistics import NormalDist
+from typing import Any, Dict, List
+
+
+DEFAULT_CONFIDENCE = 0.95
+# Distribution outputs: reported quantiles, default histogram bin count and sketch accuracy.
+DISTRIBUTION_QUANTILES = (0.05, 0.5, 0.95)
+DEFAULT_HISTOGRAM_BINS = 20
+DEFAULT_SKETCH_ACCURACY = 0.01
+DEFAULT_SKETCH_MAX_BUCKETS = 2048
+
+
+@dataclass(slots=True)
+class RunningStats:
+    """Welford running mean/variance that can be merged across chunks (Chan et al.)."""
+
+    count: int = 0
+    mean: float = 0.0
+    m2: float = 0.0
+
+    def add(self, value: float) -> None:
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+
+    def merge(self, other: "RunningStats") -> None:
+        if other.count == 0:
+            return
+        if self.count == 0:
+            self.count, self.mean, self.m2 = other.count, other.mean, other.m2
+            return
+        total = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / total
+        self.m2 += other.m2 + (delta * delta) * self.count * other.count / total
+        self.count = total
+
+    @property
+    def variance(self) -> float:
+        if self.count < 2:
+            return 0.0
+        return max(0.0, self.m2 / (self.count - 1))
+
+    @property
+    def std_error(self) -> float:
+        if self.count < 2:
+            return math.inf
+        return math.sqrt(self.variance / self.count)
+
+    def ci_half_width(self, z: float) -> float:
+        return z * self.std_error
+
+
+@dataclass(slots=True)
+class QuantileSketch:
+    """Log-bucketed quantile sketch (DDSketch) with constant memory in the sample count.
+
+    Positive values land in bucket ``ceil(log_gamma(value))``; values at or below
+    ``min_value`` share one zero bucket. Quantiles are within ``relative_accuracy`` of a true
+    sample quantile and merging adds bucket counts, so chunked and single-pass sketches agree.
+    Past ``max_buckets`` the lowest buckets are collapsed, trading accuracy at the low end.
+    """
+
+    relative_accuracy: float = DEFAULT_SKETCH_ACCURACY
+    max_buckets: int = DEFAULT_SKETCH_MAX_BUCKETS
+    min_value: float = 1e-9
+    count: int = 0
+    zero_count: int = 0
+    minimum: float = math.inf
+    maximum: float = -math.inf
+    buckets: Dict[int, int] = field(default_factory=dict)
+
+    @property
+    def _log_gamma(self) -> float:
+        return math.log1p(2.0 * self.relative_accuracy / (1.0 - self.relative_accuracy))
+
+    def add(self, value: float) -> None:
+        self.count += 1
+        self.minimum = min(self.minimum, value)
+        self.maximum = max(self.maximum, value)
+        if value <= self.min_value:
+            self.zero_count += 1
+            return
+        key = math.ceil(math.log(value) / self._log_gamma)
+        self.buckets[key] = self.buckets.get(key, 0) + 1
+        if len(self.buckets) > self.max_buckets:
+            self._collapse()
+
+    def merge(self, other: "QuantileSketch") -> None:
+        if other.count == 0:
+            return
+        self.count += other.count
+        self.zero_count += other.zero_count
+        self.minimum = min(self.minimum, other.minimum)
+        self.maximum = max(self.maximum, other.maximum)
+        for key, bucket_count in other.buckets.items():
+            self.buckets[key] = self.buckets.get(key, 0) + bucket_count
+        if len(self.buckets) > self.max_buckets:
+            self._collapse()
+
+    def _collapse(self) -> None:
+        keys = sorted(self.buckets)
+        overflow = keys[: len(keys) - self.max_buckets + 1]
+        floor_key = keys[len(overflow)]
+        self.buckets[floor_key] += sum(self.buckets.pop(key) for key in overflow)
+
+    def quantile(self, q: float) -> float | None:
+        if self.count == 0:
+            return None
+        rank = q * (self.count - 1)
+        seen = self.zero_count
+        if rank < seen:
+            return self.minimum
+        log_gamma = self._log_gamma
+        for key in sorted(self.buckets):
+            seen += self.buckets[key]
+            if rank < seen:
+                # Bucket midpoint in relative terms: 2 * gamma^key / (gamma + 1).
+                value = 2.0 * math.exp(key * log_gamma) / (math.exp(log_gamma) + 1.0)
+                return min(self.maximum, max(self.minimum, value))
+        return self.maximum
+
+
+@dataclass(slots=True)
+class FixedHistogram:
+    """Equal-width bins over ``[low, high]``; values outside the range fall into the end bins."""
+
+    low: float
+    high: float
+    counts: List[int]
+
+    @classmethod
+    def empty(cls, low: float, high: float, bins: int) -> "FixedHistogram":
+        return cls(low=low, high=max(low, high), counts=[0] * max(1, bins))
+
+    def add(self, value: float) -> None:
+        bins = len(self.counts)
+        width = self.high - self.low
+        position = int((value - self.low) / width * bins) if width > 0.0 else 0
+        self.counts[min(bins - 1, max(0, position))] += 1
+
+    def merge(self, other: "FixedHistogram") -> None:
+        if (other.low, other.high, len(other.counts)) != (self.low, self.high, len(self.counts)):
+            raise ValueError("Cannot merge histograms with different bins")
+        for position, bin_count in enumerate(other.counts):
+            self.counts[position] += bin_count
+
+    @property
+    def edges(self) -> List[float]:
+        bins = len(self.counts)
+        width = (self.high - self.low) / bins
+        return [self.low + width * position for position in range(bins)] + [self.high]
+
+
+@dataclass(slots=True)
+class MetricDistribution:
+    """Quantile sketch plus fixed-bin histogram of one sampled metric."""
+
+    sketch: QuantileSketch
+    histogram: FixedHistogram
+
+    @classmethod
+    def empty(cls, low: float, high: float, bins: int) -> "MetricDistribution":
+        return cls(sketch=QuantileSketch(), histogram=FixedHistogram.empty(low, high, bins))
+
+    def add(self, value: float) -> None:
+        self.sketch.add(value)
+        self.histogram.add(value)
+
+    def merge(self, other: "MetricDistribution") -> None:
+        self.sketch.merge(other.sketch)
+        self.histogram.merge(other.histogram)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "count": self.sketch.count,
+            "min": self.sketch.minimum if self.sketch.count else None,
+            "max": self.sketch.maximum if self.sketch.count else None,
+            "quantiles": {f"p{round(q * 100):d}": self.sketch.quantile(q) for q in DISTRIBUTION_QUANTILES},
+            "histogram": {"edges": self.histogram.edges, "counts": list(self.histogram.counts)},
+        }
+
+
+@dataclass(slots=True, frozen=True)
+class SamplingTarget:
+    """Stopping rule for adaptive Monte Carlo.
+
+    A metric has converged once its confidence-interval half width is within
+    ``relative_error * |mean|`` or its full width is within ``ci_width``; either bound may be
+    omitted but not both.
+    """
+
+    relative_error: float | None = None
+    ci_width: float | None = None
+    confidence: float = DEFAULT_CONFIDENCE
+
+    def __post_init__(self) -> None:
+        if self.relative_error is None and self.ci_width is None:
+            raise ValueError("Adaptive sampling needs target_relative_error or target_ci_width")
+        if self.relative_error is not None and self.relative_error <= 0.0:
+            raise ValueError(f"target_relative_error must be > 0, got {self.relative_error}")
+        if self.ci_width is not None and self.ci_width <= 0.0:
+            raise ValueError(f"target_ci_width must be > 0, got {self.ci_width}")
+        if not 0.5 < self.confidence < 1.0:
+            raise ValueError(f"confidence must be in (0.5, 1), got {self.confidence}")
+
+    @property
+    def z(self) -> float:
+        return NormalDist().inv_cdf(0.5 + self.confidence / 2.0)
+
+    def metric_converged(self, stats: RunningStats) -> bool:
+        if stats.count < 2:
+            return False
+        half_width = stats.ci_half_width(self.z)
+        if self.relative_error is not None and half_width <= self.relative_error * abs(stats.mean):
+            return True
+        if self.ci_width is not None and 2.0 * half_width <= self.ci_width:
+            return True
+        return False
+
+    def describe(self, stats: RunningStats) -> Dict[str, Any]:
+        half_width = stats.ci_half_width(self.z) if stats.count >= 2 else None
+        relative = None
+        if half_width is not None and abs(stats.mean) > 0.0:
+            relative = half_width / abs(stats.mean)
+        return {
+            "mean": stats.mean,
+            "std_error": stats.std_error if stats.count >= 2 else None,
+            "ci_half_width": half_width,
+            "relative_error": relative,
+            "converged": self.metric_converged(stats),
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "target_relative_error": self.relative_error,
+            "target_ci_width": self.ci_width,
+            "confidence": self.confidence,
+        }
@@ -0,0 +1,232 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, replace
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+from .models import DotEffect, EnemyDefinition, Modifier, Ruleset, ScenarioDefinition, TowerDefinition, TowerStats
+
+
+EPS = 1e-9
+
+
+def _clamp(value: float, low: float, high: float) -> float:
+    return max(low, min(high, value))
+
+
+def _apply_modifier(value: float, modifier: Modifier) -> float:
+    if modifier.op == "add":
+        return value + modifier.value
+    if modifier.op == "mul":
+        return value * modifier.value
+    if modifier.op == "set":
+        return modifier.value
+    if modifier.op == "cap_max":
+        return min(value, modifier.value)
+    if modifier.op == "cap_min":
+        return max(value, modifier.value)
+    return value
+
+
+def _apply_stat_modifiers(base: TowerStats, modifiers: Iterable[Modifier]) -> TowerStats:
+    values: Dict[str, float] = {
+        "damage": base.damage,
+        "fire_rate": base.fire_rate,
+        "crit_chance": base.crit_chance,
+        "crit_multiplier": base.crit_multiplier,
+        "accuracy": base.accuracy,
+        "penetration": base.penetration,
+        "barrier_damage_multiplier": base.barrier_damage_multiplier,
+    }
+    for modifier in modifiers:
+        if modifier.target not in values:
+            continue
+        values[modifier.target] = _apply_modifier(values[modifier.target], modifier)
+
+    return TowerStats(
+        damage=max(0.0, values["damage"]),
+        fire_rate=max(EPS, values["fire_rate"]),
+        crit_chance=_clamp(values["crit_chance"], 0.0, 1.0),
+        crit_multiplier=max(1.0, values["crit_multiplier"]),
+        accuracy=_clamp(values["accuracy"], 0.0, 1.0),
+        penetration=_clamp(values["penetration"], 0.0, 1.0),
+        barrier_damage_multiplier=max(0.01, values["barrier_damage_multiplier"]),
+    )
+
+
+def _resolve_tower_stats(
+    tower: TowerDefinition,
+    level: int,
+    global_modifiers: Sequence[Modifier],
+) -> TowerStats:
+    modifiers: List[Modifier] = []
+    for upgrade in sorted(tower.upgrade_levels, key=lambda item: item.level):
+        if upgrade.level > level:
+            break
+        modifiers.extend(upgrade.modifiers)
+    modifiers.extend(global_modifiers)
+    return _apply_stat_modifiers(tower.base_stats, modifiers)
+
+
+def _hit_chance(stats: TowerStats, enemy: EnemyDefinition, rules: Ruleset) -> float:
+    if rules.accuracy_block_model == "multiplicative":
+        return _clamp(stats.accuracy * (1.0 - enemy.block), 0.0, 1.0)
+    # linear_subtract: block is neutralized by equal/greater accuracy.
+    return _clamp(1.0 - max(0.0, enemy.block - stats.accuracy), 0.0, 1.0)
+
+
+def _effective_armor(enemy: EnemyDefinition, stats: TowerStats, rules: Ruleset) -> float:
+    if rules.armor_penetration_model == "multiplicative":
+        return _clamp(enemy.armor * (1.0 - stats.penetration), 0.0, 1.0)
+    return _clamp(max(0.0, enemy.armor - stats.penetration), 0.0, 1.0)
+
+
+def _armor_damage_factor(enemy: EnemyDefinition, stats: TowerStats, rules: Ruleset) -> float:
+    return max(0.0, 1.0 - _effective_armor(enemy, stats, rules))
+
+
+def _crit_factor_expected(stats: TowerStats) -> float:
+    return (1.0 - stats.crit_chance) + (stats.crit_chance * stats.crit_multiplier)
+
+
+def _dot_expected_dps(dot: DotEffect, rules: Ruleset, global_damage_factor: float) -> float:
+    total_ticks = max(1, int(dot.duration_s / max(EPS, dot.tick_interval_s)))
+    total = dot.damage_per_tick * float(total_ticks)
+    if rules.dot_scaling_policy == "global":
+        total *= global_damage_factor
+    return total / max(EPS, dot.duration_s)
+
+
+@dataclass(frozen=True, slots=True)
+class ScenarioScales:
+    """Multiplicative overlay on a scenario's tower base stats and enemy stats (sensitivity sweeps).
+
+    Tower factors scale base stats before upgrades and modifiers; accuracy stays within [0, 1].
+    Enemy factors scale hp and armor (barrier is unchanged).
+    """
+
+    tower_damage: float = 1.0
+    tower_fire_rate: float = 1.0
+    tower_accuracy: float = 1.0
+    enemy_hp: float = 1.0
+    enemy_armor: float = 1.0
+
+    @property
+    def is_identity(self) -> bool:
+        return self == ScenarioScales()
+
+    def scale_tower(self, base: TowerStats) -> TowerStats:
+        return replace(
+            base,
+            damage=base.damage * self.tower_damage,
+            fire_rate=base.fire_rate * self.tower_fire_rate,
+            accuracy=_clamp(base.accuracy * self.tower_accuracy, 0.0, 1.0),
+        )
+
+    def scale_enemy(self, enemy: EnemyDefinition) -> EnemyDefinition:
+        if self.enemy_hp == 1.0 and self.enemy_armor == 1.0:
+            return enemy
+        return replace(enemy, hp=enemy.hp * self.enemy_hp, armor=enemy.armor * self.enemy_armor)
+
+
+@dataclass(frozen=True, slots=True)
+class StrikeFactors:
+    hit_chance: float
+    armor_factor: float
+
+
+@dataclass(frozen=True, slots=True)
+class CompiledTowerStats:
+    """Resolved stats of one tower level under one modifier set, with per-enemy factors."""
+
+    stats: TowerStats
+    crit_expected: float
+    # Indexed like the scenario's enemies dict (the interned enemy index of CompiledScenario).
+    strikes: Tuple[StrikeFactors, ...]
+    # Expected DPS of all the tower's DoT effects; it does not depend on the enemy.
+    dot_dps: float = 0.0
+
+
+class TowerStatsCache:
+    """Memoizes resolved tower stats for a single scenario.
+
+    Entries are keyed by (tower_id, level, active modifier ids). The ids stay an ordered tuple
+    rather than a set because modifiers are applied in activation order and ``set``/``cap_*``
+    ops do not commute with ``add``/``mul``. With ``scales`` tower base stats and the enemies
+    used for per-enemy factors are scaled by that overlay.
+    """
+
+    __slots__ = ("scenario", "scales", "_enemies", "_modifiers", "_compiled", "_upgrades", "hits", "misses")
+
+    def __init__(self, scenario: ScenarioDefinition, scales: ScenarioScales | None = None):
+        self.scenario = scenario
+        self.scales = scales
+        enemies = tuple(scenario.enemies.values())
+        self._enemies = tuple(scales.scale_enemy(enemy) for enemy in enemies) if scales is not None else enemies
+        self._modifiers: Dict[Tuple[str, ...], Tuple[Modifier, ...]] = {}
+        self._compiled: Dict[Tuple[str, int, Tuple[str, ...]], CompiledTowerStats] = {}
+        self._upgrades: Dict[str, Tuple[Tuple[int, Tuple[Modifier, ...]], ...]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def active_modifiers(self, modifier_ids: Sequence[str]) -> Tuple[Modifier, ...]:
+        key = tuple(modifier_ids)
+        modifiers = self._modifiers.get(key)
+        if modifiers is None:
+            resolved: List[Modifier] = []
+            for modifier_id in key:
+                modifier = self.scenario.global_modifiers.get(modifier_id)
+                if modifier is not None:
+                    resolved.extend(modifier.modifiers)
+            modifiers = tuple(resolved)
+            self._modifiers[key] = modifiers
+        return modifiers
+
+    def _upgrade_modifiers(self, tower: TowerDefinition, level: int) -> List[Modifier]:
+        upgrades = self._upgrades.get(tower.id)
+        if upgrades is None:
+            upgrades = tuple(
+                (upgrade.level, tuple(upgrade.modifiers))
+                for upgrade in sorted(tower.upgrade_levels, key=lambda item: item.level)
+            )
+            self._upgrades[tower.id] = upgrades
+        modifiers: List[Modifier] = []
+        for upgrade_level, upgrade_modifiers in upgrades:
+            if upgrade_level > level:
+                break
+            modifiers.extend(upgrade_modifiers)
+        return modifiers
+
+    def resolve(self, tower_id: str, level: int, modifier_ids: Sequence[str]) -> CompiledTowerStats | None:
+        key = (tower_id, level, tuple(modifier_ids))
+        compiled = self._compiled.get(key)
+        if compiled is not None:
+            self.hits += 1
+            return compiled
+
+        tower = self.scenario.towers.get(tower_id)
+        if tower is None:
+            return None
+        self.misses += 1
+        modifiers = self._upgrade_modifiers(tower, level)
+        modifiers.extend(self.active_modifiers(key[2]))
+        base_stats = self.scales.scale_tower(tower.base_stats) if self.scales is not None else tower.base_stats
+        stats = _apply_stat_modifiers(base_stats, modifiers)
+        rules = self.scenario.rules
+        crit_expected = _crit_factor_expected(stats)
+        dot_dps = 0.0
+        for dot in tower.dot_effects:
+            dot_dps += _dot_expected_dps(dot, rules, crit_expected)
+        compiled = CompiledTowerStats(
+            stats=stats,
+            crit_expected=crit_expected,
+            strikes=tuple(
+                StrikeFactors(
+                    hit_chance=_hit_chance(stats, enemy, rules),
+                    armor_factor=_armor_damage_factor(enemy, stats, rules),
+                )
+                for enemy in self._enemies
+            ),
+            dot_dps=dot_dps,
+        )
+        self._compiled[key] = compiled
+        return compiled
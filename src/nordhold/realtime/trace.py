@@ -0,0 +1,227 @@
+from __future__ import annotations
+
+from array import array
+import json
+from pathlib import Path
+import sys
+from typing import Any, Dict, Iterator, List, Sequence, Tuple
+
+
+# Event kinds, stored as one byte per record.
+ATTACK = 0
+HIT = 1
+MISS = 2
+CRIT = 3
+BARRIER_ABSORB = 4
+DOT_TICK = 5
+KILL = 6
+LEAK = 7
+EVENT_NAMES = ("attack", "hit", "miss", "crit", "barrier_absorb", "dot_tick", "kill", "leak")
+
+DEFAULT_TRACE_CAPACITY = 1 << 16
+_COLUMNAR_MAGIC = b"NHTRACE1\n"
+# (column, array typecode) in file order.
+_COLUMNS = (("t", "d"), ("kind", "B"), ("tower", "i"), ("slot", "i"), ("amount", "d"))
+
+
+class CombatTrace:
+    """Opt-in event trace of one combat wave, kept in a preallocated columnar ring buffer.
+
+    Records are (time, kind, tower index, enemy slot, amount) spread over fixed-size typed
+    arrays, so recording never allocates; once ``capacity`` records are written the oldest ones
+    are overwritten and counted in ``dropped``. Per-tower damage, kills and shots are accumulated
+    outside the ring and stay exact however many events were dropped.
+
+    ``amount`` is the damage dealt for ``hit``/``dot_tick``, the barrier absorbed for
+    ``barrier_absorb``, the multiplier for ``crit`` and the remaining hp + barrier for ``leak``.
+    Tower -1 marks events without a tower (leaks).
+    """
+
+    __slots__ = (
+        "capacity",
+        "wave",
+        "tower_names",
+        "enemy_ids",
+        "slot_kinds",
+        "damage_by_tower",
+        "kills_by_tower",
+        "shots_by_tower",
+        "_t",
+        "_kind",
+        "_tower",
+        "_slot",
+        "_amount",
+        "_written",
+    )
+
+    def __init__(self, capacity: int = DEFAULT_TRACE_CAPACITY):
+        if capacity < 1:
+            raise ValueError(f"Trace capacity must be >= 1, got {capacity}")
+        self.capacity = int(capacity)
+        self._t = array("d", bytes(8 * self.capacity))
+        self._kind = bytearray(self.capacity)
+        self._tower = array("i", bytes(4 * self.capacity))
+        self._slot = array("i", bytes(4 * self.capacity))
+        self._amount = array("d", bytes(8 * self.capacity))
+        self.begin(0, (), (), ())
+
+    def begin(
+        self,
+        wave: int,
+        tower_names: Sequence[str],
+        enemy_ids: Sequence[str],
+        slot_kinds: Sequence[int],
+    ) -> None:
+        """Starts a new wave: clears the ring and sizes the per-tower counters."""
+        self.wave = wave
+        self.tower_names: Tuple[str, ...] = tuple(tower_names)
+        self.enemy_ids: Tuple[str, ...] = tuple(enemy_ids)
+        self.slot_kinds = slot_kinds
+        self.damage_by_tower = [0.0] * len(self.tower_names)
+        self.kills_by_tower = [0] * len(self.tower_names)
+        self.shots_by_tower = [0] * len(self.tower_names)
+        self._written = 0
+
+    def record(self, at_s: float, kind: int, tower: int, slot: int, amount: float = 0.0) -> None:
+        position = self._written % self.capacity
+        self._written += 1
+        self._t[position] = at_s
+        self._kind[position] = kind
+        self._tower[position] = tower
+        self._slot[position] = slot
+        self._amount[position] = amount
+        if kind == HIT or kind == DOT_TICK:
+            self.damage_by_tower[tower] += amount
+        elif kind == KILL:
+            self.kills_by_tower[tower] += 1
+        elif kind == ATTACK:
+            self.shots_by_tower[tower] += 1
+
+    @property
+    def recorded(self) -> int:
+        """Events recorded since ``begin``, including overwritten ones."""
+        return self._written
+
+    @property
+    def dropped(self) -> int:
+        return max(0, self._written - self.capacity)
+
+    def __len__(self) -> int:
+        return min(self._written, self.capacity)
+
+    def _order(self) -> Iterator[int]:
+        start = self._written % self.capacity if self._written > self.capacity else 0
+        for offset in range(len(self)):
+            yield (start + offset) % self.capacity
+
+    def events(self) -> Iterator[Tuple[float, str, int, int, float]]:
+        """Retained events, oldest first, as (time, event name, tower index, enemy slot, amount)."""
+        for position in self._order():
+            yield (
+                self._t[position],
+                EVENT_NAMES[self._kind[position]],
+                self._tower[position],
+                self._slot[position],
+                self._amount[position],
+            )
+
+    def event_counts(self) -> Dict[str, int]:
+        """Retained events per event name."""
+        counts: List[int] = [0] * len(EVENT_NAMES)
+        for position in self._order():
+            counts[self._kind[position]] += 1
+        return {name: count for name, count in zip(EVENT_NAMES, counts)}
+
+    def breakdown(self) -> Dict[str, float]:
+        """True damage per tower name (direct hits plus the DoTs each tower applied)."""
+        breakdown: Dict[str, float] = {}
+        for name, damage in zip(self.tower_names, self.damage_by_tower):
+            breakdown[name] = breakdown.get(name, 0.0) + damage
+        return breakdown
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "wave": self.wave,
+            "recorded": self._written,
+            "retained": len(self),
+            "dropped": self.dropped,
+            "towers": [
+                {"index": index, "name": name, "damage": damage, "kills": kills, "shots": shots}
+                for index, (name, damage, kills, shots) in enumerate(
+                    zip(self.tower_names, self.damage_by_tower, self.kills_by_tower, self.shots_by_tower)
+                )
+            ],
+            "breakdown": self.breakdown(),
+        }
+
+    def _enemy_id(self, slot: int) -> str:
+        if 0 <= slot < len(self.slot_kinds):
+            return self.enemy_ids[self.slot_kinds[slot]]
+        return ""
+
+    def write_jsonl(self, path: Path) -> int:
+        """Writes one JSON object per retained event, like replay rows; returns the line count."""
+        lines = 0
+        with Path(path).open("w", encoding="utf-8") as handle:
+            for at_s, event, tower, slot, amount in self.events():
+                row = {
+                    "wave": self.wave,
+                    "t": at_s,
+                    "event": event,
+                    "tower_index": tower,
+                    "tower": self.tower_names[tower] if tower >= 0 else "",
+                    "slot": slot,
+                    "enemy_id": self._enemy_id(slot),
+                    "amount": amount,
+                }
+                handle.write(json.dumps(row, ensure_ascii=False, separators=(",", ":")))
+                handle.write("\n")
+                lines += 1
+        return lines
+
+    def write_columnar(self, path: Path) -> None:
+        """Writes the retained events as raw typed columns, oldest first, behind a JSON header."""
+        order = list(self._order())
+        columns = {
+            "t": array("d", (self._t[position] for position in order)),
+            "kind": array("B", (self._kind[position] for position in order)),
+            "tower": array("i", (self._tower[position] for position in order)),
+            "slot": array("i", (self._slot[position] for position in order)),
+            "amount": array("d", (self._amount[position] for position in order)),
+        }
+        header = {
+            "wave": self.wave,
+            "count": len(order),
+            "dropped": self.dropped,
+            "byteorder": sys.byteorder,
+            "columns": [[name, typecode, columns[name].itemsize] for name, typecode in _COLUMNS],
+            "event_names": list(EVENT_NAMES),
+            "tower_names": list(self.tower_names),
+            "enemy_ids": list(self.enemy_ids),
+            "slot_kinds": list(self.slot_kinds),
+        }
+        with Path(path).open("wb") as handle:
+            handle.write(_COLUMNAR_MAGIC)
+            handle.write(json.dumps(header, ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
+            handle.write(b"\n")
+            for name, _ in _COLUMNS:
+                columns[name].tofile(handle)
+
+
+def read_columnar_trace(path: Path) -> Dict[str, Any]:
+    """Loads a ``CombatTrace.write_columnar`` file as its header plus one typed array per column."""
+    with Path(path).open("rb") as handle:
+        if handle.readline() != _COLUMNAR_MAGIC:
+            raise ValueError(f"Not a combat trace file: {path}")
+        header = json.loads(handle.readline().decode("utf-8"))
+        count = int(header["count"])
+        columns: Dict[str, array] = {}
+        for name, typecode, itemsize in header["columns"]:
+            column = array(typecode)
+            if column.itemsize != itemsize:
+                raise ValueError(f"Column {name!r} was written with {itemsize}-byte items, this platform uses {column.itemsize}")
+            column.fromfile(handle, count)
+            if header["byteorder"] != sys.byteorder:
+                column.byteswap()
+            columns[name] = column
+    return {"header": header, "columns": columns}
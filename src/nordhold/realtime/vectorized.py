@@ -0,0 +1,515 @@
+from __future__ import annotations
+
+import heapq
+from dataclasses import dataclass
+from typing import Dict, List, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - optional dependency in minimal installs
+    np = None
+
+from .compiled import CompiledScenario, CompiledWave, compile_scenario
+from .models import EnemyDefinition, ScenarioDefinition, TowerDefinition, TowerStats, WaveDefinition
+from .rng import RANDOM_STREAMS, stream_key
+from .stats import CompiledTowerStats
+
+
+EPS = 1e-9
+DEFAULT_BATCH_RUNS = 512
+
+_ATTACK = 0
+_TICK = 1
+_LAST_TICK = 2
+_EXPIRED_TICK = 3
+
+
+def _seed_entropy(seed: int | Sequence[int]) -> List[int]:
+    parts = [seed] if isinstance(seed, int) else list(seed)
+    # SeedSequence only accepts non-negative entropy; API seeds may be negative.
+    return [int(part) & 0xFFFFFFFFFFFFFFFF for part in parts]
+
+
+def vectorized_available() -> bool:
+    return np is not None
+
+
+def _require_numpy() -> None:
+    if np is None:
+        raise ValueError("Vectorized engine requires numpy. Install it with: pip install numpy")
+
+
+def _mix64_array(values: "np.ndarray") -> "np.ndarray":
+    # rng._mix64 over uint64 arrays; numpy integer arithmetic wraps modulo 2**64.
+    values = values + np.uint64(0x9E3779B97F4A7C15)
+    values = (values ^ (values >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    values = (values ^ (values >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return values ^ (values >> np.uint64(31))
+
+
+class _CounterDraws:
+    """``rng.CounterStreams`` for a block of runs at once.
+
+    Produces, for every run, exactly the uniforms the scalar engine draws for a tower's n-th
+    shot, so a vectorized run with counter streams is the same sample as the scalar run with
+    the same seed and run index.
+    """
+
+    __slots__ = ("_tower_keys", "_mirror")
+
+    def __init__(
+        self,
+        seed: int,
+        wave_index: int,
+        run_indices: "np.ndarray",
+        tower_slots: Sequence[int],
+        antithetic: bool,
+    ):
+        stream_runs = run_indices // 2 if antithetic else run_indices
+        # CounterStreams key: stream_key(seed, wave, run); ShotStream key: stream_key(run key, slot, shot).
+        run_keys = _mix64_array(np.uint64(stream_key(seed, wave_index)) ^ stream_runs.astype(np.uint64))
+        run_prefix = _mix64_array(run_keys)
+        self._tower_keys = [_mix64_array(run_prefix ^ np.uint64(slot)) for slot in tower_slots]
+        self._mirror = (run_indices % 2 == 1) if antithetic else None
+
+    def shot(self, tower: int, shot_index: "np.ndarray") -> "np.ndarray":
+        """Hit and crit uniforms of each run's ``shot_index``-th shot of ``tower``, shaped (2, runs)."""
+        shot_prefix = _mix64_array(_mix64_array(self._tower_keys[tower] ^ shot_index.astype(np.uint64)))
+        draws = np.empty((2, shot_prefix.shape[0]), dtype=np.float64)
+        for draw in range(2):
+            bits = _mix64_array(_mix64_array(shot_prefix ^ np.uint64(draw))) >> np.uint64(11)
+            draws[draw] = bits.astype(np.float64) * (1.0 / float(1 << 53))
+        if self._mirror is not None:
+            draws[:, self._mirror] = 1.0 - draws[:, self._mirror]
+        return draws
+
+
+@dataclass(slots=True, frozen=True)
+class _BatchTower:
+    name: str
+    compiled: CompiledTowerStats
+    definition: TowerDefinition
+    focus_priorities: Tuple[str, ...]
+    focus_until_death: bool
+
+    @property
+    def stats(self) -> TowerStats:
+        return self.compiled.stats
+
+
+@dataclass(slots=True, frozen=True)
+class _DotInstance:
+    tower: int
+    effect: int
+    damage: float
+
+
+@dataclass(slots=True)
+class MonteCarloBatch:
+    """Per-run outputs of one wave simulated by the vectorized engine."""
+
+    wave: int
+    total_damage: "np.ndarray"
+    combat_damage: "np.ndarray"
+    effective_dps: "np.ndarray"
+    clear_time_s: "np.ndarray"
+    leaks: "np.ndarray"
+    enemy_hp_pool: float
+    breakdown: Dict[str, "np.ndarray"]
+
+    @property
+    def runs(self) -> int:
+        return int(self.total_damage.shape[0])
+
+
+def _build_schedule(
+    towers: Sequence[_BatchTower],
+    dot_effect_index: Dict[str, int],
+    rules_global_dot: bool,
+    crit_expected: Sequence[float],
+    duration_s: float,
+) -> Tuple[List[Tuple[int, int, float]], List[_DotInstance]]:
+    """Replays the scalar event heap without randomness.
+
+    Attack times never depend on sampled outcomes, and every DoT tick chain is anchored to an
+    attack, so the scalar engine's (time, serial) ordering can be reproduced once per wave by
+    assuming every DoT application succeeds. Runs where an application did not happen simply
+    carry no target for that instance.
+    """
+    events: List[Tuple[int, int, float]] = []
+    instances: List[_DotInstance] = []
+    heap: List[Tuple[float, int, int, int, float, float]] = []
+    serial = 0
+    for tower_index in range(len(towers)):
+        heapq.heappush(heap, (0.0, serial, _ATTACK, tower_index, 0.0, 0.0))
+        serial += 1
+
+    while heap:
+        at_s, _, kind, ref, end_s, tick_interval = heapq.heappop(heap)
+        if at_s > duration_s:
+            break
+
+        if kind == _ATTACK:
+            tower = towers[ref]
+            events.append((_ATTACK, ref, at_s))
+            for dot in tower.definition.dot_effects:
+                damage = dot.damage_per_tick
+                if rules_global_dot:
+                    damage *= crit_expected[ref]
+                instances.append(_DotInstance(tower=ref, effect=dot_effect_index[dot.id], damage=damage))
+                interval = max(EPS, dot.tick_interval_s)
+                heapq.heappush(heap, (at_s + interval, serial, _TICK, len(instances) - 1, at_s + dot.duration_s, interval))
+                serial += 1
+            heapq.heappush(heap, (at_s + (1.0 / max(EPS, tower.stats.fire_rate)), serial, _ATTACK, ref, 0.0, 0.0))
+            serial += 1
+            continue
+
+        if at_s > end_s + EPS:
+            events.append((_EXPIRED_TICK, ref, at_s))
+            continue
+        next_tick = at_s + tick_interval
+        if next_tick <= end_s + EPS:
+            events.append((_TICK, ref, at_s))
+            heapq.heappush(heap, (next_tick, serial, _TICK, ref, end_s, tick_interval))
+            serial += 1
+        else:
+            events.append((_LAST_TICK, ref, at_s))
+
+    return events, instances
+
+
+def _priority_scores(
+    priority: str,
+    now: float,
+    hp: "np.ndarray",
+    barrier: "np.ndarray",
+    spawn_time: "np.ndarray",
+    speed: "np.ndarray",
+    tag_scores: Dict[str, "np.ndarray"],
+) -> "np.ndarray":
+    if priority == "lowest_hp":
+        return -(hp + barrier)
+    if priority == "highest_hp":
+        return hp + barrier
+    if priority == "fastest":
+        return speed
+    if priority == "barrier":
+        return barrier
+    if priority in tag_scores:
+        return tag_scores[priority]
+    return np.maximum(0.0, now - spawn_time) * np.maximum(0.0, speed)
+
+
+def _tag_scores(enemy_defs: Sequence[EnemyDefinition]) -> Dict[str, "np.ndarray"]:
+    boss_elite = np.array([1.0 if "boss" in item.tags or "elite" in item.tags else 0.0 for item in enemy_defs])
+    healer = np.array([1.0 if "healer" in item.tags else 0.0 for item in enemy_defs])
+    summoner = np.array([1.0 if "summoner" in item.tags or "spawner" in item.tags else 0.0 for item in enemy_defs])
+    return {"boss_elite": boss_elite, "healer": healer, "summoner": summoner, "spawner": summoner}
+
+
+def _mark_cleared(
+    alive: "np.ndarray",
+    in_wave: "np.ndarray",
+    uncleared: "np.ndarray",
+    clear_time: "np.ndarray",
+    now: float,
+) -> "np.ndarray":
+    """Records ``now`` as the clear time of rows whose last in-wave enemy just died.
+
+    Enemies cannot die before they spawn, so a row with no in-wave enemy alive has no spawn left
+    within the wave either: the same rule as the scalar engine's ``_wave_cleared``.
+    """
+    cleared = uncleared & ~(alive & in_wave).any(axis=1)
+    clear_time[cleared] = now
+    return uncleared & ~cleared
+
+
+def simulate_wave_batch(
+    scenario: ScenarioDefinition | CompiledScenario,
+    wave: WaveDefinition | CompiledWave,
+    towers: Sequence[Tuple[TowerDefinition, CompiledTowerStats, Tuple[str, ...], bool]],
+    seed: int | Sequence[int],
+    runs: int,
+    batch_runs: int = DEFAULT_BATCH_RUNS,
+    antithetic: bool = False,
+    random_streams: str = "sequential",
+    run_start: int = 0,
+    tower_slots: Sequence[int] | None = None,
+) -> MonteCarloBatch:
+    """Simulates ``runs`` sampled combats of one wave at once.
+
+    Mirrors ``engine._simulate_wave_combat`` event for event, but keeps per-run state as
+    ``runs x enemies`` arrays. With ``random_streams="sequential"`` draws come from a NumPy
+    generator seeded with ``seed``, so individual runs differ from the scalar engine while
+    aggregates agree within sampling error. With ``"counter"`` the draws of runs
+    ``run_start .. run_start + runs - 1`` are the scalar engine's counter streams for the integer
+    ``seed``, keyed by each tower's ``tower_slots`` entry (its 1-based runtime position, the
+    default), so every run reproduces the scalar sample.
+    """
+    _require_numpy()
+    if random_streams not in RANDOM_STREAMS:
+        raise ValueError(f"Unsupported random_streams: {random_streams}")
+    if random_streams == "counter" and not isinstance(seed, int):
+        raise ValueError("Counter random streams need an integer seed")
+
+    compiled_scenario = compile_scenario(scenario)
+    if not isinstance(wave, CompiledWave):
+        wave = compiled_scenario.compile_wave(wave)
+    rules = compiled_scenario.definition.rules
+    runs = max(1, int(runs))
+    batch_runs = max(1, int(batch_runs))
+    duration_s = wave.duration_s
+
+    batch_towers = [
+        _BatchTower(
+            name=definition.name,
+            compiled=compiled,
+            definition=definition,
+            focus_priorities=tuple(priorities) or ("progress",),
+            focus_until_death=bool(sticky),
+        )
+        for definition, compiled, priorities, sticky in towers
+    ]
+
+    # Per-kind attribute tables are gathered into per-enemy arrays by interned enemy index.
+    kind_defs = compiled_scenario.enemies
+    kinds = np.array(wave.enemy_kinds, dtype=np.int64)
+    enemy_hp_pool = wave.spawned_hp_pool
+
+    enemy_count = int(kinds.shape[0])
+    spawn_time = np.array(wave.spawn_times, dtype=np.float64)
+    max_hp = np.array([item.hp for item in kind_defs], dtype=np.float64)[kinds]
+    max_barrier = np.array([item.barrier for item in kind_defs], dtype=np.float64)[kinds]
+    speed = np.array([item.speed for item in kind_defs], dtype=np.float64)[kinds]
+    regen = np.array([item.regen_per_s for item in kind_defs], dtype=np.float64)[kinds]
+    regen_mask = regen > EPS
+    has_regen = bool(regen_mask.any())
+    tag_scores = {key: values[kinds] for key, values in _tag_scores(kind_defs).items()}
+
+    hit_table = np.array(
+        [[strike.hit_chance for strike in tower.compiled.strikes] for tower in batch_towers],
+        dtype=np.float64,
+    ).reshape(len(batch_towers), len(kind_defs))[:, kinds]
+    armor_table = np.array(
+        [[strike.armor_factor for strike in tower.compiled.strikes] for tower in batch_towers],
+        dtype=np.float64,
+    ).reshape(len(batch_towers), len(kind_defs))[:, kinds]
+    crit_expected = [tower.compiled.crit_expected for tower in batch_towers]
+
+    dot_effect_index: Dict[str, int] = {}
+    for tower in batch_towers:
+        for dot in tower.definition.dot_effects:
+            dot_effect_index.setdefault(dot.id, len(dot_effect_index))
+    tower_dots = [
+        [(dot_effect_index[dot.id], max(1, dot.max_stacks)) for dot in tower.definition.dot_effects]
+        for tower in batch_towers
+    ]
+
+    events, instances = _build_schedule(
+        batch_towers,
+        dot_effect_index,
+        rules.dot_scaling_policy == "global",
+        crit_expected,
+        duration_s,
+    )
+    # Attack events spawn their DoT instances in schedule order; precompute the first id per attack.
+    attack_instance_start: List[int] = []
+    next_instance = 0
+    for kind, ref, _ in events:
+        if kind == _ATTACK:
+            attack_instance_start.append(next_instance)
+            next_instance += len(tower_dots[ref])
+
+    if tower_slots is None:
+        tower_slots = range(1, len(batch_towers) + 1)
+    elif len(tower_slots) != len(batch_towers):
+        raise ValueError("tower_slots must have one entry per tower")
+    rng = np.random.default_rng(_seed_entropy(seed)) if random_streams == "sequential" else None
+    total_chunks: List["np.ndarray"] = []
+    leak_chunks: List["np.ndarray"] = []
+    clear_chunks: List["np.ndarray"] = []
+    # Enemies spawning after the timer never count; the wave is cleared once the rest are dead.
+    in_wave = spawn_time <= duration_s
+
+    for chunk_start in range(0, runs, batch_runs):
+        size = min(batch_runs, runs - chunk_start)
+        rows = np.arange(size)
+        hp = np.broadcast_to(max_hp, (size, enemy_count)).copy()
+        barrier = np.broadcast_to(max_barrier, (size, enemy_count)).copy()
+        alive = np.ones((size, enemy_count), dtype=bool)
+        sticky = np.full((size, len(batch_towers)), -1, dtype=np.int64)
+        stacks = np.zeros((size, enemy_count, max(1, len(dot_effect_index))), dtype=np.int64)
+        instance_target = np.full((size, max(1, len(instances))), -1, dtype=np.int64)
+        total_damage = np.zeros(size, dtype=np.float64)
+        clear_time = np.full(size, duration_s, dtype=np.float64)
+        uncleared = np.ones(size, dtype=bool)
+        # Last event time each run has regenerated to; see the regeneration step below.
+        regen_at = np.zeros(size, dtype=np.float64)
+        counter_draws = None
+        if rng is None:
+            run_indices = np.arange(run_start + chunk_start, run_start + chunk_start + size, dtype=np.int64)
+            counter_draws = _CounterDraws(int(seed), wave.index, run_indices, tower_slots, antithetic)
+            shots_fired = np.zeros((len(batch_towers), size), dtype=np.int64)
+
+        now = 0.0
+        attack_no = 0
+        for kind, ref, at_s in events:
+            now = at_s
+            if has_regen and enemy_count:
+                # The scalar engine regenerates in steps between the events it processes, and a
+                # run only processes the DoT ticks of instances it applied (up to the first tick
+                # after the holder died). Stepping each run at exactly those events keeps the
+                # floating-point sums, and so kills near full HP, identical to the scalar engine.
+                if kind == _ATTACK:
+                    delta_s = now - regen_at
+                    regen_at.fill(now)
+                else:
+                    processed = instance_target[:, ref] >= 0
+                    delta_s = np.where(processed, now - regen_at, 0.0)
+                    regen_at = np.where(processed, now, regen_at)
+                if (delta_s > 0.0).any():
+                    healed = np.minimum(hp + regen * delta_s[:, None], max_hp)
+                    hp = np.where(alive & regen_mask, healed, hp)
+
+            if kind == _ATTACK:
+                tower = batch_towers[ref]
+                first_instance = attack_instance_start[attack_no]
+                attack_no += 1
+                if counter_draws is not None:
+                    draws = None
+                elif antithetic:
+                    # Rows (2k, 2k + 1) form antithetic pairs: the odd row sees 1 - u.
+                    draws = np.empty((2, size))
+                    draws[:, 0::2] = rng.random((2, (size + 1) // 2))
+                    draws[:, 1::2] = 1.0 - draws[:, 0 : size - 1 : 2]
+                else:
+                    draws = rng.random((2, size))
+                if not enemy_count:
+                    continue
+
+                candidates = alive & (now >= spawn_time)
+                target = np.full(size, -1, dtype=np.int64)
+                pending = np.ones(size, dtype=bool)
+                if tower.focus_until_death:
+                    held = sticky[:, ref]
+                    held_valid = (held >= 0) & candidates[rows, np.maximum(held, 0)]
+                    target = np.where(held_valid, held, target)
+                    pending = ~held_valid
+
+                mask = candidates & pending[:, None]
+                for priority in tower.focus_priorities:
+                    scores = np.broadcast_to(
+                        _priority_scores(priority, now, hp, barrier, spawn_time, speed, tag_scores),
+                        (size, enemy_count),
+                    )
+                    masked = np.where(mask, scores, -np.inf)
+                    best = masked.max(axis=1)
+                    mask = mask & (masked == best[:, None])
+                chosen = mask.any(axis=1)
+                picked = np.argmax(mask, axis=1)
+                target = np.where(chosen, picked, target)
+                if tower.focus_until_death:
+                    sticky[:, ref] = np.where(chosen, picked, sticky[:, ref])
+
+                engaged = target >= 0
+                if not engaged.any():
+                    continue
+                safe_target = np.maximum(target, 0)
+                if counter_draws is not None:
+                    # Like the scalar engine, only shots with a target advance the shot counter.
+                    draws = counter_draws.shot(ref, shots_fired[ref])
+                    shots_fired[ref] += engaged
+
+                stats = tower.stats
+                hit = engaged & ~(draws[0] > hit_table[ref][safe_target])
+                critical = np.where(draws[1] < stats.crit_chance, stats.crit_multiplier, 1.0)
+                direct = stats.damage * critical
+                armor_factor = armor_table[ref][safe_target]
+                hp_target = hp[rows, safe_target]
+                barrier_target = barrier[rows, safe_target]
+
+                shielded = barrier_target > EPS
+                barrier_factor = armor_factor if rules.barrier_inherits_armor else 1.0
+                barrier_damage = direct * stats.barrier_damage_multiplier * barrier_factor
+                absorbed = np.where(shielded, np.minimum(barrier_target, barrier_damage), 0.0)
+                overflow = np.maximum(0.0, barrier_damage - absorbed)
+                hp_damage = np.where(shielded, np.where(overflow > EPS, overflow * armor_factor, 0.0), direct * armor_factor)
+                dealt = np.minimum(hp_target, hp_damage)
+
+                new_barrier = np.where(hit, barrier_target - absorbed, barrier_target)
+                new_hp = np.where(hit, hp_target - dealt, hp_target)
+                total_damage += np.where(hit, absorbed + dealt, 0.0)
+                killed = hit & (new_hp <= EPS) & (new_barrier <= EPS)
+
+                hit_rows = rows[hit]
+                hp[hit_rows, safe_target[hit]] = new_hp[hit]
+                barrier[hit_rows, safe_target[hit]] = new_barrier[hit]
+                alive[rows[killed], safe_target[killed]] = False
+                if killed.any():
+                    uncleared = _mark_cleared(alive, in_wave, uncleared, clear_time, now)
+
+                for offset, (effect, cap) in enumerate(tower_dots[ref]):
+                    applied = engaged & (stacks[rows, safe_target, effect] < cap)
+                    stacks[rows[applied], safe_target[applied], effect] += 1
+                    instance_target[:, first_instance + offset] = np.where(applied, target, -1)
+                continue
+
+            instance = instances[ref]
+            holder = instance_target[:, ref]
+            active = holder >= 0
+            if not active.any():
+                continue
+            safe_holder = np.maximum(holder, 0)
+            live = alive[rows, safe_holder]
+            # As in the scalar engine, a tick that finds its holder dead ends the chain.
+            holder = np.where(active & ~live, -1, holder)
+            instance_target[:, ref] = holder
+            active &= live
+            if not active.any():
+                continue
+
+            if kind == _EXPIRED_TICK:
+                stacks[rows[active], safe_holder[active], instance.effect] -= 1
+                instance_target[:, ref] = np.where(active, -1, holder)
+                continue
+
+            hp_holder = hp[rows, safe_holder]
+            dealt = np.where(active, np.minimum(hp_holder, instance.damage), 0.0)
+            new_hp = hp_holder - dealt
+            total_damage += dealt
+            hp[rows[active], safe_holder[active]] = new_hp[active]
+            killed = active & (new_hp <= EPS) & (barrier[rows, safe_holder] <= EPS)
+            if killed.any():
+                alive[rows[killed], safe_holder[killed]] = False
+                stacks[rows[killed], safe_holder[killed], :] = 0
+                uncleared = _mark_cleared(alive, in_wave, uncleared, clear_time, now)
+            if kind == _LAST_TICK:
+                finished = active & ~killed
+                stacks[rows[finished], safe_holder[finished], instance.effect] -= 1
+                instance_target[:, ref] = np.where(active, -1, holder)
+            else:
+                instance_target[:, ref] = np.where(killed, -1, holder)
+
+        total_chunks.append(total_damage)
+        leak_chunks.append((alive & in_wave).sum(axis=1).astype(np.float64))
+        clear_chunks.append(clear_time)
+
+    total = np.concatenate(total_chunks) if total_chunks else np.zeros(runs)
+    leaks = np.concatenate(leak_chunks) if leak_chunks else np.zeros(runs)
+    clear_times = np.concatenate(clear_chunks) if clear_chunks else np.full(runs, duration_s)
+    breakdown: Dict[str, "np.ndarray"] = {}
+    if batch_towers:
+        share = total / float(len(batch_towers))
+        for tower in batch_towers:
+            breakdown[tower.name] = breakdown.get(tower.name, np.zeros(runs)) + share
+
+    return MonteCarloBatch(
+        wave=wave.index,
+        total_damage=total,
+        combat_damage=np.minimum(enemy_hp_pool, total),
+        effective_dps=total / max(EPS, duration_s),
+        clear_time_s=clear_times,
+        leaks=leaks,
+        enemy_hp_pool=enemy_hp_pool,
+        breakdown=breakdown,
+    )
@@ -24,9 +24,16 @@ class ApiContractTests(unittest.TestCase):
             "/api/v1/events",
             "/api/v1/replay/import",
             "/api/v1/timeline/evaluate",
+            "/api/v1/timeline/evaluate/stream",
+            "/api/v1/timeline/checkpoint",
             "/api/v1/analytics/compare",
             "/api/v1/analytics/sensitivity",
+            "/api/v1/analytics/sensitivity/grid",
+            "/api/v1/analytics/sensitivity/global",
+            "/api/v1/analytics/optimize",
             "/api/v1/analytics/forecast",
+            "/api/v1/cache/stats",
+            "/api/v1/metrics",
         }
         self.assertTrue(expected.issubset(paths))
 
@@ -220,6 +227,141 @@ class ApiContractTests(unittest.TestCase):
             },
         )
 
+    def test_timeline_stream_emits_one_event_per_wave(self) -> None:
+        try:
+            from fastapi.testclient import TestClient
+            from nordhold import api as api_module
+        except Exception as exc:  # pragma: no cover
+            self.skipTest(f"FastAPI stack is not importable in this environment: {exc}")
+            return
+
+        client = TestClient(api_module.app)
+        body = {
+            "mode": "expected",
+            "use_cache": False,
+            "build_plan": {
+                "scenario_id": "normal_baseline",
+                "towers": [{"tower_id": "arrow_tower", "count": 1, "level": 1}],
+            },
+        }
+        response = client.post("/api/v1/timeline/evaluate/stream", json=body)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers.get("content-type", "").split(";")[0], "text/event-stream")
+        events = [block.split("\n", 1)[0] for block in response.text.strip().split("\n\n")]
+        full = client.post("/api/v1/timeline/evaluate", json=body).json()["result"]
+        self.assertEqual(events[0], "event: start")
+        self.assertEqual(events[1:-1], ["event: wave"] * len(full["wave_results"]))
+        self.assertEqual(events[-1], "event: done")
+        self.assertIn(f'"combat_damage":{full["totals"]["combat_damage"]}', response.text.rsplit("event: done", 1)[1])
+
+        body["mode"] = "unknown"
+        self.assertEqual(client.post("/api/v1/timeline/evaluate/stream", json=body).status_code, 422)
+
+    def test_timeline_resumes_from_checkpoint_payload(self) -> None:
+        try:
+            from fastapi.testclient import TestClient
+            from nordhold import api as api_module
+        except Exception as exc:  # pragma: no cover
+            self.skipTest(f"FastAPI stack is not importable in this environment: {exc}")
+            return
+
+        client = TestClient(api_module.app)
+        build_plan = {
+            "scenario_id": "normal_baseline",
+            "towers": [{"tower_id": "arrow_tower", "count": 1, "level": 1}],
+            "actions": [{"wave": 2, "type": "build", "target_id": "frost_tower"}],
+        }
+        response = client.post("/api/v1/timeline/checkpoint", json={"wave": 2, "build_plan": build_plan})
+        self.assertEqual(response.status_code, 200)
+        checkpoint = response.json()["checkpoint"]
+        self.assertEqual(checkpoint["wave"], 2)
+
+        body = {"mode": "expected", "use_cache": False, "build_plan": build_plan}
+        full = client.post("/api/v1/timeline/evaluate", json=body).json()["result"]
+        resumed = client.post("/api/v1/timeline/evaluate", json={**body, "checkpoint": checkpoint}).json()
+        self.assertEqual(resumed["result"]["wave_results"], full["wave_results"][1:])
+        self.assertEqual(resumed["result"]["totals"]["economy"], full["totals"]["economy"])
+        self.assertEqual(resumed["resumed_from"]["wave"], 2)
+
+        both = {**body, "checkpoint": checkpoint, "resume_from_live": True}
+        self.assertEqual(client.post("/api/v1/timeline/evaluate", json=both).status_code, 400)
+        foreign = {**body, "checkpoint": {**checkpoint, "scenario_id": "other"}}
+        self.assertEqual(client.post("/api/v1/timeline/evaluate", json=foreign).status_code, 400)
+        for economy_state in ({"workers_gold": None}, {"build_count": "many"}, ["workers_gold"]):
+            malformed = {**body, "checkpoint": {**checkpoint, "economy_state": economy_state}}
+            response = client.post("/api/v1/timeline/evaluate", json=malformed)
+            self.assertEqual(response.status_code, 400, economy_state)
+        malformed = {**body, "checkpoint": {**checkpoint, "economy_totals": {"baseline_gold": "nan"}}}
+        self.assertEqual(client.post("/api/v1/timeline/evaluate", json=malformed).status_code, 400)
+
+    def test_timeline_diagnostics_and_metrics_endpoint(self) -> None:
+        try:
+            from fastapi.testclient import TestClient
+            from nordhold import api as api_module
+        except Exception as exc:  # pragma: no cover
+            self.skipTest(f"FastAPI stack is not importable in this environment: {exc}")
+            return
+
+        client = TestClient(api_module.app)
+        before = client.get("/api/v1/metrics").json()["engine"]["evaluations"]
+        body = {
+            "mode": "combat",
+            "use_cache": False,
+            "build_plan": {
+                "scenario_id": "normal_baseline",
+                "towers": [{"tower_id": "arrow_tower", "count": 1, "level": 1}],
+            },
+        }
+        plain = client.post("/api/v1/timeline/evaluate", json=body).json()
+        self.assertNotIn("diagnostics", plain)
+
+        diagnosed = client.post("/api/v1/timeline/evaluate", json={**body, "diagnostics": True}).json()
+        diagnostics = diagnosed["diagnostics"]
+        self.assertEqual(diagnosed["result"], plain["result"])
+        self.assertTrue({"scenario_load", "replay", "combat", "economy"}.issubset(diagnostics["phases"]))
+        self.assertEqual(len(diagnostics["waves"]), len(plain["result"]["wave_results"]))
+        self.assertTrue(all(wave["events"] > 0 for wave in diagnostics["waves"]))
+
+        metrics = client.get("/api/v1/metrics").json()
+        self.assertEqual(metrics["engine"]["evaluations"], before + 2)
+        self.assertGreater(metrics["engine"]["combat_events"], 0)
+        self.assertIn("wave_results", metrics)
+
+    def test_engine_options_are_shared_by_evaluating_requests(self) -> None:
+        try:
+            from fastapi.testclient import TestClient
+            from nordhold import api as api_module
+        except Exception as exc:  # pragma: no cover
+            self.skipTest(f"FastAPI stack is not importable in this environment: {exc}")
+            return
+
+        for model in (
+            api_module.TimelineEvaluateRequest,
+            api_module.ForecastRequest,
+            api_module.CompareRequest,
+            api_module.SensitivityRequest,
+            api_module.SensitivityGridRequest,
+            api_module.GlobalSensitivityRequest,
+            api_module.OptimizeRequest,
+        ):
+            self.assertTrue(issubclass(model, api_module.EngineOptions), model.__name__)
+
+        options = api_module.AnalyticsOptions(engine="vectorized", workers=2, target_relative_error=0.05, use_cache=False)
+        kwargs = api_module._engine_kwargs(options)
+        self.assertEqual(kwargs["engine"], "vectorized")
+        self.assertEqual(kwargs["workers"], 2)
+        self.assertEqual(kwargs["variance_reduction"], "none")
+        self.assertIsNone(kwargs["result_cache"])
+        self.assertEqual(kwargs["sampling_target"].relative_error, 0.05)
+        self.assertNotIn("result_cache", api_module._engine_kwargs(options, cached=False))
+        self.assertNotIn("variance_reduction", api_module._engine_kwargs(api_module.EngineOptions()))
+
+        client = TestClient(api_module.app)
+        build_plan = {"scenario_id": "normal_baseline", "towers": [{"tower_id": "arrow_tower", "count": 1, "level": 1}]}
+        for route in ("/api/v1/timeline/evaluate", "/api/v1/analytics/optimize", "/api/v1/analytics/sensitivity/global"):
+            response = client.post(route, json={"bulk_dt_s": 0.0, "build_plan": build_plan})
+            self.assertEqual(response.status_code, 422, route)
+
 
 if __name__ == "__main__":
     unittest.main()
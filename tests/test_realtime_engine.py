@@ -1,10 +1,53 @@
 from __future__ import annotations
 
+import json
+import os
+import random
+import shutil
+import tempfile
 import unittest
+from dataclasses import replace
+from unittest import mock
+from pathlib import Path
 
+from nordhold.realtime import parallel
+from nordhold.realtime.analytics import compare_builds, sensitivity_analysis, sensitivity_grid
+from nordhold.realtime.cache import WaveResultCache
 from nordhold.realtime.catalog import CatalogRepository
-from nordhold.realtime.engine import evaluate_timeline
-from nordhold.realtime.models import BuildPlan
+from nordhold.realtime.compiled import CompiledScenario, compile_scenario
+from nordhold.realtime.engine import (
+    ENGINE_METRICS,
+    EngineDiagnostics,
+    _EnemyStore,
+    _TargetIndex,
+    _TimelineCursor,
+    _TowerInstance,
+    _batch_tower_specs,
+    _log_regen_time,
+    _settle_regen,
+    _simulate_wave_combat,
+    _target_score,
+    affordable_net_gold,
+    checkpoint_from_live_snapshot,
+    checkpoint_timeline,
+    evaluate_timeline,
+    iter_timeline,
+    trace_combat_wave,
+)
+from nordhold.realtime.global_sensitivity import _factor_bounds, _morris_plan, _scales_at, global_sensitivity
+from nordhold.realtime.models import (
+    BuildPlan,
+    LiveSnapshot,
+    SpawnDefinition,
+    TimelineCheckpoint,
+    WaveDefinition,
+    WaveResult,
+)
+from nordhold.realtime.optimizer import _candidate_key, _timeline_key, optimize_build
+from nordhold.realtime.rng import CounterStreams
+from nordhold.realtime.sampling import QuantileSketch, RunningStats, SamplingTarget
+from nordhold.realtime.stats import ScenarioScales, TowerStatsCache, _resolve_tower_stats
+from nordhold.realtime.trace import read_columnar_trace
 
 
 class RealtimeEngineTests(unittest.TestCase):
@@ -229,6 +272,1625 @@ class RealtimeEngineTests(unittest.TestCase):
         }
         self.assertGreater(len(distinct_combat_totals), 1)
 
+    def test_vectorized_monte_carlo_matches_scalar_aggregates(self) -> None:
+        from nordhold.realtime.vectorized import vectorized_available
+
+        if not vectorized_available():
+            self.skipTest("numpy is not installed in this environment")
+
+        build = BuildPlan.from_dict(
+            {
+                "scenario_id": "normal_baseline",
+                "towers": [
+                    {"tower_id": "arrow_tower", "count": 1, "level": 2},
+                    {
+                        "tower_id": "frost_tower",
+                        "count": 1,
+                        "level": 1,
+                        "focus_priorities": ["barrier", "highest_hp"],
+                        "focus_until_death": True,
+                    },
+                ],
+                "actions": [],
+            }
+        )
+
+        results = {
+            engine: evaluate_timeline(
+                scenario=self.scenario,
+                build=build,
+                dataset_version=self.meta.dataset_version,
+                mode="monte_carlo",
+                seed=7,
+                monte_carlo_runs=300,
+                engine=engine,
+            )
+            for engine in ("scalar", "vectorized")
+        }
+
+        for scalar_wave, vector_wave in zip(results["scalar"].wave_results, results["vectorized"].wave_results):
+            self.assertEqual(scalar_wave.wave, vector_wave.wave)
+            self.assertEqual(scalar_wave.potential_damage, vector_wave.potential_damage)
+            self.assertAlmostEqual(vector_wave.combat_damage / scalar_wave.combat_damage, 1.0, delta=0.02)
+            self.assertAlmostEqual(vector_wave.effective_dps / scalar_wave.effective_dps, 1.0, delta=0.02)
+            self.assertAlmostEqual(vector_wave.leaks, scalar_wave.leaks, delta=0.25)
+            self.assertEqual(set(vector_wave.breakdown), set(scalar_wave.breakdown))
+
+    def test_expected_kernel_matches_scalar_expected_mode(self) -> None:
+        from nordhold.realtime.expected_kernel import ExpectedKernel, expected_kernel_available
+
+        if not expected_kernel_available():
+            self.skipTest("numpy is not installed in this environment")
+
+        builds = [
+            BuildPlan.from_dict(
+                {
+                    "scenario_id": "normal_baseline",
+                    "towers": [
+                        {"tower_id": "arrow_tower", "count": 2, "level": 1},
+                        {"tower_id": "frost_tower", "count": 1, "level": 0},
+                    ],
+                    "active_global_modifiers": ["village_arsenal_l3"],
+                    "actions": [],
+                }
+            ),
+            BuildPlan.from_dict(
+                {
+                    "scenario_id": "normal_baseline",
+                    "towers": [{"tower_id": "arrow_tower", "count": 1, "level": 0}],
+                    "actions": [
+                        {"wave": 2, "type": "build", "target_id": "frost_tower"},
+                        {"wave": 3, "type": "upgrade", "target_id": "arrow_tower", "value": 2},
+                        {"wave": 4, "type": "modifier", "target_id": "village_arsenal_l3"},
+                        {"wave": 5, "type": "sell", "target_id": "arrow_tower"},
+                    ],
+                }
+            ),
+            BuildPlan.from_dict({"scenario_id": "normal_baseline", "towers": [], "actions": []}),
+        ]
+
+        kernel = ExpectedKernel(self.scenario)
+        scores = kernel.score(builds)
+        self.assertEqual(len(scores), len(builds))
+        for build_id, build in enumerate(builds):
+            result = evaluate_timeline(
+                scenario=self.scenario,
+                build=build,
+                dataset_version=self.meta.dataset_version,
+                mode="expected",
+                seed=42,
+                monte_carlo_runs=1,
+            )
+            self.assertEqual(scores.wave_indices, tuple(wave.wave for wave in result.wave_results))
+            for position, wave in enumerate(result.wave_results):
+                self.assertAlmostEqual(scores.effective_dps[build_id, position], wave.effective_dps, places=9)
+                self.assertAlmostEqual(scores.potential_damage[build_id, position], wave.potential_damage, places=6)
+                self.assertAlmostEqual(scores.combat_damage[build_id, position], wave.combat_damage, places=6)
+                self.assertAlmostEqual(scores.clear_time_s[build_id, position], wave.clear_time_s, places=6)
+                self.assertAlmostEqual(scores.leaks[build_id, position], wave.leaks, places=9)
+            totals = scores.totals()
+            self.assertAlmostEqual(totals["potential_damage"][build_id], result.totals["potential_damage"], places=6)
+            self.assertAlmostEqual(totals["leaks"][build_id], result.totals["leaks"], places=9)
+
+        # Rows are shared across builds and calls, so rescoring resolves no new configurations.
+        rows = kernel.rows
+        kernel.score(builds)
+        self.assertEqual(kernel.rows, rows)
+
+    def test_expected_scale_batch_matches_scaled_expected_timelines(self) -> None:
+        from nordhold.realtime.expected_kernel import expected_kernel_available, score_scales_expected
+
+        if not expected_kernel_available():
+            self.skipTest("numpy is not installed in this environment")
+
+        build = BuildPlan.from_dict(
+            {
+                "scenario_id": "normal_baseline",
+                "towers": [{"tower_id": "arrow_tower", "count": 1, "level": 0}],
+                "actions": [
+                    {"wave": 2, "type": "build", "target_id": "frost_tower"},
+                    {"wave": 3, "type": "upgrade", "target_id": "arrow_tower", "value": 2},
+                    {"wave": 4, "type": "modifier", "target_id": "village_arsenal_l3"},
+                ],
+            }
+        )
+        compiled = compile_scenario(self.scenario)
+        overlays = [
+            ScenarioScales(),
+            ScenarioScales(tower_damage=1.2, enemy_hp=0.8),
+            ScenarioScales(tower_fire_rate=0.7, tower_accuracy=1.3, enemy_armor=1.5),
+            ScenarioScales(tower_damage=0.5, enemy_hp=1.4, enemy_armor=0.6),
+        ]
+        scores = score_scales_expected(compiled, build, overlays)
+        self.assertEqual(len(scores), len(overlays))
+        for point, overlay in enumerate(overlays):
+            result = evaluate_timeline(
+                scenario=compiled.scaled(overlay),
+                build=build,
+                dataset_version=self.meta.dataset_version,
+                mode="expected",
+                seed=42,
+                monte_carlo_runs=1,
+            )
+            for position, wave in enumerate(result.wave_results):
+                self.assertAlmostEqual(scores.effective_dps[point, position], wave.effective_dps, places=9)
+                self.assertAlmostEqual(scores.combat_damage[point, position], wave.combat_damage, places=6)
+                self.assertAlmostEqual(scores.clear_time_s[point, position], wave.clear_time_s, places=6)
+                self.assertAlmostEqual(scores.leaks[point, position], wave.leaks, places=9)
+            totals = scores.totals()
+            for metric in ("potential_damage", "combat_damage", "leaks"):
+                self.assertAlmostEqual(totals[metric][point], result.totals[metric], places=6)
+
+    def test_parallel_monte_carlo_matches_serial_bit_for_bit(self) -> None:
+        build = BuildPlan.from_dict(
+            {
+                "scenario_id": "normal_baseline",
+                "towers": [
+                    {"tower_id": "arrow_tower", "count": 1, "level": 1},
+                    {"tower_id": "frost_tower", "count": 1, "level": 0},
+                ],
+            }
+        )
+
+        def _evaluate(mode: str, workers: int) -> dict:
+            return evaluate_timeline(
+                scenario=self.scenario,
+                build=build,
+                dataset_version=self.meta.dataset_version,
+                mode=mode,
+                seed=-5,
+                monte_carlo_runs=70,
+                workers=workers,
+            ).to_dict()
+
+        self.assertEqual(_evaluate("monte_carlo", 1), _evaluate("monte_carlo", 2))
+        self.assertEqual(_evaluate("combat", 1), _evaluate("combat", 2))
+
+    def test_parallel_shares_one_pool_sized_to_the_largest_request(self) -> None:
+        parallel.shutdown_executors()
+        self.addCleanup(parallel.shutdown_executors)
+        small = parallel.get_executor(2)
+        large = parallel.get_executor(3)
+        self.assertIsNot(small, large)
+        self.assertIs(parallel.get_executor(2), large)
+        self.assertIs(parallel.get_executor(3), large)
+        self.assertEqual(parallel._EXECUTOR_WORKERS, 3)
+        tasks = [(value,) for value in range(-6, 6)]
+        self.assertEqual(parallel.map_ordered(abs, tasks, 2), [abs(value) for value, in tasks])
+        iterator = parallel.imap_ordered(abs, tasks, 3)
+        self.assertEqual(next(iterator), 6)
+        iterator.close()
+
+    def test_combat_leaks_count_only_enemies_spawned_within_wave(self) -> None:
+        wave = WaveDefinition(
+            index=1,
+            duration_s=10.0,
+            spawns=(
+                SpawnDefinition(at_s=0.0, enemy_id="barrier_guard", count=600, interval_s=0.01),
+                SpawnDefinition(at_s=12.0, enemy_id="raider", count=5, interval_s=0.0),
+            ),
+        )
+        scenario = replace(self.scenario, waves=(wave,))
+        build = BuildPlan.from_dict(
+            {"scenario_id": "normal_baseline", "towers": [{"tower_id": "arrow_tower", "count": 1, "level": 0}]}
+        )
+
+        result = evaluate_timeline(
+            scenario=scenario,
+            build=build,
+            dataset_version=self.meta.dataset_version,
+            mode="combat",
+            seed=3,
+            monte_carlo_runs=1,
+        )
+
+        wave_result = result.wave_results[0]
+        self.assertGreater(wave_result.combat_damage, 0.0)
+        self.assertEqual(wave_result.leaks, 600.0)
+        self.assertEqual(wave_result.clear_time_s, 10.0)
+
+    def test_combat_dot_stacks_respect_max_stacks(self) -> None:
+        frost = self.scenario.towers["frost_tower"]
+        burn = frost.dot_effects[0]
+        dummy = replace(self.scenario.enemies["raider"], hp=1.0e6, barrier=0.0, regen_per_s=0.0)
+        wave = WaveDefinition(index=1, duration_s=30.0, spawns=(SpawnDefinition(at_s=0.0, enemy_id="raider", count=1, interval_s=0.0),))
+        build = BuildPlan.from_dict(
+            {"scenario_id": "normal_baseline", "towers": [{"tower_id": "frost_tower", "count": 1, "level": 0}]}
+        )
+
+        def _dot_damage(max_stacks: int) -> float:
+            # A zero-damage frost tower isolates the burn ticks on a single unkillable enemy.
+            tower = replace(
+                frost,
+                base_stats=replace(frost.base_stats, damage=0.0),
+                dot_effects=(replace(burn, max_stacks=max_stacks),),
+            )
+            scenario = replace(
+                self.scenario,
+                towers={**self.scenario.towers, "frost_tower": tower},
+                enemies={**self.scenario.enemies, "raider": dummy},
+                waves=(wave,),
+            )
+            result = evaluate_timeline(
+                scenario=scenario,
+                build=build,
+                dataset_version=self.meta.dataset_version,
+                mode="combat",
+                seed=1,
+                monte_carlo_runs=1,
+            )
+            return result.wave_results[0].combat_damage
+
+        ticks_per_stack = wave.duration_s / burn.tick_interval_s + 1.0
+        uncapped = _dot_damage(99)
+        for max_stacks in (1, 2):
+            capped = _dot_damage(max_stacks)
+            self.assertGreater(capped, 0.0)
+            self.assertLessEqual(capped, max_stacks * burn.damage_per_tick * ticks_per_stack)
+        self.assertGreater(uncapped, 2 * burn.damage_per_tick * ticks_per_stack)
+
+    def test_combat_bulk_matches_event_engine_without_kills(self) -> None:
+        # Unkillable, non-regenerating enemies: every shot and DoT tick lands in both engines, and
+        # counter streams give each tower shot the same draws, so only summation order differs.
+        enemies = {
+            enemy_id: replace(enemy, hp=1.0e9, regen_per_s=0.0) for enemy_id, enemy in self.scenario.enemies.items()
+        }
+        towers = {
+            tower_id: replace(tower, dot_effects=tuple(replace(dot, max_stacks=99) for dot in tower.dot_effects))
+            for tower_id, tower in self.scenario.towers.items()
+        }
+        scenario = replace(self.scenario, enemies=enemies, towers=towers)
+        build = BuildPlan.from_dict(
+            {
+                "scenario_id": "normal_baseline",
+                "towers": [
+                    {"tower_id": "arrow_tower", "count": 2, "level": 1},
+                    {"tower_id": "frost_tower", "count": 1, "level": 1},
+                ],
+            }
+        )
+
+        def _evaluate(mode: str, bulk_dt_s: float = 0.1) -> dict:
+            return evaluate_timeline(
+                scenario=scenario,
+                build=build,
+                dataset_version=self.meta.dataset_version,
+                mode=mode,
+                seed=4,
+                monte_carlo_runs=1,
+                random_streams="counter",
+                bulk_dt_s=bulk_dt_s,
+            ).to_dict()
+
+        event = _evaluate("combat")
+        for bulk_dt_s in (0.05, 0.3, 1.0):
+            bulk = _evaluate("combat_bulk", bulk_dt_s)
+            self.assertEqual(bulk["mode"], "combat_bulk")
+            for expected, actual in zip(event["wave_results"], bulk["wave_results"]):
+                self.assertAlmostEqual(actual["combat_damage"], expected["combat_damage"], places=6)
+                self.assertEqual(actual["leaks"], expected["leaks"])
+                self.assertEqual(actual["clear_time_s"], expected["clear_time_s"])
+
+        with self.assertRaises(ValueError):
+            _evaluate("combat_bulk", 0.0)
+
+    def test_combat_bulk_picks_only_enemies_spawned_by_the_shot_time(self) -> None:
+        # One 1 s step: the arrow tower shoots at 0.0 and 0.6, the frost tower at 0.0, 0.5 and 1.0.
+        # The raider dies to the first shot; the guard spawns at 0.55, between the two towers'
+        # shots, so only the arrow shot at 0.6 and the frost shot at 1.0 may hit it.
+        enemies = {
+            "raider": replace(self.scenario.enemies["raider"], hp=1.0, armor=0.0, block=0.0),
+            "barrier_guard": replace(self.scenario.enemies["barrier_guard"], hp=1.0e9, barrier=0.0, regen_per_s=0.0),
+        }
+        arrow = self.scenario.towers["arrow_tower"]
+        frost = self.scenario.towers["frost_tower"]
+        towers = {
+            "arrow_tower": replace(arrow, base_stats=replace(arrow.base_stats, fire_rate=1.0 / 0.6)),
+            "frost_tower": replace(frost, base_stats=replace(frost.base_stats, fire_rate=2.0), dot_effects=()),
+        }
+        wave = WaveDefinition(
+            index=1,
+            duration_s=1.0,
+            spawns=(
+                SpawnDefinition(at_s=0.0, enemy_id="raider", count=1, interval_s=0.0),
+                SpawnDefinition(at_s=0.55, enemy_id="barrier_guard", count=1, interval_s=0.0),
+            ),
+        )
+        scenario = replace(self.scenario, enemies=enemies, towers=towers, waves=(wave,))
+        build = BuildPlan.from_dict(
+            {
+                "scenario_id": "normal_baseline",
+                "towers": [
+                    {"tower_id": "arrow_tower", "count": 1, "level": 0},
+                    {"tower_id": "frost_tower", "count": 1, "level": 0},
+                ],
+            }
+        )
+
+        def _evaluate(mode: str) -> dict:
+            return evaluate_timeline(
+                scenario=scenario,
+                build=build,
+                dataset_version=self.meta.dataset_version,
+                mode=mode,
+                seed=4,
+                monte_carlo_runs=1,
+                random_streams="counter",
+                bulk_dt_s=1.0,
+            ).to_dict()["wave_results"][0]
+
+        event = _evaluate("combat")
+        bulk = _evaluate("combat_bulk")
+        self.assertAlmostEqual(bulk["combat_damage"], event["combat_damage"], places=6)
+        self.assertEqual(bulk["leaks"], event["leaks"])
+
+    def test_combat_trace_attributes_damage_per_tower(self) -> None:
+        build = BuildPlan.from_dict(
+            {
+                "scenario_id": "normal_baseline",
+                "towers": [
+                    {"tower_id": "arrow_tower", "count": 2, "level": 1},
+                    {"tower_id": "frost_tower", "count": 1, "level": 1},
+                ],
+            }
+        )
+        full = evaluate_timeline(self.scenario, build, "test", "combat", 7, 1)
+        for wave in full.wave_results:
+            result, trace = trace_combat_wave(self.scenario, build, wave.wave, 7)
+            self.assertEqual((result.combat_damage, result.leaks), (wave.combat_damage, wave.leaks))
+            self.assertAlmostEqual(sum(trace.damage_by_tower), result.potential_damage, places=6)
+            self.assertAlmostEqual(sum(trace.breakdown().values()), result.potential_damage, places=6)
+            counts = trace.event_counts()
+            self.assertEqual(counts["attack"], counts["hit"] + counts["miss"])
+            self.assertEqual(sum(trace.shots_by_tower), counts["attack"])
+            self.assertEqual(trace.dropped, 0)
+
+        # A small ring keeps only the newest events; attribution stays exact.
+        wave_index = full.wave_results[-1].wave
+        _, complete = trace_combat_wave(self.scenario, build, wave_index, 7)
+        _, ring = trace_combat_wave(self.scenario, build, wave_index, 7, capacity=16)
+        self.assertEqual(len(ring), 16)
+        self.assertEqual(ring.dropped, complete.recorded - 16)
+        self.assertEqual(list(ring.events()), list(complete.events())[-16:])
+        self.assertEqual(ring.damage_by_tower, complete.damage_by_tower)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            lines = complete.write_jsonl(Path(tmp) / "trace.jsonl")
+            rows = [json.loads(line) for line in (Path(tmp) / "trace.jsonl").read_text(encoding="utf-8").splitlines()]
+            self.assertEqual(lines, len(complete))
+            self.assertEqual(rows[0]["event"], "attack")
+            self.assertTrue(all(row["wave"] == wave_index for row in rows))
+
+            complete.write_columnar(Path(tmp) / "trace.bin")
+            loaded = read_columnar_trace(Path(tmp) / "trace.bin")
+            self.assertEqual(loaded["header"]["count"], len(complete))
+            self.assertEqual(list(loaded["columns"]["amount"]), [event[4] for event in complete.events()])
+            self.assertEqual(list(loaded["columns"]["slot"]), [event[3] for event in complete.events()])
+
+    def test_target_index_matches_full_sort_selection(self) -> None:
+        raider = self.scenario.enemies["raider"]
+        definitions = [
+            raider,
+            self.scenario.enemies["barrier_guard"],
+            replace(raider, id="warlord", speed=0.0, barrier=300.0, tags=("boss", "healer")),
+        ]
+        tower_def = self.scenario.towers["arrow_tower"]
+        compiled = TowerStatsCache(replace(self.scenario, enemies={item.id: item for item in definitions})).resolve(
+            "arrow_tower", 0, []
+        )
+        profiles = [
+            (),
+            ("lowest_hp",),
+            ("highest_hp", "progress"),
+            ("barrier", "lowest_hp"),
+            ("boss_elite", "fastest", "closest_to_gate"),
+        ]
+
+        def _oracle(now: float, tower: _TowerInstance, store: _EnemyStore) -> int | None:
+            alive = [slot for slot in range(len(store)) if store.alive[slot] and now >= store.spawn_time[slot]]
+            if not alive:
+                return None
+            if tower.focus_until_death and tower.sticky_target in alive:
+                return tower.sticky_target
+            priorities = tower.focus_priorities or ("progress",)
+            alive.sort(key=lambda slot: tuple(_target_score(store, slot, now, p) for p in priorities), reverse=True)
+            if tower.focus_until_death:
+                tower.sticky_target = alive[0]
+            return alive[0]
+
+        for seed in range(5):
+            rng = random.Random(seed)
+            kinds = [rng.randrange(len(definitions)) for _ in range(120)]
+            spawn_times = [round(rng.uniform(0.0, 20.0), 1) for _ in kinds]
+            store = _EnemyStore(
+                definitions,
+                kinds,
+                spawn_times,
+                [definitions[kind].hp for kind in kinds],
+                [definitions[kind].barrier for kind in kinds],
+            )
+            index = _TargetIndex(store)
+            towers = [
+                (
+                    _TowerInstance(uid, tower_def, compiled, profile, uid % 2 == 0),
+                    _TowerInstance(uid, tower_def, compiled, profile, uid % 2 == 0),
+                )
+                for uid, profile in enumerate(profiles * 2, start=1)
+            ]
+
+            now = 0.0
+            while now < 30.0:
+                now += 0.25
+                for indexed_tower, oracle_tower in towers:
+                    picked = index.pick(now, indexed_tower)
+                    expected = _oracle(now, oracle_tower, store)
+                    self.assertEqual(picked, expected)
+                    if picked is None:
+                        continue
+                    damage = rng.choice((0.0, 50.0, 400.0))
+                    absorbed = min(store.barrier[picked], damage)
+                    store.barrier[picked] -= absorbed
+                    store.hp[picked] -= damage - absorbed
+                    if store.hp[picked] <= 0.0:
+                        store.alive[picked] = 0
+                    index.touch(picked)
+
+    def test_lazy_regen_replays_eager_steps_and_caps_at_full_hp(self) -> None:
+        guard = self.scenario.enemies["barrier_guard"]
+        store = _EnemyStore([guard], [0], [0.0], [guard.hp - 100.0], [0.0])
+        for now in (0.3, 0.7, 1.1):
+            _log_regen_time(store, now)
+        _log_regen_time(store, 1.1)
+        self.assertEqual(list(store.regen_times), [0.0, 0.3, 0.7, 1.1])
+
+        eager = guard.hp - 100.0
+        for previous, now in ((0.0, 0.3), (0.3, 0.7), (0.7, 1.1)):
+            eager = min(eager + guard.regen_per_s * (now - previous), guard.hp)
+        _settle_regen(store, 0)
+        self.assertEqual(store.hp[0], eager)
+        self.assertEqual(store.regen_step[0], 3)
+
+        _log_regen_time(store, 1.1 + 100.0 / guard.regen_per_s)
+        _settle_regen(store, 0)
+        self.assertEqual(store.hp[0], guard.hp)
+
+    def test_lazy_regen_matches_regenerating_every_enemy_on_every_event(self) -> None:
+        scenario = replace(
+            self.scenario,
+            enemies={enemy_id: replace(enemy, regen_per_s=20.0) for enemy_id, enemy in self.scenario.enemies.items()},
+        )
+        build = BuildPlan.from_dict(
+            {
+                "scenario_id": "normal_baseline",
+                "towers": [
+                    {"tower_id": "arrow_tower", "count": 1, "level": 1},
+                    {"tower_id": "frost_tower", "count": 1, "level": 0},
+                ],
+            }
+        )
+
+        def _eager(store: _EnemyStore, now: float) -> None:
+            _log_regen_time(store, now)
+            for slot in range(len(store)):
+                if store.alive[slot]:
+                    _settle_regen(store, slot)
+
+        for mode in ("combat", "combat_bulk", "monte_carlo"):
+            options = dict(
+                scenario=scenario,
+                build=build,
+                dataset_version=self.meta.dataset_version,
+                mode=mode,
+                seed=11,
+                monte_carlo_runs=80,
+                engine="scalar",
+            )
+            lazy = evaluate_timeline(**options)
+            with mock.patch("nordhold.realtime.engine._log_regen_time", side_effect=_eager):
+                eager = evaluate_timeline(**options)
+            self.assertEqual(lazy.wave_results, eager.wave_results, mode)
+
+    def test_stats_cache_memoizes_resolved_stats_per_modifier_order(self) -> None:
+        cache = TowerStatsCache(self.scenario)
+        tower = self.scenario.towers["arrow_tower"]
+        arsenal = self.scenario.global_modifiers["village_arsenal_l3"].modifiers
+
+        compiled = cache.resolve("arrow_tower", 2, ["village_arsenal_l3"])
+        self.assertEqual(compiled.stats, _resolve_tower_stats(tower, 2, arsenal))
+        self.assertIs(cache.resolve("arrow_tower", 2, ("village_arsenal_l3",)), compiled)
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+        self.assertIsNot(cache.resolve("arrow_tower", 1, ["village_arsenal_l3"]), compiled)
+        self.assertIsNone(cache.resolve("missing_tower", 0, []))
+        self.assertEqual(len(compiled.strikes), len(self.scenario.enemies))
+
+        build = BuildPlan.from_dict(
+            {"scenario_id": "normal_baseline", "towers": [{"tower_id": "arrow_tower", "count": 2, "level": 1}]}
+        )
+        with self.assertRaises(ValueError):
+            evaluate_timeline(
+                scenario=replace(self.scenario),
+                build=build,
+                dataset_version=self.meta.dataset_version,
+                mode="expected",
+                seed=1,
+                monte_carlo_runs=1,
+                stats_cache=cache,
+            )
+
+    def test_compiled_scenario_matches_definition_in_every_mode(self) -> None:
+        _, compiled = self.repo.load_compiled_scenario("normal_baseline", "1.0.0")
+        self.assertIs(self.repo.load_compiled_scenario("normal_baseline", "1.0.0")[1], compiled)
+        self.assertIs(self.repo.load_scenario("normal_baseline", "1.0.0")[1], compiled.definition)
+        self.assertEqual(compiled.enemies[compiled.enemy_index["raider"]], self.scenario.enemies["raider"])
+
+        build = BuildPlan.from_dict(
+            {
+                "scenario_id": "normal_baseline",
+                "towers": [
+                    {"tower_id": "arrow_tower", "count": 2, "level": 1},
+                    {"tower_id": "frost_tower", "count": 1, "level": 0, "focus_priorities": ["barrier"]},
+                ],
+                "active_global_modifiers": ["village_arsenal_l3"],
+            }
+        )
+        definition = replace(self.scenario)
+        for mode in ("expected", "combat", "combat_bulk", "monte_carlo"):
+            results = [
+                evaluate_timeline(
+                    scenario=scenario,
+                    build=build,
+                    dataset_version=self.meta.dataset_version,
+                    mode=mode,
+                    seed=17,
+                    monte_carlo_runs=30,
+                ).to_dict()
+                for scenario in (definition, compiled)
+            ]
+            self.assertEqual(results[0], results[1])
+
+    def test_catalog_recompiles_scenario_after_catalog_change(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            shutil.copytree(self.repo.project_root / "data" / "versions", root / "data" / "versions")
+            repo = CatalogRepository(project_root=root)
+            meta, first = repo.load_compiled_scenario("normal_baseline")
+            self.assertIs(repo.load_compiled_scenario("normal_baseline")[1], first)
+
+            payload = json.loads(meta.catalog_path.read_text(encoding="utf-8"))
+            for item in payload["scenarios"]:
+                if item["id"] == "normal_baseline":
+                    item["name"] = "Normal baseline (edited)"
+            meta.catalog_path.write_text(json.dumps(payload), encoding="utf-8")
+            stat = meta.catalog_path.stat()
+            os.utime(meta.catalog_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+            _, second = repo.load_compiled_scenario("normal_baseline")
+            self.assertIsInstance(second, CompiledScenario)
+            self.assertIsNot(second, first)
+            self.assertEqual(second.definition.name, "Normal baseline (edited)")
+
+    def test_timeline_cursor_matches_replay_from_scratch(self) -> None:
+        def _replay(build: BuildPlan, wave_index: int) -> list[tuple[str, int, tuple[str, ...], bool]]:
+            towers = [
+                [plan.tower_id, plan.level, tuple(plan.focus_priorities), plan.focus_until_death]
+                for plan in build.towers
+                for _ in range(plan.count)
+            ]
+            for action in build.actions:
+                if action.wave > wave_index:
+                    break
+                matching = [tower for tower in towers if tower[0] == action.target_id]
+                if action.type == "build":
+                    towers.append([action.target_id, 0, ("progress", "lowest_hp"), False])
+                elif action.type == "sell" and matching:
+                    towers.remove(matching[0])
+                elif action.type == "upgrade" and matching:
+                    matching[0][1] = max(0, matching[0][1] + int(action.value))
+                elif action.type == "targeting":
+                    for tower in matching:
+                        tower[2:] = [("highest_hp",), True]
+            return [tuple(tower) for tower in towers]
+
+        rng = random.Random(11)
+        actions = []
+        for _ in range(300):
+            action_type = rng.choice(("build", "sell", "upgrade", "targeting"))
+            action = {"wave": rng.randint(1, 50), "type": action_type, "target_id": rng.choice(("arrow_tower", "frost_tower"))}
+            if action_type == "upgrade":
+                action["value"] = rng.choice((-1, 1, 2))
+            if action_type == "targeting":
+                action["payload"] = {"focus_priorities": ["highest_hp"], "focus_until_death": True}
+            actions.append(action)
+        build = BuildPlan.from_dict(
+            {
+                "scenario_id": "normal_baseline",
+                "towers": [{"tower_id": "arrow_tower", "count": 3, "level": 1}, {"tower_id": "frost_tower", "count": 2}],
+                "actions": actions,
+            }
+        )
+
+        cursor = _TimelineCursor(build)
+        for wave_index in list(range(1, 53)) + [7, 30]:
+            runtime = cursor.advance(wave_index)
+            self.assertEqual(
+                [(t.tower_id, t.level, t.focus_priorities, t.focus_until_death) for t in runtime.towers],
+                _replay(build, wave_index),
+            )
+
+    def test_resumed_timeline_matches_tail_of_full_evaluation(self) -> None:
+        waves = tuple(
+            replace(self.scenario.waves[position % len(self.scenario.waves)], index=index)
+            for position, index in enumerate(range(1, 7))
+        )
+        scenario = replace(self.scenario, waves=waves)
+        build = BuildPlan.from_dict(
+            {
+                "scenario_id": "normal_baseline",
+                "towers": [{"tower_id": "arrow_tower", "count": 2, "level": 1}],
+                "actions": [
+                    {"wave": 1, "type": "assign_workers", "payload": {"gold_workers": 3}},
+                    {"wave": 2, "type": "build", "target_id": "frost_tower"},
+                    {"wave": 3, "type": "upgrade", "target_id": "arrow_tower", "value": 1},
+                    {"wave": 4, "type": "modifier", "target_id": "village_arsenal_l3"},
+                    {"wave": 5, "type": "sell", "target_id": "arrow_tower"},
+                    {"wave": 6, "type": "build", "target_id": "arrow_tower", "payload": {"level": 2}},
+                ],
+            }
+        )
+
+        for mode in ("expected", "combat", "monte_carlo"):
+            full = evaluate_timeline(scenario, build, "test", mode, 5, 16)
+            for wave in (1, 3, 6):
+                checkpoint = checkpoint_timeline(scenario, build, wave)
+                # Checkpoints survive a JSON round trip unchanged.
+                checkpoint = TimelineCheckpoint.from_dict(json.loads(json.dumps(checkpoint.to_dict())))
+                resumed = evaluate_timeline(scenario, build, "test", mode, 5, 16, checkpoint=checkpoint)
+                self.assertEqual(resumed.wave_results, full.wave_results[wave - 1 :], (mode, wave))
+                self.assertEqual(resumed.economy_totals, full.economy_totals, (mode, wave))
+
+        # Checkpoints chain: 1 -> 3 -> 5 equals checkpointing 5 directly.
+        chained = checkpoint_timeline(scenario, build, 5, checkpoint_timeline(scenario, build, 3))
+        self.assertEqual(chained, checkpoint_timeline(scenario, build, 5))
+        with self.assertRaises(ValueError):
+            checkpoint_timeline(scenario, build, 2, chained)
+        with self.assertRaises(ValueError):
+            evaluate_timeline(scenario, build, "test", "expected", 5, 1, checkpoint=replace(chained, scenario_id="other"))
+
+    def test_live_snapshot_checkpoint_uses_observed_roster_and_bank(self) -> None:
+        build = BuildPlan.from_dict(
+            {
+                "scenario_id": "normal_baseline",
+                "towers": [{"tower_id": "arrow_tower", "count": 1}],
+                "actions": [{"wave": 2, "type": "build", "target_id": "frost_tower"}],
+            }
+        )
+        observed = LiveSnapshot(
+            timestamp=0.0,
+            wave=2,
+            gold=120.0,
+            essence=7.0,
+            build={"towers": [{"tower_id": "frost_tower", "count": 3, "level": 1}]},
+            source_mode="replay",
+        )
+        checkpoint = checkpoint_from_live_snapshot(self.scenario, observed, build)
+        self.assertEqual(checkpoint.wave, 2)
+        self.assertEqual([(tower.tower_id, tower.count, tower.level) for tower in checkpoint.towers], [("frost_tower", 3, 1)])
+        self.assertEqual((checkpoint.gold, checkpoint.essence, checkpoint.source), (120.0, 7.0, "live_replay"))
+        self.assertEqual(checkpoint.economy_totals, {})
+
+        resumed = evaluate_timeline(self.scenario, build, "test", "expected", 0, 1, checkpoint=checkpoint)
+        self.assertEqual([wave.wave for wave in resumed.wave_results], [2])
+
+        # Snapshots without a roster (memory mode) fall back to the planned one.
+        planned = checkpoint_from_live_snapshot(self.scenario, replace(observed, build={"towers": []}), build)
+        self.assertEqual(planned.towers, checkpoint_timeline(self.scenario, build, 2).towers)
+
+    def test_wave_result_cache_serves_repeated_evaluations(self) -> None:
+        build = BuildPlan.from_dict(
+            {
+                "scenario_id": "normal_baseline",
+                "towers": [{"tower_id": "arrow_tower", "count": 2, "level": 1}],
+                "actions": [{"wave": 2, "type": "upgrade", "target_id": "arrow_tower", "value": 1}],
+            }
+        )
+
+        def _evaluate(scenario, mode: str, cache: WaveResultCache | None, seed: int = 9):
+            return evaluate_timeline(
+                scenario=scenario,
+                build=build,
+                dataset_version=self.meta.dataset_version,
+                mode=mode,
+                seed=seed,
+                monte_carlo_runs=12,
+                result_cache=cache,
+            ).to_dict()
+
+        waves = len(self.scenario.waves)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            cache = WaveResultCache(max_entries=64, directory=Path(tmp_dir))
+            for mode in ("expected", "combat", "monte_carlo"):
+                uncached = _evaluate(self.scenario, mode, None)
+                self.assertEqual(_evaluate(self.scenario, mode, cache), uncached)
+                # A reloaded scenario has the same content hash and is served from the cache.
+                _, reloaded = self.repo.load_scenario("normal_baseline", "1.0.0")
+                self.assertEqual(_evaluate(reloaded, mode, cache), uncached)
+            self.assertEqual(cache.stats()["misses"], 3 * waves)
+            self.assertEqual(cache.stats()["hits"], 3 * waves)
+
+            _evaluate(self.scenario, "combat", cache, seed=10)
+            self.assertEqual(cache.stats()["misses"], 4 * waves)
+
+            restarted = WaveResultCache(max_entries=1, directory=Path(tmp_dir))
+            self.assertEqual(_evaluate(self.scenario, "monte_carlo", restarted), _evaluate(self.scenario, "monte_carlo", None))
+            stats = restarted.stats()
+            self.assertEqual(stats["disk_hits"], waves)
+            self.assertEqual(stats["entries"], 1)
+            self.assertEqual(stats["evictions"], waves - 1)
+
+    def test_wave_result_cache_hands_out_copies_and_tolerates_disk_errors(self) -> None:
+        result = WaveResult(
+            wave=1,
+            potential_damage=10.0,
+            combat_damage=8.0,
+            effective_dps=1.0,
+            clear_time_s=5.0,
+            leaks=0.0,
+            enemy_hp_pool=10.0,
+            breakdown={"arrow_tower": 8.0},
+        )
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            cache = WaveResultCache(directory=Path(tmp_dir))
+            key = "ab" + "0" * 62
+            # The shard directory cannot be created, so the disk write fails.
+            (Path(tmp_dir) / key[:2]).write_text("", encoding="utf-8")
+            cache.put(key, result)
+            result.breakdown["arrow_tower"] = -1.0
+            served = cache.get(key)
+            self.assertEqual(served.breakdown, {"arrow_tower": 8.0})
+            served.breakdown["arrow_tower"] = -2.0
+            self.assertEqual(cache.get(key).breakdown, {"arrow_tower": 8.0})
+            stats = cache.stats()
+            self.assertEqual((stats["disk_writes"], stats["disk_errors"]), (0, 1))
+
+    def test_diagnostics_time_phases_and_count_combat_work(self) -> None:
+        build = BuildPlan.from_dict(
+            {"scenario_id": "normal_baseline", "towers": [{"tower_id": "arrow_tower", "count": 2, "level": 1}]}
+        )
+        cache = WaveResultCache()
+        before = ENGINE_METRICS.snapshot()
+
+        first = EngineDiagnostics()
+        result = evaluate_timeline(self.scenario, build, "test", "combat", 3, 1, result_cache=cache, diagnostics=first)
+        report = first.to_dict()
+        self.assertTrue({"compile", "replay", "cache", "combat", "economy"}.issubset(report["phases"]))
+        self.assertEqual(report["phases"]["combat"]["calls"], len(result.wave_results))
+        self.assertEqual([wave["wave"] for wave in report["waves"]], [wave.wave for wave in result.wave_results])
+        self.assertTrue(all(not wave["cached"] and wave["events"] > 0 for wave in report["waves"]))
+
+        second = EngineDiagnostics()
+        evaluate_timeline(self.scenario, build, "test", "combat", 3, 1, result_cache=cache, diagnostics=second)
+        self.assertNotIn("combat", second.phases)
+        self.assertTrue(all(wave["cached"] and "events" not in wave for wave in second.to_dict()["waves"]))
+
+        bulk = EngineDiagnostics()
+        evaluate_timeline(self.scenario, build, "test", "combat_bulk", 3, 1, diagnostics=bulk)
+        self.assertTrue(all(wave["steps"] > 0 for wave in bulk.to_dict()["waves"]))
+
+        after = ENGINE_METRICS.snapshot()
+        self.assertEqual(after["evaluations"], before["evaluations"] + 3)
+        self.assertEqual(after["cached_waves"], before["cached_waves"] + len(result.wave_results))
+        self.assertEqual(
+            after["combat_events"],
+            before["combat_events"] + sum(wave["events"] for wave in report["waves"]),
+        )
+
+    def test_adaptive_monte_carlo_stops_early_and_matches_fixed_runs(self) -> None:
+        build = BuildPlan.from_dict(
+            {
+                "scenario_id": "normal_baseline",
+                "towers": [
+                    {"tower_id": "arrow_tower", "count": 1, "level": 0},
+                    {"tower_id": "frost_tower", "count": 1, "level": 0},
+                ],
+            }
+        )
+
+        def _evaluate(runs: int, workers: int = 1, target: SamplingTarget | None = None):
+            return evaluate_timeline(
+                scenario=self.scenario,
+                build=build,
+                dataset_version=self.meta.dataset_version,
+                mode="monte_carlo",
+                seed=21,
+                monte_carlo_runs=runs,
+                workers=workers,
+                sampling_target=target,
+            )
+
+        target = SamplingTarget(relative_error=0.006)
+        adaptive = _evaluate(4000, target=target)
+        self.assertTrue(adaptive.sampling["converged"])
+        runs_used = [wave.sampling["runs"] for wave in adaptive.wave_results]
+        self.assertTrue(all(64 < runs < 1000 for runs in runs_used), runs_used)
+        self.assertEqual(_evaluate(4000, workers=2, target=target).to_dict(), adaptive.to_dict())
+
+        for wave in adaptive.wave_results:
+            fixed = _evaluate(wave.sampling["runs"]).wave_results[wave.wave - 1]
+            self.assertEqual(wave.combat_damage, fixed.combat_damage)
+            self.assertEqual(wave.leaks, fixed.leaks)
+            combat = wave.sampling["combat_damage"]
+            self.assertLessEqual(combat["ci_half_width"], 0.006 * combat["mean"])
+
+        capped = _evaluate(64, target=SamplingTarget(relative_error=1e-9))
+        self.assertFalse(capped.sampling["converged"])
+        self.assertEqual([wave.sampling["runs"] for wave in capped.wave_results], [64] * len(capped.wave_results))
+        self.assertNotIn("sampling", _evaluate(8).to_dict())
+
+    def test_running_stats_merge_matches_single_pass(self) -> None:
+        rng = random.Random(5)
+        values = [rng.gauss(100.0, 15.0) for _ in range(257)]
+        single = RunningStats()
+        for value in values:
+            single.add(value)
+        merged = RunningStats()
+        for start in range(0, len(values), 64):
+            chunk = RunningStats()
+            for value in values[start : start + 64]:
+                chunk.add(value)
+            merged.merge(chunk)
+        self.assertEqual(merged.count, single.count)
+        self.assertAlmostEqual(merged.mean, single.mean, places=9)
+        self.assertAlmostEqual(merged.variance, single.variance, places=6)
+        with self.assertRaises(ValueError):
+            SamplingTarget()
+
+    def test_quantile_sketch_tracks_exact_quantiles_and_merges(self) -> None:
+        rng = random.Random(9)
+        values = [0.0] * 40 + [rng.expovariate(0.05) for _ in range(960)]
+        single = QuantileSketch()
+        merged = QuantileSketch()
+        for value in values:
+            single.add(value)
+        for start in range(0, len(values), 64):
+            chunk = QuantileSketch()
+            for value in values[start : start + 64]:
+                chunk.add(value)
+            merged.merge(chunk)
+        ordered = sorted(values)
+        for q in (0.01, 0.05, 0.5, 0.95, 0.99):
+            exact = ordered[int(q * (len(values) - 1))]
+            self.assertEqual(merged.quantile(q), single.quantile(q))
+            self.assertLessEqual(abs(single.quantile(q) - exact), 0.01 * exact + 1e-12)
+        self.assertEqual(single.quantile(0.0), 0.0)
+        self.assertEqual(single.quantile(1.0), ordered[-1])
+        self.assertIsNone(QuantileSketch().quantile(0.5))
+
+        capped = QuantileSketch(max_buckets=8)
+        for value in values:
+            capped.add(value)
+        self.assertLessEqual(len(capped.buckets), 8)
+        self.assertEqual(capped.quantile(1.0), ordered[-1])
+
+    def test_combat_clear_time_is_the_last_in_wave_kill(self) -> None:
+        build = BuildPlan.from_dict(
+            {
+                "scenario_id": "normal_baseline",
+                "towers": [{"tower_id": "arrow_tower", "count": 4, "level": 2}],
+            }
+        )
+        arguments = {
+            "scenario": self.scenario,
+            "build": build,
+            "dataset_version": self.meta.dataset_version,
+            "seed": 3,
+        }
+        durations = {wave.index: wave.duration_s for wave in self.scenario.waves}
+        combat = evaluate_timeline(mode="combat", monte_carlo_runs=1, **arguments)
+        bulk = evaluate_timeline(mode="combat_bulk", monte_carlo_runs=1, **arguments)
+        for wave, bulk_wave in zip(combat.wave_results, bulk.wave_results):
+            self.assertEqual(wave.leaks, 0.0)
+            self.assertLess(wave.clear_time_s, durations[wave.wave])
+            self.assertAlmostEqual(wave.clear_time_s, bulk_wave.clear_time_s, delta=1.0)
+
+        options = {"mode": "monte_carlo", "monte_carlo_runs": 64, "random_streams": "counter", "distributions": True}
+        scalar = evaluate_timeline(**options, **arguments)
+        for wave in scalar.wave_results:
+            summary = wave.distribution["clear_time_s"]
+            self.assertLess(summary["min"], summary["max"])
+            self.assertLess(summary["max"], durations[wave.wave])
+        from nordhold.realtime.vectorized import vectorized_available
+
+        if not vectorized_available():
+            self.skipTest("numpy is not installed in this environment")
+        vectorized = evaluate_timeline(engine="vectorized", **options, **arguments)
+        self.assertEqual(vectorized.to_dict()["wave_results"], scalar.to_dict()["wave_results"])
+
+    def test_monte_carlo_distributions_are_bounded_and_worker_independent(self) -> None:
+        build = BuildPlan.from_dict(
+            {
+                "scenario_id": "normal_baseline",
+                "towers": [{"tower_id": "arrow_tower", "count": 1, "level": 0}],
+            }
+        )
+
+        def _evaluate(runs: int, workers: int = 1, bins: int = 8, target: SamplingTarget | None = None):
+            return evaluate_timeline(
+                scenario=self.scenario,
+                build=build,
+                dataset_version=self.meta.dataset_version,
+                mode="monte_carlo",
+                seed=17,
+                monte_carlo_runs=runs,
+                workers=workers,
+                sampling_target=target,
+                distributions=True,
+                histogram_bins=bins,
+            )
+
+        durations = {wave.index: wave.duration_s for wave in self.scenario.waves}
+        result = _evaluate(300)
+        for wave in result.wave_results:
+            for metric in ("leaks", "clear_time_s"):
+                summary = wave.distribution[metric]
+                self.assertEqual(summary["count"], 300)
+                self.assertEqual(sum(summary["histogram"]["counts"]), 300)
+                self.assertLessEqual(len(summary["histogram"]["counts"]), 8)
+                quantiles = summary["quantiles"]
+                self.assertEqual(sorted(quantiles), ["p5", "p50", "p95"])
+                self.assertLessEqual(summary["min"], quantiles["p5"])
+                self.assertLessEqual(quantiles["p5"], quantiles["p50"])
+                self.assertLessEqual(quantiles["p50"], quantiles["p95"])
+                self.assertLessEqual(quantiles["p95"], summary["max"])
+            self.assertEqual(wave.distribution["clear_time_s"]["histogram"]["edges"][-1], durations[wave.wave])
+        self.assertEqual(_evaluate(300, workers=2).to_dict(), result.to_dict())
+
+        adaptive = _evaluate(2000, target=SamplingTarget(relative_error=0.05))
+        for wave in adaptive.wave_results:
+            self.assertEqual(wave.distribution["leaks"]["count"], wave.sampling["runs"])
+
+        plain = evaluate_timeline(
+            scenario=self.scenario,
+            build=build,
+            dataset_version=self.meta.dataset_version,
+            mode="monte_carlo",
+            seed=17,
+            monte_carlo_runs=300,
+        )
+        self.assertNotIn("distribution", plain.to_dict()["wave_results"][0])
+        self.assertEqual(plain.wave_results[0].combat_damage, result.wave_results[0].combat_damage)
+        with self.assertRaises(ValueError):
+            _evaluate(10, bins=0)
+
+    def test_iter_timeline_streams_waves_with_running_totals(self) -> None:
+        build = BuildPlan.from_dict(
+            {
+                "scenario_id": "normal_baseline",
+                "towers": [{"tower_id": "arrow_tower", "count": 1, "level": 0}],
+                "actions": [
+                    {"wave": 2, "type": "build", "target_id": "frost_tower", "value": 1, "payload": {"level": 0}},
+                ],
+            }
+        )
+        arguments = {
+            "scenario": self.scenario,
+            "build": build,
+            "dataset_version": self.meta.dataset_version,
+            "seed": 3,
+            "monte_carlo_runs": 70,
+        }
+        for mode, target in (("expected", None), ("monte_carlo", None), ("monte_carlo", SamplingTarget(ci_width=400.0))):
+            full = evaluate_timeline(mode=mode, sampling_target=target, **arguments)
+            stream = iter_timeline(mode=mode, sampling_target=target, **arguments)
+            first = next(stream)
+            self.assertEqual(first.completed, 1)
+            self.assertEqual(first.total_waves, len(self.scenario.waves))
+            self.assertEqual(first.wave_result, full.wave_results[0])
+            progress = [first, *stream]
+            self.assertEqual([item.wave_result for item in progress], list(full.wave_results))
+            self.assertEqual(progress[-1].totals, full.totals)
+            self.assertEqual(progress[-1].sampling, full.sampling)
+            self.assertEqual(progress[0].economy_totals["build_actions"], 0)
+            self.assertEqual(progress[-1].economy_totals, full.economy_totals)
+
+        with self.assertRaises(ValueError):
+            iter_timeline(mode="bogus", **arguments)
+
+        # Abandoning a stream (e.g. a disconnected SSE client) closes the pool iterator behind it.
+        opened = []
+
+        def _recording_imap(*args: object) -> object:
+            iterator = parallel.imap_ordered(*args)
+            opened.append(iterator)
+            return iterator
+
+        for mode in ("combat", "monte_carlo"):
+            opened.clear()
+            with mock.patch("nordhold.realtime.engine.imap_ordered", side_effect=_recording_imap):
+                stream = iter_timeline(mode=mode, workers=2, **arguments)
+                next(stream)
+                stream.close()
+            self.assertEqual(len(opened), 1)
+            self.assertIsNone(opened[0].gi_frame)
+
+    def test_counter_streams_are_addressed_by_slot_and_shot(self) -> None:
+        first = CounterStreams(seed=3, wave_index=2, run_index=5).shot(1, 7)
+        again = CounterStreams(seed=3, wave_index=2, run_index=5).shot(1, 7)
+        values = [first.random() for _ in range(3)]
+        self.assertEqual(values, [again.random() for _ in range(3)])
+        self.assertEqual(len(set(values)), 3)
+        self.assertNotEqual(values[0], CounterStreams(3, 2, 5).shot(2, 7).random())
+        self.assertNotEqual(values[0], CounterStreams(3, 2, 5).shot(1, 8).random())
+
+        base = CounterStreams(3, 2, 4, antithetic=True).shot(0, 0).random()
+        mirrored = CounterStreams(3, 2, 5, antithetic=True).shot(0, 0).random()
+        self.assertAlmostEqual(base + mirrored, 1.0, places=12)
+
+    def test_common_random_numbers_reduce_compare_difference_variance(self) -> None:
+        builds = [
+            BuildPlan.from_dict(
+                {
+                    "scenario_id": "normal_baseline",
+                    "towers": [
+                        {"tower_id": "arrow_tower", "count": 1, "level": level},
+                        {"tower_id": "frost_tower", "count": 1, "level": 0},
+                    ],
+                }
+            )
+            for level in (0, 1)
+        ]
+
+        def _difference_variance(variance_reduction: str) -> float:
+            differences = []
+            for replicate in range(12):
+                ranked = compare_builds(
+                    scenario=self.scenario,
+                    dataset_version=self.meta.dataset_version,
+                    builds=builds,
+                    mode="monte_carlo",
+                    seed=1000 + replicate * 7,
+                    monte_carlo_runs=8,
+                    variance_reduction=variance_reduction,
+                )["ranked"]
+                combat = {entry["index"]: entry["totals"]["combat_damage"] for entry in ranked}
+                differences.append(combat[2] - combat[1])
+            mean = sum(differences) / len(differences)
+            return sum((value - mean) ** 2 for value in differences) / (len(differences) - 1)
+
+        self.assertLess(_difference_variance("crn") * 2.0, _difference_variance("none"))
+
+    def test_compare_shares_waves_before_the_divergence_wave(self) -> None:
+        common = [
+            {"wave": 1, "type": "build", "target_id": "frost_tower", "value": 1, "payload": {"level": 0}},
+            {"wave": 1, "type": "assign_workers", "payload": {"gold": 2, "essence": 1}},
+        ]
+        variants = [
+            [],
+            [{"wave": 2, "type": "upgrade", "target_id": "arrow_tower", "value": 1}],
+            [{"wave": 2, "type": "build", "target_id": "arrow_tower", "value": 2, "payload": {"level": 1}}],
+        ]
+        builds = [
+            BuildPlan.from_dict(
+                {
+                    "scenario_id": "normal_baseline",
+                    "towers": [{"tower_id": "arrow_tower", "count": 1, "level": 0}],
+                    "actions": common + variant,
+                }
+            )
+            for variant in variants
+        ]
+
+        for mode, variance_reduction in (("expected", "none"), ("monte_carlo", "crn")):
+            diagnostics = EngineDiagnostics()
+            compared = compare_builds(
+                scenario=self.scenario,
+                dataset_version=self.meta.dataset_version,
+                builds=builds,
+                mode=mode,
+                seed=8,
+                monte_carlo_runs=24,
+                variance_reduction=variance_reduction,
+                sampling_target=SamplingTarget(ci_width=1e6) if mode == "monte_carlo" else None,
+                diagnostics=diagnostics,
+            )
+            self.assertEqual(
+                compared["shared_prefix"], {"divergence_wave": 2, "shared_waves": 1, "wave_evaluations_saved": 2}
+            )
+            self.assertEqual([wave[0] for wave in diagnostics.waves], [1, 2, 2, 2])
+            for entry in compared["ranked"]:
+                separate = evaluate_timeline(
+                    scenario=self.scenario,
+                    build=builds[entry["index"] - 1],
+                    dataset_version=self.meta.dataset_version,
+                    mode=mode,
+                    seed=8,
+                    monte_carlo_runs=24,
+                    sampling_target=SamplingTarget(ci_width=1e6) if mode == "monte_carlo" else None,
+                    random_streams="counter" if variance_reduction == "crn" else "sequential",
+                )
+                self.assertEqual(entry["totals"], separate.totals)
+                self.assertEqual(entry.get("sampling"), separate.sampling)
+
+        identical = compare_builds(
+            scenario=self.scenario,
+            dataset_version=self.meta.dataset_version,
+            builds=[builds[1], builds[1]],
+            mode="expected",
+            seed=8,
+            monte_carlo_runs=1,
+        )
+        self.assertEqual(identical["shared_prefix"]["divergence_wave"], None)
+        self.assertEqual(identical["shared_prefix"]["wave_evaluations_saved"], len(self.scenario.waves))
+        self.assertEqual(identical["ranked"][0]["totals"], identical["ranked"][1]["totals"])
+
+        independent = compare_builds(
+            scenario=self.scenario,
+            dataset_version=self.meta.dataset_version,
+            builds=builds,
+            mode="monte_carlo",
+            seed=8,
+            monte_carlo_runs=8,
+        )
+        self.assertNotIn("shared_prefix", independent)
+
+        # Plans that first differ on a wave-0 action diverge before the first wave: nothing is shared.
+        early = [
+            BuildPlan.from_dict(
+                {
+                    "scenario_id": "normal_baseline",
+                    "towers": [{"tower_id": "arrow_tower", "count": 1, "level": 0}],
+                    "actions": [{"wave": 0, "type": "build", "target_id": tower_id, "value": 1, "payload": {"level": 0}}],
+                }
+            )
+            for tower_id in ("frost_tower", "arrow_tower")
+        ]
+        diverged = compare_builds(
+            scenario=self.scenario,
+            dataset_version=self.meta.dataset_version,
+            builds=early,
+            mode="expected",
+            seed=8,
+            monte_carlo_runs=1,
+        )
+        self.assertNotIn("shared_prefix", diverged)
+        for entry in diverged["ranked"]:
+            separate = evaluate_timeline(
+                scenario=self.scenario,
+                build=early[entry["index"] - 1],
+                dataset_version=self.meta.dataset_version,
+                mode="expected",
+                seed=8,
+                monte_carlo_runs=1,
+            )
+            self.assertEqual(entry["totals"], separate.totals)
+
+    def test_scaled_scenario_overlay_matches_rebuilt_definition(self) -> None:
+        build = BuildPlan.from_dict(
+            {
+                "scenario_id": "normal_baseline",
+                "towers": [
+                    {"tower_id": "arrow_tower", "count": 2, "level": 1},
+                    {"tower_id": "frost_tower", "count": 1, "level": 0},
+                ],
+            }
+        )
+        scales = ScenarioScales(tower_damage=1.2, tower_accuracy=0.7, enemy_hp=1.3, enemy_armor=0.5)
+        rebuilt = replace(
+            self.scenario,
+            towers={
+                tower_id: replace(tower, base_stats=scales.scale_tower(tower.base_stats))
+                for tower_id, tower in self.scenario.towers.items()
+            },
+            enemies={enemy_id: scales.scale_enemy(enemy) for enemy_id, enemy in self.scenario.enemies.items()},
+        )
+        compiled = compile_scenario(self.scenario)
+        overlay = compiled.scaled(scales)
+        self.assertIs(overlay.definition, compiled.definition)
+        self.assertIs(overlay.waves[0].spawn_order, compiled.waves[0].spawn_order)
+        self.assertNotEqual(overlay.fingerprint, compiled.fingerprint)
+        self.assertIs(compiled.scaled(ScenarioScales()), compiled)
+        for mode in ("expected", "combat", "monte_carlo"):
+            arguments = {
+                "build": build,
+                "dataset_version": self.meta.dataset_version,
+                "mode": mode,
+                "seed": 4,
+                "monte_carlo_runs": 12,
+            }
+            self.assertEqual(
+                evaluate_timeline(scenario=overlay, **arguments).to_dict(),
+                evaluate_timeline(scenario=rebuilt, **arguments).to_dict(),
+            )
+        with self.assertRaises(ValueError):
+            evaluate_timeline(scenario=overlay, stats_cache=compiled.stats_cache, **arguments)
+
+    def test_sensitivity_grid_returns_dense_worker_independent_grid(self) -> None:
+        build = BuildPlan.from_dict(
+            {
+                "scenario_id": "normal_baseline",
+                "towers": [{"tower_id": "arrow_tower", "count": 2, "level": 1}],
+            }
+        )
+        arguments = {
+            "scenario": self.scenario,
+            "dataset_version": self.meta.dataset_version,
+            "build": build,
+            "mode": "combat",
+            "seed": 6,
+            "monte_carlo_runs": 1,
+        }
+        parameters = {"tower_damage_scale": [0.8, 1.0, 1.2], "enemy_hp_scale": [1.0, 1.5]}
+        grid = sensitivity_grid(parameters=parameters, **arguments)
+        self.assertEqual(grid["shape"], [3, 2])
+        self.assertEqual([axis["name"] for axis in grid["parameters"]], ["tower_damage_scale", "enemy_hp_scale"])
+        self.assertEqual(grid["combat_damage"][1][0], grid["baseline"]["combat_damage"])
+        self.assertEqual(grid["delta_pct_vs_baseline"][1][0], 0.0)
+        damage_points = sensitivity_analysis(parameter="tower_damage_scale", values=[0.8, 1.0, 1.2], **arguments)
+        self.assertEqual(
+            [row[0] for row in grid["combat_damage"]],
+            [point["combat_damage"] for point in damage_points["points"]],
+        )
+        self.assertGreater(grid["leaks"][0][1], grid["leaks"][0][0])
+        self.assertEqual(sensitivity_grid(parameters=parameters, workers=2, **arguments), grid)
+
+        with self.assertRaises(ValueError):
+            sensitivity_grid(parameters={"tower_range_scale": [1.0]}, **arguments)
+        with self.assertRaises(ValueError):
+            sensitivity_grid(parameters={"enemy_hp_scale": []}, **arguments)
+
+    def test_global_sensitivity_returns_sobol_and_morris_indices(self) -> None:
+        build = BuildPlan.from_dict(
+            {
+                "scenario_id": "normal_baseline",
+                "towers": [{"tower_id": "arrow_tower", "count": 2, "level": 1}],
+            }
+        )
+        arguments = {
+            "scenario": self.scenario,
+            "dataset_version": self.meta.dataset_version,
+            "build": build,
+            "mode": "expected",
+            "seed": 7,
+            "monte_carlo_runs": 1,
+        }
+        # A pinned factor never changes the output, so both methods must report it as inert.
+        parameters = {"tower_damage_scale": [0.8, 1.2], "enemy_hp_scale": [0.8, 1.2], "enemy_armor_scale": [1.0, 1.0]}
+        sobol = global_sensitivity(parameters=parameters, samples=64, **arguments)
+        self.assertEqual(sobol["evaluations"], 64 * 5)
+        self.assertGreater(sobol["variance"], 0.0)
+        self.assertEqual(sobol["indices"]["enemy_armor_scale"], {"first_order": 0.0, "total": 0.0})
+        damage = sobol["indices"]["tower_damage_scale"]
+        self.assertGreater(damage["total"], sobol["indices"]["enemy_hp_scale"]["total"])
+        self.assertGreater(damage["first_order"], 0.5)
+        self.assertLessEqual(damage["first_order"], damage["total"] + 0.05)
+        self.assertEqual(global_sensitivity(parameters=parameters, samples=64, **arguments), sobol)
+
+        morris = global_sensitivity(method="morris", parameters=parameters, samples=8, **arguments)
+        self.assertEqual(morris["evaluations"], 8 * 4)
+        self.assertEqual(morris["indices"]["enemy_armor_scale"], {"mu": 0.0, "mu_star": 0.0, "sigma": 0.0})
+        self.assertGreater(morris["indices"]["tower_damage_scale"]["mu"], 0.0)
+
+        combat = {**arguments, "mode": "combat", "metric": "leaks"}
+        pooled = global_sensitivity(method="morris", parameters=parameters, samples=3, workers=2, **combat)
+        self.assertEqual(global_sensitivity(method="morris", parameters=parameters, samples=3, **combat), pooled)
+
+        with self.assertRaises(ValueError):
+            global_sensitivity(method="fast", **arguments)
+        with self.assertRaises(ValueError):
+            global_sensitivity(parameters={"enemy_hp_scale": [1.2, 0.8]}, **arguments)
+
+    def test_morris_trajectories_stay_within_bounds_for_odd_levels(self) -> None:
+        bounds = _factor_bounds({"tower_damage_scale": [0.0, 2.0], "enemy_hp_scale": [0.5, 1.5]})
+        for levels in (2, 3, 4, 5, 7):
+            plan, steps = _morris_plan(len(bounds), 20, levels, random.Random(levels))
+            self.assertEqual(len(plan), 20 * (len(bounds) + 1))
+            self.assertTrue(all(step > 0.0 for trajectory in steps for _, step in trajectory))
+            for unit in plan:
+                scales = _scales_at(bounds, unit)
+                self.assertTrue(0.0 <= scales.tower_damage <= 2.0, (levels, unit))
+                self.assertTrue(0.5 <= scales.enemy_hp <= 1.5, (levels, unit))
+
+    def test_optimize_build_returns_affordable_top_plans_with_timelines(self) -> None:
+        base = BuildPlan.from_dict(
+            {
+                "scenario_id": "normal_baseline",
+                "towers": [{"tower_id": "arrow_tower", "count": 1, "level": 0}],
+            }
+        )
+        arguments = {
+            "scenario": self.scenario,
+            "dataset_version": self.meta.dataset_version,
+            "build": base,
+            "seed": 5,
+            "monte_carlo_runs": 1,
+            "top_k": 3,
+        }
+        baseline = evaluate_timeline(
+            scenario=self.scenario,
+            build=base,
+            dataset_version=self.meta.dataset_version,
+            mode="expected",
+            seed=5,
+            monte_carlo_runs=1,
+        )
+        beam = optimize_build(mode="expected", **arguments)
+        self.assertEqual([item["rank"] for item in beam["plans"]], [1, 2, 3])
+        self.assertLess(beam["affordable_plans"], beam["evaluated_plans"])
+        best = beam["plans"][0]
+        self.assertGreater(best["timeline"]["totals"]["combat_damage"], baseline.totals["combat_damage"])
+        for item in beam["plans"]:
+            plan = BuildPlan.from_dict(item["build_plan"])
+            self.assertEqual(plan.towers, base.towers)
+            self.assertTrue(all(action.type == "build" for action in plan.actions))
+            result = evaluate_timeline(
+                scenario=self.scenario,
+                build=plan,
+                dataset_version=self.meta.dataset_version,
+                mode="expected",
+                seed=item["timeline"]["seed"],
+                monte_carlo_runs=1,
+            )
+            self.assertEqual(result.to_dict(), item["timeline"])
+            self.assertAlmostEqual(item["surrogate"]["combat_damage"], result.totals["combat_damage"], places=6)
+            self.assertAlmostEqual(item["surrogate"]["net_gold"], result.totals["economy"]["net_gold"], places=6)
+            self.assertGreaterEqual(item["surrogate"]["net_gold"], 0.0)
+            resumed = affordable_net_gold(self.scenario, plan, checkpoint_timeline(self.scenario, plan, 2))
+            self.assertEqual(resumed, item["surrogate"]["net_gold"])
+
+        # Up to four of the six purchases make 210 bundles for one wave alone; the shortlist keeps
+        # the whole two-wave beam below that without losing the best plan.
+        wide = optimize_build(mode="expected", max_builds_per_wave=4, shortlist=2, **arguments)
+        self.assertLess(wide["evaluated_plans"], 210)
+        self.assertEqual(wide["plans"][0]["surrogate"], beam["plans"][0]["surrogate"])
+
+        genetic = optimize_build(mode="expected", strategy="genetic", population=12, generations=4, **arguments)
+        self.assertEqual(optimize_build(mode="expected", strategy="genetic", population=12, generations=4, **arguments), genetic)
+        self.assertGreater(genetic["plans"][0]["surrogate"]["combat_damage"], baseline.totals["combat_damage"])
+
+        combat = optimize_build(mode="combat", **arguments)
+        combat_damage = [item["timeline"]["totals"]["combat_damage"] for item in combat["plans"]]
+        self.assertEqual(combat_damage, sorted(combat_damage, reverse=True))
+        self.assertEqual(optimize_build(mode="combat", workers=2, **arguments), combat)
+
+        with self.assertRaises(ValueError):
+            optimize_build(mode="expected", tower_ids=["cannon_tower"], **arguments)
+        with self.assertRaises(ValueError):
+            optimize_build(mode="expected", strategy="annealing", **arguments)
+        overspent = BuildPlan.from_dict(
+            {
+                "scenario_id": "normal_baseline",
+                "towers": [],
+                "actions": [{"wave": 1, "type": "build", "payload": {"tower_id": "frost_tower", "count": 3, "level": 2}}],
+            }
+        )
+        with self.assertRaises(ValueError):
+            optimize_build(mode="expected", **{**arguments, "build": overspent})
+
+    def test_optimize_build_ranks_saturated_plans_by_leaks_then_gold(self) -> None:
+        base = BuildPlan.from_dict(
+            {
+                "scenario_id": "normal_baseline",
+                "towers": [{"tower_id": "arrow_tower", "count": 2, "level": 1}],
+            }
+        )
+        expected = evaluate_timeline(
+            scenario=self.scenario,
+            build=base,
+            dataset_version=self.meta.dataset_version,
+            mode="expected",
+            seed=5,
+            monte_carlo_runs=1,
+        )
+        self.assertAlmostEqual(affordable_net_gold(self.scenario, base), expected.totals["economy"]["net_gold"], places=6)
+
+        # Strong normal_baseline plans deal its whole wave HP; summation noise must not outrank a leak.
+        saturated = 24240.0
+        candidates = [
+            {"schedule": ((),), "combat_damage": saturated, "leaks": 1.0, "net_gold": 500.0},
+            {"schedule": ((),), "combat_damage": saturated - 1e-9, "leaks": 0.0, "net_gold": 100.0},
+            {"schedule": ((),), "combat_damage": saturated, "leaks": 0.0, "net_gold": 200.0},
+        ]
+        ranked = sorted(candidates, key=_candidate_key)
+        self.assertEqual([(item["leaks"], item["net_gold"]) for item in ranked], [(0.0, 200.0), (0.0, 100.0), (1.0, 500.0)])
+        timelines = [
+            {
+                "timeline": {
+                    "totals": {
+                        "combat_damage": item["combat_damage"],
+                        "leaks": item["leaks"],
+                        "economy": {"net_gold": item["net_gold"]},
+                    }
+                }
+            }
+            for item in candidates
+        ]
+        self.assertEqual(
+            [item["timeline"]["totals"]["leaks"] for item in sorted(timelines, key=_timeline_key)], [0.0, 0.0, 1.0]
+        )
+
+        combat = optimize_build(
+            scenario=self.scenario,
+            dataset_version=self.meta.dataset_version,
+            build=base,
+            mode="monte_carlo",
+            seed=5,
+            monte_carlo_runs=8,
+            top_k=4,
+        )
+        self.assertEqual(combat["plans"], sorted(combat["plans"], key=_timeline_key))
+        self.assertTrue(all(item["timeline"]["totals"]["combat_damage"] == saturated for item in combat["plans"]))
+
+    def test_compare_screening_prunes_builds_that_cannot_reach_top_k(self) -> None:
+        builds = [
+            BuildPlan.from_dict(
+                {
+                    "scenario_id": "normal_baseline",
+                    "towers": [{"tower_id": "arrow_tower", "count": count, "level": level}],
+                }
+            )
+            for count, level in ((1, 0), (4, 2), (1, 1), (3, 2), (2, 0))
+        ]
+
+        def _compare(**options: object) -> dict:
+            return compare_builds(
+                scenario=self.scenario,
+                dataset_version=self.meta.dataset_version,
+                builds=builds,
+                mode="monte_carlo",
+                seed=5,
+                monte_carlo_runs=16,
+                **options,
+            )
+
+        full = _compare()
+        screened = _compare(screen_top_k=2, screening_margin=0.1)
+        screening = screened["screening"]
+        pruned = {item["index"] for item in screening["pruned"]}
+        survivors = [entry["index"] for entry in screened["ranked"]]
+        self.assertTrue(pruned)
+        self.assertEqual(sorted(pruned | set(survivors)), [1, 2, 3, 4, 5])
+        self.assertEqual(screening["evaluated"], len(survivors))
+        self.assertTrue(all(item["pruned_at"] == "expected" for item in screening["pruned"]))
+        self.assertTrue(all(item["optimistic_damage"] < screening["threshold"] for item in screening["pruned"]))
+        self.assertEqual(screening["rule"], "heuristic_margin")
+        # A wider heuristic margin keeps more builds.
+        wider = _compare(screen_top_k=2, screening_margin=0.9)["screening"]
+        self.assertLessEqual(len(wider["pruned"]), len(screening["pruned"]))
+        # Survivors are evaluated exactly as without screening, so the top K is unchanged.
+        full_by_index = {entry["index"]: entry for entry in full["ranked"]}
+        for entry in screened["ranked"]:
+            self.assertEqual(entry["totals"], full_by_index[entry["index"]]["totals"])
+        self.assertEqual(
+            [entry["index"] for entry in screened["ranked"][:2]],
+            [entry["index"] for entry in full["ranked"][:2]],
+        )
+
+        self.assertNotIn("screening", full)
+        with self.assertRaises(ValueError):
+            _compare(screen_top_k=0)
+        with self.assertRaises(ValueError):
+            _compare(screen_top_k=1, screening_margin=1.5)
+
+    def test_counter_streams_and_antithetic_runs_are_worker_invariant(self) -> None:
+        build = BuildPlan.from_dict(
+            {"scenario_id": "normal_baseline", "towers": [{"tower_id": "arrow_tower", "count": 2, "level": 0}]}
+        )
+
+        def _evaluate(workers: int, random_streams: str, antithetic: bool, engine: str = "scalar") -> dict:
+            return evaluate_timeline(
+                scenario=self.scenario,
+                build=build,
+                dataset_version=self.meta.dataset_version,
+                mode="monte_carlo",
+                seed=13,
+                monte_carlo_runs=40,
+                engine=engine,
+                workers=workers,
+                random_streams=random_streams,
+                antithetic=antithetic,
+            ).to_dict()
+
+        for random_streams in ("sequential", "counter"):
+            for antithetic in (False, True):
+                self.assertEqual(
+                    _evaluate(1, random_streams, antithetic),
+                    _evaluate(2, random_streams, antithetic),
+                )
+        with self.assertRaises(ValueError):
+            _evaluate(1, "philox", False)
+
+    def test_vectorized_counter_streams_reproduce_scalar_runs(self) -> None:
+        from nordhold.realtime.vectorized import simulate_wave_batch, vectorized_available
+
+        if not vectorized_available():
+            self.skipTest("numpy is not installed in this environment")
+
+        # Fast regeneration makes kills near full HP sensitive to when each run regenerates.
+        regenerating = replace(
+            self.scenario,
+            enemies={enemy_id: replace(enemy, regen_per_s=20.0) for enemy_id, enemy in self.scenario.enemies.items()},
+        )
+        build = BuildPlan.from_dict(
+            {
+                "scenario_id": "normal_baseline",
+                "towers": [
+                    {"tower_id": "arrow_tower", "count": 2, "level": 1, "focus_priorities": ["lowest_hp"]},
+                    {
+                        "tower_id": "frost_tower",
+                        "count": 1,
+                        "level": 1,
+                        "focus_priorities": ["barrier", "highest_hp"],
+                        "focus_until_death": True,
+                    },
+                ],
+            }
+        )
+        for scenario in (self.scenario, regenerating):
+            compiled = compile_scenario(scenario)
+            cursor = _TimelineCursor(build)
+            for wave in compiled.waves:
+                runtime = cursor.advance(wave.index)
+                specs, slots = _batch_tower_specs(compiled, runtime, compiled.stats_cache)
+                for antithetic in (False, True):
+                    batch = simulate_wave_batch(
+                        compiled,
+                        wave,
+                        specs,
+                        seed=13,
+                        runs=10,
+                        batch_runs=4,
+                        antithetic=antithetic,
+                        random_streams="counter",
+                        run_start=6,
+                        tower_slots=slots,
+                    )
+                    for run in range(10):
+                        scalar = _simulate_wave_combat(
+                            compiled,
+                            wave,
+                            runtime,
+                            CounterStreams(13, wave.index, 6 + run, antithetic),
+                            sampled=True,
+                            stats_cache=compiled.stats_cache,
+                        )
+                        # Same events, draws and regeneration steps: the sums match to the bit.
+                        self.assertEqual(float(batch.total_damage[run]), scalar.potential_damage)
+                        self.assertEqual(float(batch.leaks[run]), scalar.leaks)
+                        self.assertEqual(float(batch.clear_time_s[run]), scalar.clear_time_s)
+
+        results = [
+            evaluate_timeline(
+                scenario=self.scenario,
+                build=build,
+                dataset_version=self.meta.dataset_version,
+                mode="monte_carlo",
+                seed=13,
+                monte_carlo_runs=40,
+                engine=engine,
+                workers=workers,
+                random_streams="counter",
+            )
+            for engine, workers in (("scalar", 1), ("vectorized", 1), ("vectorized", 2))
+        ]
+        for scalar_wave, *vector_waves in zip(*(result.wave_results for result in results)):
+            for vector_wave in vector_waves:
+                self.assertAlmostEqual(vector_wave.combat_damage, scalar_wave.combat_damage, places=6)
+                self.assertAlmostEqual(vector_wave.leaks, scalar_wave.leaks, places=9)
+
+    def test_unknown_engine_is_rejected(self) -> None:
+        build = BuildPlan.from_dict(
+            {"scenario_id": "normal_baseline", "towers": [{"tower_id": "arrow_tower", "count": 1, "level": 0}]}
+        )
+        with self.assertRaises(ValueError):
+            evaluate_timeline(
+                scenario=self.scenario,
+                build=build,
+                dataset_version=self.meta.dataset_version,
+                mode="monte_carlo",
+                seed=1,
+                monte_carlo_runs=4,
+                engine="gpu",
+            )
+
 
 if __name__ == "__main__":
     unittest.main()